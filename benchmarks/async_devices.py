@@ -0,0 +1,151 @@
+"""
+Compares driving several devices from a plain loop, from a thread pool
+and from an asyncio event loop.
+
+Every tick reads and then commands each device, as the high stress demo
+does, against the simulator with a fixed per-call latency standing in
+for the serial link. Run with:
+
+    python -m benchmarks.async_devices [--devices 4] [--latency 0.0003]
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import sys
+from time import perf_counter_ns
+
+from flexsea import fxEnums as fxe
+
+from flexsea_demos.async_device import AsyncDevice
+from flexsea_demos.device import open_devices
+from flexsea_demos.scheduler import AsyncLoopScheduler
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.sim import SimFlexSEA
+
+
+# ============================================
+#                 _tick
+# ============================================
+def _tick(device, value):
+    device.read(max_age=0)
+    send_time = perf_counter_ns()
+    device.motor(fxe.FX_CURRENT, value)
+    return send_time
+
+
+# ============================================
+#               run_serial
+# ============================================
+def run_serial(devices, scheduler, n_ticks):
+    """
+    Sends each tick to one device after the other.
+
+    Returns
+    -------
+    list
+        The spread (in ns) of each tick's send times across devices.
+    """
+    skews = []
+    scheduler.start()
+    for i in range(n_ticks):
+        scheduler.wait()
+        send_times = [_tick(device, i) for device in devices]
+        skews.append(max(send_times) - min(send_times))
+    scheduler.stop()
+    return skews
+
+
+# ============================================
+#               run_threads
+# ============================================
+def run_threads(devices, scheduler, n_ticks):
+    """
+    Sends each tick to every device at once from a thread per device.
+    """
+    skews = []
+    with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+        scheduler.start()
+        for i in range(n_ticks):
+            scheduler.wait()
+            futures = [executor.submit(_tick, device, i) for device in devices]
+            send_times = [future.result() for future in futures]
+            skews.append(max(send_times) - min(send_times))
+        scheduler.stop()
+    return skews
+
+
+# ============================================
+#               run_asyncio
+# ============================================
+def run_asyncio(devices, scheduler, n_ticks):
+    """
+    Sends each tick to every device at once from a coroutine per
+    device, using `AsyncDevice`.
+    """
+
+    async def tick(device, value):
+        await device.read(max_age=0)
+        send_time = perf_counter_ns()
+        await device.motor(fxe.FX_CURRENT, value)
+        return send_time
+
+    async def run():
+        skews = []
+        with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+            async_devices = [AsyncDevice(device, executor) for device in devices]
+            scheduler.start()
+            for i in range(n_ticks):
+                await scheduler.wait()
+                send_times = await asyncio.gather(
+                    *(tick(device, i) for device in async_devices)
+                )
+                skews.append(max(send_times) - min(send_times))
+            scheduler.stop()
+        return skews
+
+    return asyncio.run(run())
+
+
+# ============================================
+#                   main
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0003)
+    parser.add_argument("--freq", type=float, default=1000.0)
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--spin-time", type=float, default=0.0005)
+    args = parser.parse_args(argv)
+
+    fxs = SimFlexSEA(latency=args.latency, ready_delay=0.0)
+    ports = [f"sim{i}" for i in range(args.devices)]
+    devices = open_devices(fxs, ports, 230400, stream_freq=int(args.freq))
+
+    print(
+        f"\n{args.devices} devices, {args.latency * 1e3:.2f} ms per call, "
+        f"{args.freq:.0f} Hz requested"
+    )
+    print(f"{'mode':<8} {'achieved Hz':>12} {'skew mean ms':>13} {'skew p99 ms':>12}")
+    for name, run, scheduler_class in (
+        ("serial", run_serial, LoopScheduler),
+        ("threads", run_threads, LoopScheduler),
+        ("asyncio", run_asyncio, AsyncLoopScheduler),
+    ):
+        scheduler = scheduler_class(args.freq, args.spin_time)
+        skews = sorted(run(devices, scheduler, args.ticks))
+        p99 = skews[min(len(skews) - 1, int(0.99 * len(skews)))]
+        print(
+            f"{name:<8} {scheduler.stats()['achieved_freq']:>12.1f} "
+            f"{statistics.mean(skews) / 1e6:>13.3f} {p99 / 1e6:>12.3f}"
+        )
+
+    for device in devices:
+        device.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
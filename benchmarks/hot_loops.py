@@ -0,0 +1,491 @@
+"""
+Drives each demo's control loop against the simulator and compares the
+results with a stored baseline.
+
+The loops run unpaced (as fast as they can) unless `--freq` is given,
+so the achieved frequency measures the cost of the Python layer: the
+command's own loop, `Device` and the recorders. Each loop is run
+`--repeat` times, each time right after a reference loop that only
+reads and commands a device straight through the simulator. For each
+loop this reports the achieved frequency, its cost (the median time of
+one of its ticks over that of a reference tick) and the memory blocks
+still allocated per tick once it's done, and for `Device` how much
+slower each call is than the library call it wraps. Run with:
+
+    python -m benchmarks.hot_loops [--latency 0] [--ticks 2000] [--repeat 7]
+
+The costs and the `Device` ratios are relative to loops measured in the
+same process, so they can be compared across runs and machines, unlike
+the frequencies and times, which are only printed. Any of them that's
+worse than the baseline by more than `--tolerance` is reported and
+makes the script exit with 1. `--save` stores the results as the new
+baseline.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import statistics
+import sys
+from time import perf_counter_ns
+from types import SimpleNamespace
+
+from flexsea import fxEnums as fxe
+
+from flexsea_demos.dashboard import Dashboard
+from flexsea_demos.device import Device
+from flexsea_demos.device import open_devices
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.sim import SimFlexSEA
+from flexsea_demos.utils import assign_params
+from flexsea_demos.utils import read_yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASELINE = os.path.join(ROOT, "benchmarks", "hot_loops_baseline.json")
+
+# Loop rate that's never reached, i.e., unpaced
+UNPACED = 1e9
+
+
+# ============================================
+#                 _command
+# ============================================
+def _command(module, class_name, param_file, fxs, ticks, rate):
+    """
+    Creates a demo command with the parameters of its sample parameter
+    file, as `handle` would, and sizes its loop to `ticks` iterations.
+    """
+    # pylint: disable=import-outside-toplevel
+    from importlib import import_module
+
+    cls = getattr(import_module(f"flexsea_demos.commands.{module}"), class_name)
+    command = cls()
+    assign_params(command, read_yaml(os.path.join(ROOT, "param_files", param_file)))
+    command.fxs = fxs
+    command.ports = [f"sim{i}" for i in range(len(command.ports))]
+    command.nLoops = ticks
+    if hasattr(command, "loop_delay"):
+        command.loop_delay = command.run_time / ticks
+    if hasattr(command, "transition_steps"):
+        command.transition_steps = int(command.transition_time / command.loop_delay)
+    command.scheduler = LoopScheduler(rate)
+    # Drawn to nowhere, but at the demo's rate
+    command.dashboard = Dashboard(stream=io.StringIO())
+    return command
+
+
+# ============================================
+#              _single_device
+# ============================================
+def _single_device(module, class_name, param_file, method, steps=()):
+    """
+    Builds the setup function of a demo that runs one device at a time.
+    `steps` are the command's methods that `handle` calls before the
+    loop, in order.
+    """
+
+    def prepare(fxs, ticks, rate):
+        command = _command(module, class_name, param_file, fxs, ticks, rate)
+        for step in steps:
+            getattr(command, step)()
+        device = Device(fxs, command.ports[0], command.baud_rate)
+        if getattr(command, "gains", None):
+            device.set_gains(command.gains)
+        return command, lambda: getattr(command, method)(device)
+
+    return prepare
+
+
+# ============================================
+#              _two_devices
+# ============================================
+def _two_devices(module, class_name, param_file, method, steps=()):
+    """
+    Builds the setup function of a demo that runs two devices at once.
+    `steps` are run once the devices are open, and may not change the
+    size or the rate of the loop.
+    """
+
+    def prepare(fxs, ticks, rate):
+        command = _command(module, class_name, param_file, fxs, ticks, rate)
+        command.devices = open_devices(fxs, command.ports, command.baud_rate)
+        for device in command.devices:
+            device.motor(fxe.FX_POSITION, device.initial_pos)
+        for step in steps:
+            getattr(command, step)()
+        command.nLoops = ticks
+        command.scheduler = LoopScheduler(rate)
+        return command, getattr(command, method)
+
+    return prepare
+
+
+# ============================================
+#              _high_speed
+# ============================================
+def _high_speed(fxs, ticks, rate):
+    # Sets the demo up one step at a time, as its handle() does, so that
+    # only the control loop is timed
+    # pylint: disable=protected-access
+    command = _command(
+        "high_speed", "HighSpeedCommand", "high_speed_params.yaml", fxs, ticks, rate
+    )
+    command.dt = 1.0 / command.cmd_freq
+    command._get_samples()
+    command.nLoops = max(1, ticks // len(command.samples))
+    gains = command._get_gains()
+    command._reset_plot()
+    device = Device(fxs, command.ports[0], command.baud_rate)
+    device.set_controller(command.controller_type)
+    device.set_gains(gains)
+    command._compile_trajectory(device)
+    return command, lambda: command._high_speed(device)
+
+
+# ============================================
+#              _high_stress
+# ============================================
+def _high_stress(fxs, ticks, rate):
+    # Sets the demo up one step at a time, as its handle() does, so that
+    # only the control loop is timed
+    # pylint: disable=protected-access
+    command = _command(
+        "high_stress", "HighStressCommand", "high_stress_params.yaml", fxs, ticks, rate
+    )
+    # A cycle is a few thousand ticks; the second one also runs the
+    # setpoints that are filled in at run time
+    command.nLoops = 2
+    command._prepare()
+    command.scheduler = LoopScheduler(rate)
+
+    def run():
+        command.start_time = perf_counter_ns()
+        command.cmd_count = 0
+        command.scheduler.start()
+        command._high_stress()
+        command.scheduler.stop()
+
+    return command, run
+
+
+# ============================================
+#              _reference
+# ============================================
+def _reference(fxs, ticks, rate):
+    """
+    Sets up the least any demo does on a tick: wait for it, then read a
+    device and command its motor straight through the simulator. The
+    cost of the other loops is measured against this one.
+    """
+    dev_id = fxs.open("sim0", 230400)
+    fxs.start_streaming(dev_id, 100, False)
+    scheduler = LoopScheduler(rate)
+
+    def run():
+        scheduler.start()
+        for _ in range(ticks):
+            scheduler.wait()
+            fxs.read_device(dev_id)
+            fxs.send_motor_command(dev_id, fxe.FX_CURRENT, 0)
+        scheduler.stop()
+
+    return SimpleNamespace(scheduler=scheduler), run
+
+
+# Name of the loop the others are measured against
+REFERENCE = "reference"
+
+# Name of each loop and the function that sets it up. Each function
+# returns the command and a callable that runs its loop
+LOOPS = {
+    "read_only": _single_device(
+        "read_only", "ReadOnlyCommand", "read_only_params.yaml", "_read_only"
+    ),
+    "position_control": _single_device(
+        "position_control",
+        "PositionControlCommand",
+        "position_control_params.yaml",
+        "_position_control",
+        steps=("_reset_errors",),
+    ),
+    "current_control": _single_device(
+        "current_control",
+        "CurrentControlCommand",
+        "current_control_params.yaml",
+        "_current_control",
+        steps=("_compile_trajectory",),
+    ),
+    "open_control": _single_device(
+        "open_control",
+        "OpenControlCommand",
+        "open_control_params.yaml",
+        "_open_control",
+        steps=("_get_voltages", "_compile_trajectory"),
+    ),
+    "impedance_control": _single_device(
+        "impedance_control",
+        "ImpedanceControlCommand",
+        "impedance_control_params.yaml",
+        "_impedance_control",
+        steps=("_reset_plot",),
+    ),
+    "two_position_control": _single_device(
+        "two_position_control",
+        "TwoPositionCommand",
+        "two_position_control_params.yaml",
+        "_two_position_control",
+        steps=("_reset_plot",),
+    ),
+    "leader_follower": _two_devices(
+        "leader_follower",
+        "LeaderFollowerCommand",
+        "leader_follower_params.yaml",
+        "_leader_follower",
+        steps=("_prepare",),
+    ),
+    "two_devices_position_control": _two_devices(
+        "two_dev_pos_control",
+        "TwoDevPositionCommand",
+        "two_devices_position_control_params.yaml",
+        "_two_devices_position_control",
+    ),
+    "high_speed": _high_speed,
+    "high_stress": _high_stress,
+}
+
+
+# ============================================
+#                 _silenced
+# ============================================
+@contextlib.contextmanager
+def _silenced():
+    """
+    Sends everything written to stdout to /dev/null, including what
+    subprocesses (e.g., `clear`) write to the file descriptor.
+    """
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(devnull):
+                yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+# ============================================
+#                 run_loop
+# ============================================
+def run_loop(name, latency=0.0, ticks=2000, rate=UNPACED):
+    """
+    Runs one loop (a demo's or the reference) once, against a fresh
+    simulator.
+
+    Returns
+    -------
+    dict
+        The loop's achieved frequency and iteration count, and the
+        memory blocks still allocated per iteration once it's done (as
+        returned by `sys.getallocatedblocks`). Blocks that are allocated
+        and freed within the loop don't count, so this only catches what
+        the loop keeps, e.g., lists that grow on every tick.
+    """
+    loops = {REFERENCE: _reference, **LOOPS}
+    fxs = SimFlexSEA(latency=latency, ready_delay=0.0)
+    with _silenced():
+        command, run = loops[name](fxs, ticks, rate)
+        gc.collect()
+        blocks = sys.getallocatedblocks()
+        run()
+        blocks = sys.getallocatedblocks() - blocks
+        fxs.close_all()
+
+    stats = command.scheduler.stats()
+    return {
+        "achieved_freq": stats["achieved_freq"],
+        "iterations": stats["iterations"],
+        "retained_blocks_per_tick": blocks / max(stats["iterations"], 1),
+    }
+
+
+# ============================================
+#                measure_loop
+# ============================================
+def measure_loop(name, latency=0.0, ticks=2000, rate=UNPACED, repeat=7):
+    """
+    Runs a demo's loop `repeat` times, each time right after the
+    reference loop. Whatever slows the host down during a pair of runs
+    slows both, so the ratio of their frequencies (the loop's cost) is
+    far steadier than either, and the median of the ratios is kept.
+
+    Returns
+    -------
+    dict
+        The results of `run_loop` for the loop's fastest run, the
+        median cost and the fewest blocks any run retained per tick.
+    """
+    runs = []
+    costs = []
+    for _ in range(repeat):
+        reference = run_loop(REFERENCE, latency, ticks, rate)
+        runs.append(run_loop(name, latency, ticks, rate))
+        costs.append(reference["achieved_freq"] / runs[-1]["achieved_freq"])
+
+    return {
+        **max(runs, key=lambda run: run["achieved_freq"]),
+        "cost": statistics.median(costs),
+        "retained_blocks_per_tick": min(
+            run["retained_blocks_per_tick"] for run in runs
+        ),
+    }
+
+
+# ============================================
+#              device_overhead
+# ============================================
+def device_overhead(n_calls=20000, repeat=7):
+    """
+    Times `Device.read` and `Device.motor` against the library calls
+    they wrap, with no simulated latency. Each is timed `repeat` times,
+    right after its library call, and the medians are kept.
+
+    Returns
+    -------
+    dict
+        The time (in us) each `Device` call adds to its library call,
+        and how many times slower than the library call it is.
+    """
+    fxs = SimFlexSEA(ready_delay=0.0)
+    with _silenced():
+        device = Device(fxs, "sim0", 230400)
+    dev_id = device.dev_id
+
+    def time_calls(call):
+        start = perf_counter_ns()
+        for _ in range(n_calls):
+            call()
+        return (perf_counter_ns() - start) / n_calls / 1e3
+
+    samples = {"read_us": [], "motor_us": [], "read_ratio": [], "motor_ratio": []}
+    for _ in range(repeat):
+        for name, call, raw_call in (
+            ("read", lambda: device.read(max_age=0), lambda: fxs.read_device(dev_id)),
+            (
+                "motor",
+                lambda: device.motor(fxe.FX_CURRENT, 0),
+                lambda: fxs.send_motor_command(dev_id, fxe.FX_CURRENT, 0),
+            ),
+        ):
+            raw = time_calls(raw_call)
+            wrapped = time_calls(call)
+            samples[f"{name}_us"].append(wrapped - raw)
+            samples[f"{name}_ratio"].append(wrapped / raw)
+    fxs.close_all()
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+# ============================================
+#                  compare
+# ============================================
+def compare(results, baseline, tolerance=0.25):
+    """
+    Finds the results that are worse than the baseline.
+
+    Only the metrics that are relative to loops measured in the same
+    run are compared: a cost or a `Device` ratio is a regression if it's
+    more than `tolerance` (relative) above the baseline, and retained
+    blocks per tick if they grow by more than half a block, i.e., if
+    something starts being kept on every other tick. Frequencies and
+    times depend on the host, so they're left out.
+
+    Returns
+    -------
+    list
+        One message per regression.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(name, {}).get(metric)
+            if expected is None:
+                continue
+            if metric == "cost" or metric.endswith("_ratio"):
+                worse = value > expected * (1 + tolerance)
+            elif metric == "retained_blocks_per_tick":
+                worse = value > expected + 0.5
+            else:
+                continue
+            if worse:
+                regressions.append(
+                    f"{name} {metric}: {value:.3f} (baseline {expected:.3f})"
+                )
+    return regressions
+
+
+# ============================================
+#                   main
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--freq", type=float, default=UNPACED)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("loops", nargs="*", default=list(LOOPS))
+    args = parser.parse_args(argv)
+
+    results = {"device": device_overhead(repeat=args.repeat)}
+    device = results["device"]
+    print(
+        f"Device overhead (us): read {device['read_us']:.2f} "
+        f"(x{device['read_ratio']:.2f}), "
+        f"motor {device['motor_us']:.2f} (x{device['motor_ratio']:.2f})\n"
+    )
+    print(
+        f"{'loop':<30} {'ticks':>6} {'achieved Hz':>12} {'cost':>6} "
+        f"{'retained blocks/tick':>21}"
+    )
+    for name in args.loops:
+        results[name] = measure_loop(
+            name, args.latency, args.ticks, args.freq, args.repeat
+        )
+        print(
+            f"{name:<30} {results[name]['iterations']:>6} "
+            f"{results[name]['achieved_freq']:>12.1f} "
+            f"{results[name]['cost']:>6.2f} "
+            f"{results[name]['retained_blocks_per_tick']:>21.3f}"
+        )
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as out_file:
+            json.dump(results, out_file, indent=4)
+        print(f"\nBaseline written to '{args.baseline}'")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at '{args.baseline}', run with --save to create one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as in_file:
+        baseline = json.load(in_file)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} REGRESSIONS against '{args.baseline}':")
+        for regression in regressions:
+            print(f"\t{regression}")
+        return 1
+    print(f"\nNo regressions against '{args.baseline}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
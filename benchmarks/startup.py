@@ -0,0 +1,106 @@
+"""
+Measures how long it takes to start the `flexsea_demos` CLI.
+
+Each measurement runs in a fresh interpreter, since import costs are
+only paid once per process. Run with:
+
+    python -m benchmarks.startup
+"""
+
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+# Modules that must not be imported just to build the application
+HEAVY_MODULES = [
+    "matplotlib",
+    "numpy",
+    "flexsea.flexsea",
+    "flexsea.fxPlotting",
+    "flexsea.dev_spec",
+]
+
+STARTUP = (
+    "import sys\n"
+    "from flexsea_demos.app import FlexseaDemoApplication\n"
+    "FlexseaDemoApplication()\n"
+    "print(','.join(m for m in {modules} if m in sys.modules))\n"
+)
+
+
+# ============================================
+#               loaded_modules
+# ============================================
+def loaded_modules(modules=None):
+    """
+    Builds the application in a fresh interpreter.
+
+    Parameters
+    ----------
+    modules : list, optional
+        Names of the modules to look for. Defaults to `HEAVY_MODULES`.
+
+    Returns
+    -------
+    list
+        The modules in `modules` that were imported in the process.
+    """
+    modules = HEAVY_MODULES if modules is None else modules
+    code = STARTUP.format(modules=modules)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+# ============================================
+#               startup_time
+# ============================================
+def startup_time(n_runs=5, argv=("-h",)):
+    """
+    Times running the CLI in a fresh interpreter.
+
+    Parameters
+    ----------
+    n_runs : int
+        Number of runs to take the median over.
+
+    argv : tuple, optional
+        Command-line arguments given to the CLI. If None, only the
+        interpreter's own startup time is measured.
+
+    Returns
+    -------
+    float
+        Median wall time (in seconds).
+    """
+    code = "pass"
+    if argv is not None:
+        code = (
+            "import sys\n"
+            f"sys.argv = ['flexsea_demos', *{list(argv)}]\n"
+            "from flexsea_demos.main import main\n"
+            "main()\n"
+        )
+    times = []
+    for _ in range(n_runs):
+        start = perf_counter()
+        subprocess.run([sys.executable, "-c", code], capture_output=True, check=False)
+        times.append(perf_counter() - start)
+    return statistics.median(times)
+
+
+# ============================================
+#                   main
+# ============================================
+def main():
+    print(f"Bare interpreter (s): {startup_time(argv=None):.3f}")
+    print(f"`flexsea_demos -h` (s): {startup_time():.3f}")
+    heavy = loaded_modules()
+    print(f"Heavy modules imported at startup: {heavy if heavy else 'none'}")
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
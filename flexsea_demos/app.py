@@ -1,20 +1,137 @@
+from importlib import import_module
+
 from cleo import Application
+from cleo import Command
 
-from flexsea_demos.commands.bootloader import BootloaderCommand
-from flexsea_demos.commands.current_control import CurrentControlCommand
-from flexsea_demos.commands.find_poles import FindPolesCommand
-from flexsea_demos.commands.get_version import VersionCommand
-from flexsea_demos.commands.high_speed import HighSpeedCommand
-from flexsea_demos.commands.high_stress import HighStressCommand
-from flexsea_demos.commands.impedance_control import ImpedanceControlCommand
-from flexsea_demos.commands.leader_follower import LeaderFollowerCommand
-from flexsea_demos.commands.open_control import OpenControlCommand
-from flexsea_demos.commands.position_control import PositionControlCommand
-from flexsea_demos.commands.read_only import ReadOnlyCommand
-from flexsea_demos.commands.two_dev_pos_control import TwoDevPositionCommand
-from flexsea_demos.commands.two_position_control import TwoPositionCommand
 from flexsea_demos.utils import ApplicationConfig
 
+# Name, module, class and description of each demo. The modules are
+# only imported when their command is run, so that startup (and
+# `flexsea_demos -h`) doesn't pay for numpy, matplotlib and flexsea.
+# tests/test_app.py checks that these match the command classes'
+# docstrings
+COMMANDS = [
+    ("bootloader", "bootloader", "BootloaderCommand", "Runs the bootloader check."),
+    (
+        "check_version",
+        "get_version",
+        "VersionCommand",
+        "Check version of onboard MCUs.",
+    ),
+    (
+        "current_control",
+        "current_control",
+        "CurrentControlCommand",
+        "Runs the current control demo.",
+    ),
+    ("find_poles", "find_poles", "FindPolesCommand", "Finds poles on the device."),
+    ("high_speed", "high_speed", "HighSpeedCommand", "Runs the high speed demo."),
+    ("high_stress", "high_stress", "HighStressCommand", "Runs the high stress demo."),
+    (
+        "high_stress_async",
+        "high_stress_async",
+        "HighStressAsyncCommand",
+        "Runs the high stress demo on an asyncio event loop.",
+    ),
+    (
+        "high_stress_processes",
+        "high_stress_processes",
+        "HighStressProcessesCommand",
+        "Runs the high stress demo with a process per device.",
+    ),
+    (
+        "impedance_control",
+        "impedance_control",
+        "ImpedanceControlCommand",
+        "Runs the impedance control demo.",
+    ),
+    (
+        "leader_follower",
+        "leader_follower",
+        "LeaderFollowerCommand",
+        "Runs the leader follower demo.",
+    ),
+    (
+        "leader_follower_async",
+        "leader_follower_async",
+        "LeaderFollowerAsyncCommand",
+        "Runs the leader follower demo on an asyncio event loop.",
+    ),
+    (
+        "open_control",
+        "open_control",
+        "OpenControlCommand",
+        "Implements the open control demo.",
+    ),
+    (
+        "position_control",
+        "position_control",
+        "PositionControlCommand",
+        "Runs the position control demo.",
+    ),
+    (
+        "read_only",
+        "read_only",
+        "ReadOnlyCommand",
+        "Reads device data and prints it to the screen.",
+    ),
+    (
+        "replay",
+        "replay",
+        "ReplayCommand",
+        "Replays the stats and plots of a recorded run.",
+    ),
+    (
+        "sweep",
+        "sweep",
+        "SweepCommand",
+        "Runs a demo once for every combination of parameters.",
+    ),
+    (
+        "two_devices_position_control",
+        "two_dev_pos_control",
+        "TwoDevPositionCommand",
+        "Runs the two devices position control demo.",
+    ),
+    (
+        "two_position_control",
+        "two_position_control",
+        "TwoPositionCommand",
+        "Runs the two position control demo.",
+    ),
+]
+
+# Arguments and options of the demos that run one device at a time
+SINGLE_DEVICE = (
+    "{paramFile : Yaml file with demo parameters.} "
+    "{--parallel : Run every port at once, each on its own thread.}"
+)
+
+# Arguments and options of the commands that don't just take a parameter
+# file. tests/test_app.py checks these against the docstrings too
+ARGUMENTS = {
+    "replay": (
+        "{recording : File written by a demo with record_file set.} "
+        "{--plot-dir= : Render the plots to files in this directory.} "
+        "{--plot-format=png : Format of the rendered plots, png or svg.} "
+        "{--rerun : Feed the recorded measurements back through the demo's "
+        "control loop, unpaced.}"
+    ),
+    "sweep": "{paramFile : Yaml file with sweep parameters.}",
+    **dict.fromkeys(
+        (
+            "current_control",
+            "high_speed",
+            "impedance_control",
+            "open_control",
+            "position_control",
+            "read_only",
+            "two_position_control",
+        ),
+        SINGLE_DEVICE,
+    ),
+}
+
 
 # ============================================
 #            FlexseaDemoApplication
@@ -36,20 +153,50 @@ class FlexseaDemoApplication(Application):
     # _get_commands
     # -----
     def _get_commands(self):
-        command_list = [
-            BootloaderCommand,
-            CurrentControlCommand,
-            FindPolesCommand,
-            HighSpeedCommand,
-            HighStressCommand,
-            ImpedanceControlCommand,
-            LeaderFollowerCommand,
-            OpenControlCommand,
-            PositionControlCommand,
-            ReadOnlyCommand,
-            TwoDevPositionCommand,
-            TwoPositionCommand,
-            VersionCommand,
-        ]
-        for command in command_list:
-            self.add(command())
+        for name, module, class_name, description in COMMANDS:
+            self.add(LazyCommand(name, module, class_name, description))
+
+
+# ============================================
+#                LazyCommand
+# ============================================
+class LazyCommand(Command):
+    """
+    Stands in for a demo command until that command is run.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, name, module, class_name, description):
+        arguments = ARGUMENTS.get(name, "{paramFile : Yaml file with demo parameters.}")
+        self.signature = f"{name} {arguments}"
+        self.module = f"flexsea_demos.commands.{module}"
+        self.class_name = class_name
+        super().__init__()
+        self.config.set_description(description)
+
+    # -----
+    # load
+    # -----
+    def load(self):
+        """
+        Imports and instantiates the real command.
+
+        Returns
+        -------
+        cleo.Command
+            The demo command this object stands in for.
+        """
+        command = getattr(import_module(self.module), self.class_name)()
+        command.set_application(self.application)
+        return command
+
+    # -----
+    # handle
+    # -----
+    def handle(self):
+        """
+        Runs the real command with the already parsed arguments.
+        """
+        return self.load().wrap_handle(self._args, self._io, self._command)
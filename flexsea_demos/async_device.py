@@ -0,0 +1,127 @@
+import asyncio
+from functools import partial
+
+from flexsea_demos.device import Device
+
+
+# ============================================
+#                AsyncDevice
+# ============================================
+class AsyncDevice:
+    """
+    Awaitable facade over a `Device`.
+
+    Every call into the flexsea library blocks, so each one is run on
+    `executor` (the event loop's default executor if None) and awaited.
+    This lets one event loop drive many devices at once: while one
+    device waits on its serial port the others, and any timers, keep
+    running. Attributes that aren't wrapped (`dev_id`, `initial_pos`,
+    `print_stats`, etc.) are looked up on the underlying `Device`.
+
+    Parameters
+    ----------
+    device : flexsea_demos.device.Device
+        The device to wrap.
+
+    executor : concurrent.futures.Executor, optional
+        Where the blocking calls run. With several devices, use at least
+        one worker per device so that they don't queue behind each
+        other.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, device, executor=None):
+        self.device = device
+        self.executor = executor
+
+    # -----
+    # open
+    # -----
+    @classmethod
+    async def open(cls, fxs, port, baud_rate, executor=None, **kwargs):
+        """
+        Opens a `Device` without blocking the event loop.
+
+        Parameters
+        ----------
+        fxs : flexsea.flexsea.FlexSEA
+            The backend used to talk to the device.
+
+        port : str
+            The port the device is on.
+
+        baud_rate : int
+            Baud rate used for the port.
+
+        executor : concurrent.futures.Executor, optional
+            Where the blocking calls run.
+
+        kwargs : dict
+            Optional `Device` options.
+
+        Returns
+        -------
+        AsyncDevice
+            The opened device.
+        """
+        loop = asyncio.get_running_loop()
+        device = await loop.run_in_executor(
+            executor, partial(Device, fxs, port, baud_rate, **kwargs)
+        )
+        return cls(device, executor)
+
+    # -----
+    # _call
+    # -----
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    # -----
+    # read
+    # -----
+    async def read(self, max_age=None):
+        """
+        Reads the current state of the device. A snapshot younger than
+        `max_age` (see `Device.read`) is returned straight away, without
+        going through the executor.
+        """
+        data = self.device.get_cached(max_age)
+        if data is not None:
+            return data
+        return await self._call(self.device.read, 0)
+
+    # -----
+    # motor
+    # -----
+    async def motor(self, component, value):
+        """
+        Sends a command to the device motor. See `Device.motor`.
+        """
+        return await self._call(self.device.motor, component, value)
+
+    # -----
+    # set_gains
+    # -----
+    async def set_gains(self, gains, force=False):
+        """
+        Sets the controller gains. See `Device.set_gains`.
+        """
+        return await self._call(self.device.set_gains, gains, force)
+
+    # -----
+    # close
+    # -----
+    async def close(self):
+        """
+        Shuts down the device.
+        """
+        return await self._call(self.device.close)
+
+    # -----
+    # __getattr__
+    # -----
+    def __getattr__(self, name):
+        return getattr(self.device, name)
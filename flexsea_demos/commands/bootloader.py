@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
 from time import sleep
 from typing import List
 
@@ -5,7 +7,13 @@ from cleo import Command
 from flexsea import fxEnums as fxe
 
 from flexsea_demos.device import Device
+from flexsea_demos.utils import print_table
 from flexsea_demos.utils import setup
+from flexsea_demos.utils import TABLE_FORMATS
+from flexsea_demos.utils import write_table
+
+# Columns of the activation table
+COLUMNS = ("port", "dev_id", "target", "time", "polls", "status")
 
 
 # ============================================
@@ -33,7 +41,13 @@ class BootloaderCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.target = ""
+        self.timeout = 30.0
+        self.poll_min = 0.05
+        self.poll_max = 1.0
+        self.resend_interval = 5.0
+        self.output_file = None
         self.fxs = None
 
         self.targets = {
@@ -50,45 +64,99 @@ class BootloaderCommand(Command):
     # -----
     def handle(self):
         """
-        Runs the bootloader demo.
+        Runs the bootloader demo. Every port is activated at once, so
+        the whole fleet takes about as long as its slowest device.
+
+        Returns
+        -------
+        int
+            1 if any bootloader wasn't activated, otherwise 0.
         """
         setup(self, self.required, self.argument("paramFile"))
-        for port in self.ports:
-            device = Device(self.fxs, port, self.baud_rate)
-            self._bootloader(device)
-            device.close()
+        if self.target not in self.targets:
+            raise ValueError(
+                f"Invalid target '{self.target}', expected one of "
+                f"{list(self.targets)}"
+            )
+        if self.output_file and not self.output_file.endswith(TABLE_FORMATS):
+            raise ValueError(f"output_file must be .json or .csv: '{self.output_file}'")
+
+        name = self.targets[self.target]["name"]
+        print(f"Activating {name} bootloader on {len(self.ports)} ports...")
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=max(len(self.ports), 1)) as executor:
+            rows = list(executor.map(self._bootloader, self.ports))
+        print(f"Done in {perf_counter() - start:.2f} s\n")
+
+        print_table(rows, COLUMNS)
+        if self.output_file:
+            write_table(rows, COLUMNS, self.output_file)
+            print(f"\nActivation table written to '{self.output_file}'")
+        return int(any(row["status"] != "activated" for row in rows))
 
     # -----
     # _bootloader
     # -----
-    def _bootloader(self, device):
-        print(f"Activating {self.targets[self.target]['name']} bootloader", flush=True)
-        wait_step = 1
-        state = fxe.FX_FAILURE.value
-        timeout = self.run_time
-
-        while timeout > 0 and state != fxe.FX_SUCCESS.value:
-            if timeout % 5 == 0:
-                print("Sending signal to target device", flush=True)
+    def _bootloader(self, port):
+        """
+        Opens the device on `port` and activates its bootloader. The
+        activation is sent again every `resend_interval` seconds until
+        the bootloader reports itself as active or `timeout` seconds
+        pass. It's checked `poll_min` seconds after each activation is
+        sent, and the wait doubles after every check, up to `poll_max`.
+
+        Returns
+        -------
+        dict
+            The port's row of the activation table. Its status is
+            `activated`, `timeout` or the error that stopped it.
+        """
+        row = dict.fromkeys(COLUMNS, "")
+        row["port"] = port
+        row["target"] = self.target
+        row["polls"] = 0
+        device = None
+        try:
+            device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+            row["dev_id"] = device.dev_id
+            row["status"] = self._activate(device, row)
+        except Exception as err:  # pylint: disable=broad-except
+            row["status"] = f"error: {err}"
+        finally:
+            if device is not None:
+                device.close()
+        return row
+
+    # -----
+    # _activate
+    # -----
+    def _activate(self, device, row):
+        """
+        Runs the activation of `_bootloader`, counting the checks and
+        timing it in `row`, and returns its status.
+        """
+        start = perf_counter()
+        sent = None
+        wait = self.poll_min
+        while True:
+            elapsed = perf_counter() - start
+            if sent is None or elapsed - sent >= self.resend_interval:
                 try:
                     device.activate_bootloader(self.targets[self.target]["id"])
                 except (IOError, ValueError):
                     pass
-            print(f"Waiting for response from target ({timeout}s)", flush=True)
-            sleep(wait_step)
-            timeout -= wait_step
+                sent = elapsed
+                wait = self.poll_min
+            sleep(max(min(wait, self.timeout - elapsed), 0.0))
+            wait = min(2 * wait, self.poll_max)
+
+            row["polls"] += 1
             try:
                 state = device.is_bootloader_activated()
-            except ValueError:
-                raise RuntimeError
             except IOError:
-                pass
-
-        if state == fxe.FX_SUCCESS.value:
-            print(
-                f"{self.targets[self.target]['name']} bootloader activated", flush=True
-            )
-        else:
-            print(
-                f"{self.targets[self.target]['name']} bootloader not active", flush=True
-            )
+                state = fxe.FX_FAILURE.value
+            row["time"] = round(perf_counter() - start, 3)
+            if state == fxe.FX_SUCCESS.value:
+                return "activated"
+            if perf_counter() - start >= self.timeout:
+                return "timeout"
@@ -4,9 +4,13 @@ from typing import List
 
 from cleo import Command
 from flexsea import fxEnums as fxe
-from flexsea import fxUtils as fxu
+import numpy as np
 
+from flexsea_demos.dashboard import Dashboard
 from flexsea_demos.device import Device
+from flexsea_demos.parallel import run_ports
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.trajectory import Trajectory
 from flexsea_demos.utils import setup
 
 
@@ -19,6 +23,7 @@ class CurrentControlCommand(Command):
 
     current_control
         {paramFile : Yaml file with demo parameters.}
+        {--parallel : Run every port at once, each on its own thread.}
     """
 
     # Schema of parameters required by the demo
@@ -38,11 +43,18 @@ class CurrentControlCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.run_time = 0
         self.gains = {}
         self.hold_current = 0
         self.ramp_down_steps = 0
         self.nLoops = 0
+        self.trajectory = None
+        self.trajectory_file = None
+        self.loop_delay = 0.1
+        self.scheduler = None
+        self.display_rate = 10.0
+        self.dashboard = None
         self.fxs = None
 
     # -----
@@ -53,25 +65,53 @@ class CurrentControlCommand(Command):
         Current control demo.
         """
         setup(self, self.required, self.argument("paramFile"))
-        self.nLoops = int(self.run_time / 0.1)
-        for port in self.ports:
-            input("Press 'ENTER' to continue...")
-            device = Device(self.fxs, port, self.baud_rate)
-            device.set_gains(self.gains)
-            sleep(0.5)
-            self._current_control(device)
+        self.nLoops = int(self.run_time / self.loop_delay)
+        self.scheduler = LoopScheduler(1.0 / self.loop_delay)
+        self._compile_trajectory()
+        self.dashboard = Dashboard(self.display_rate)
+        run_ports(self, "_run_port")
+
+    # -----
+    # _run_port
+    # -----
+    def _run_port(self, port):
+        device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+        device.set_gains(self.gains)
+        sleep(0.5)
+        self._current_control(device)
+
+    # -----
+    # _compile_trajectory
+    # -----
+    def _compile_trajectory(self):
+        """
+        Holds `hold_current` for the run time, then ramps down to zero.
+        """
+        steps = self.ramp_down_steps
+        ramp_down = self.hold_current * (steps - np.arange(steps)) / steps
+        self.trajectory = Trajectory(1, {"current": np.float64})
+        self.trajectory.add(
+            "hold", fxe.FX_CURRENT, self.nLoops, current=self.hold_current
+        )
+        self.trajectory.add(
+            "ramp_down", fxe.FX_CURRENT, steps, current=ramp_down[:, None]
+        )
+        self.trajectory.compile()
+        if self.trajectory_file:
+            self.trajectory.dump(self.trajectory_file)
+            print(f"Compiled trajectory written to '{self.trajectory_file}'")
 
     # -----
     # _current_control
     # -----
     def _current_control(self, device):
-        for _ in range(self.nLoops):
-            self._ramp(device, self.hold_current)
-        for i in range(self.ramp_down_steps):
-            current = (
-                self.hold_current * (self.ramp_down_steps - i) / self.ramp_down_steps
-            )
-            self._ramp(device, current)
+        self.scheduler.start()
+        with self.dashboard:
+            for current in self.trajectory.tables["current"][:, 0]:
+                self._ramp(device, current)
+        self.scheduler.stop()
+        self.scheduler.print_stats()
+        device.print_stats()
         device.motor(fxe.FX_NONE, 0)
         sleep(0.5)
         device.close()
@@ -85,10 +125,14 @@ class CurrentControlCommand(Command):
         value for comparison.
         """
         device.motor(fxe.FX_CURRENT, current)
-        sleep(0.1)
+        self.scheduler.wait()
         data = device.read()
-        fxu.clear_terminal()
-        print("Desired (mA):         ", current)
-        print("Measured (mA):        ", data.mot_cur)
-        print("Difference (mA):      ", (data.mot_cur - current), "\n")
-        device.print(data)
+        self.dashboard.publish(
+            f"Device {device.dev_id}",
+            data,
+            (
+                ("Desired (mA)", current),
+                ("Measured (mA)", data.mot_cur),
+                ("Difference (mA)", data.mot_cur - current),
+            ),
+        )
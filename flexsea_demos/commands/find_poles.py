@@ -1,7 +1,6 @@
 from typing import List
 
 from cleo import Command
-from flexsea import flexsea as flex
 
 from flexsea_demos.utils import setup
 
@@ -40,8 +39,7 @@ class FindPolesCommand(Command):
         Finds the devices' poles.
         """
         setup(self, self.required, self.argument("paramFile"))
-        fxs = flex.FlexSEA()
         for port in self.ports:
             input("Press 'ENTER' to continue...")
-            dev_id = fxs.open(port, self.baud_rate, 0)
-            fxs.find_poles(dev_id)
+            dev_id = self.fxs.open(port, self.baud_rate, 0)
+            self.fxs.find_poles(dev_id)
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
 from time import sleep
 from typing import List
 
@@ -6,7 +8,13 @@ from flexsea import fxEnums as fxe
 from flexsea import fxUtils as fxu
 
 from flexsea_demos.device import Device
+from flexsea_demos.utils import print_table
 from flexsea_demos.utils import setup
+from flexsea_demos.utils import TABLE_FORMATS
+from flexsea_demos.utils import write_table
+
+# Columns of the version table
+COLUMNS = ("port", "dev_id", "mn", "ex", "re", "habs", "time", "status")
 
 
 # ============================================
@@ -33,6 +41,10 @@ class VersionCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
+        self.timeout = 5.0
+        self.poll_interval = 0.05
+        self.output_file = None
         self.fxs = None
 
     # -----
@@ -40,36 +52,70 @@ class VersionCommand(Command):
     # -----
     def handle(self):
         """
-        Checks the versions of onboard MCUs.
+        Checks the versions of onboard MCUs. Every port is queried at
+        once, so the whole fleet takes about as long as its slowest
+        device.
+
+        Returns
+        -------
+        int
+            1 if any port didn't report its versions, otherwise 0.
         """
         setup(self, self.required, self.argument("paramFile"))
-        for port in self.ports:
-            device = Device(self.fxs, port, self.baud_rate)
-            self._get_version(device)
-            device.close()
+        if self.output_file and not self.output_file.endswith(TABLE_FORMATS):
+            raise ValueError(f"output_file must be .json or .csv: '{self.output_file}'")
+
+        print(f"Collecting version information from {len(self.ports)} ports...")
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=max(len(self.ports), 1)) as executor:
+            rows = list(executor.map(self._get_version, self.ports))
+        print(f"Done in {perf_counter() - start:.2f} s\n")
+
+        print_table(rows, COLUMNS)
+        if self.output_file:
+            write_table(rows, COLUMNS, self.output_file)
+            print(f"\nVersion table written to '{self.output_file}'")
+        return int(any(row["status"] != "ok" for row in rows))
 
     # -----
     # _get_version
     # -----
-    def _get_version(self, device):
-        if device.request_firmware_version() == fxe.FX_SUCCESS.value:
-            print("Collecting version information. Please wait...", flush=True)
-        else:
-            print("Firware version request failed", flush=True)
-            device.close()
-            raise ValueError
-
-        sleep(5)
-
-        fw_array = fxe.FW()
-        fw_array = device.get_last_received_firmware_version()
-        fw_mn = fxu.decode(fw_array.Mn)
-        fw_ex = fxu.decode(fw_array.Ex)
-        fw_re = fxu.decode(fw_array.Re)
-        fw_habs = fxu.decode(fw_array.Habs)
+    def _get_version(self, port):
+        """
+        Opens the device on `port`, requests its firmware versions and
+        polls for them until they arrive or `timeout` seconds pass.
 
-        print(f"Firmware version for device {device.dev_id}:", flush=True)
-        print(f"\t Mn  : v{fw_mn}", flush=True)
-        print(f"\t Ex  : v{fw_ex}", flush=True)
-        print(f"\t Re  : v{fw_re}", flush=True)
-        print(f"\t Habs: v{fw_habs}", flush=True)
+        Returns
+        -------
+        dict
+            The port's row of the version table. Its status is `ok`,
+            `timeout` or the error that stopped the query.
+        """
+        row = dict.fromkeys(COLUMNS, "")
+        row["port"] = port
+        device = None
+        try:
+            device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+            row["dev_id"] = device.dev_id
+            start = perf_counter()
+            if device.request_firmware_version() != fxe.FX_SUCCESS.value:
+                raise ValueError("Firmware version request failed")
+            fw_array = device.get_last_received_firmware_version()
+            while not any((fw_array.Mn, fw_array.Ex, fw_array.Re, fw_array.Habs)):
+                if perf_counter() - start > self.timeout:
+                    row["status"] = "timeout"
+                    return row
+                sleep(self.poll_interval)
+                fw_array = device.get_last_received_firmware_version()
+            row["time"] = round(perf_counter() - start, 3)
+            row["mn"] = fxu.decode(fw_array.Mn)
+            row["ex"] = fxu.decode(fw_array.Ex)
+            row["re"] = fxu.decode(fw_array.Re)
+            row["habs"] = fxu.decode(fw_array.Habs)
+            row["status"] = "ok"
+        except Exception as err:  # pylint: disable=broad-except
+            row["status"] = f"error: {err}"
+        finally:
+            if device is not None:
+                device.close()
+        return row
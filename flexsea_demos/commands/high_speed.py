@@ -1,19 +1,71 @@
+from time import perf_counter_ns
 from time import sleep
-from time import time
 from typing import List
 
 from cleo import Command
 from flexsea import fxEnums as fxe
-from flexsea import fxPlotting as fxp
 from flexsea import fxUtils as fxu
-import matplotlib
-import matplotlib.pyplot as plt
 import numpy as np
 
 from flexsea_demos.device import Device
+from flexsea_demos.downsample import downsample_chunks
+from flexsea_demos.downsample import METHODS
+from flexsea_demos.parallel import run_ports
+from flexsea_demos.plotting import get_fxplotting
+from flexsea_demos.plotting import get_pyplot
+from flexsea_demos.plotting import plot
+from flexsea_demos.plotting import PlotExporter
+from flexsea_demos.recording import RecordingWriter
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.scheduler import UnpacedScheduler
+from flexsea_demos.telemetry import percentiles
+from flexsea_demos.telemetry import TelemetryRecorder
+from flexsea_demos.trajectory import Trajectory
+from flexsea_demos.waveform import Waveform
+from flexsea_demos.utils import read_yaml
 from flexsea_demos.utils import setup
 
 
+# ============================================
+#              draw_high_speed
+# ============================================
+def draw_high_speed(  # pylint: disable=too-many-arguments
+    fig,
+    dev_id,
+    is_current,
+    sig_freq,
+    sig_amplitude,
+    sig_type,
+    cmd_freq,
+    times,
+    requests,
+    measurements,
+    cycle_stop_times,
+    write_times,
+    read_times,
+):
+    """
+    Draws the setpoint vs desired figure of one device, followed by its
+    write and read times.
+    """
+    get_pyplot().clf()
+    fxp = get_fxplotting()
+    fig = fxp.plot_setpoint_vs_desired(
+        dev_id,
+        fig,
+        fxe.HSS_CURRENT if is_current else fxe.HSS_POSITION,
+        sig_freq,
+        sig_amplitude,
+        sig_type,
+        cmd_freq,
+        times,
+        requests,
+        measurements,
+        cycle_stop_times,
+    )
+    return fxp.plot_exp_stats(dev_id, fig, write_times, read_times)
+
+
 # ============================================
 #             HighSpeedCommand
 # ============================================
@@ -23,6 +75,7 @@ class HighSpeedCommand(Command):
 
     high_speed
         {paramFile : Yaml file with demo parameters.}
+        {--parallel : Run every port at once, each on its own thread.}
     """
 
     # Schema of parameters required by the demo
@@ -48,6 +101,7 @@ class HighSpeedCommand(Command):
 
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.controller_type = 0
         self.signal_type = 0
         self.cmd_freq = 0
@@ -57,28 +111,39 @@ class HighSpeedCommand(Command):
         self.cycle_delay = 0
         self.request_jitter = False
         self.jitter = 0
+        self.spin_time = 0.0
+        self.trajectory_file = None
+        self.waveform_file = None
+        self.waveform_columns = []
+        self.waveform_rate = None
+        self.waveform_dtype = "f8"
+        self.waveform_width = 1
+        self.plot_dir = None
+        self.plot_format = "png"
+        self.plot_points = 2000
+        self.plot_downsample = "lttb"
+        self.record_file = None
+        self.record_compression = None
 
         self.fxs = None
         self.dt = 0.0
+        self.scheduler = None
         self.start_time = None
         self.samples = []
         self.figure_counter = 1
-        self.signal = {"sine": 1, "line": 2}
-        self.i = 0
+        self.exporter = None
+        self.recording = None
+        self.runs = {}
+        self.signal = {"sine": 1, "line": 2, "file": 3}
         self.current_gains = {"KP": 40, "KI": 400, "KD": 0, "K": 0, "B": 0, "FF": 128}
         self.pos_gains = {"KP": 300, "KI": 50, "KD": 0, "K": 0, "B": 0, "FF": 0}
-        self.plot_data = {
-            "requests": [],
-            "measurements": [],
-            "times": [],
-            "cycle_stop_times": [],
-            "dev_write_command_times": [],
-            "dev_read_command_times": [],
-        }
-
-        matplotlib.use("WebAgg")
-        if fxu.is_pi():
-            matplotlib.rcParams.update({"webagg.address": "0.0.0.0"})
+        self.gains = {}
+        self.pos0 = 0
+        self.trace = None
+        self.timing = None
+        self.cycle_stop_times = []
+        self.trajectory = None
+        self.cycles = []
 
     # -----
     # handle
@@ -88,29 +153,220 @@ class HighSpeedCommand(Command):
         Runs the high speed demo.
         """
         setup(self, self.required, self.argument("paramFile"))
+        self._prepare()
+        # Stream at least as fast as we send commands
+        self.device_options = {
+            "stream_freq": self.cmd_freq,
+            "read_freshness": self.dt / 2,
+            **self.device_options,
+        }
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        self.recording = RecordingWriter.from_params(
+            self.record_file,
+            self.record_compression,
+            meta={
+                "command": self.config.name,
+                "params": read_yaml(self.argument("paramFile")),
+            },
+        )
+        run_ports(self, "_run_port", "_finish_port")
+
+        if self.recording:
+            self.recording.close()
+            self.recording.print_stats()
+        if self.exporter:
+            self.exporter.join()
+
+    # -----
+    # _run_port
+    # -----
+    def _run_port(self, port):
+        """
+        Runs the demo on the device on `port`.
+
+        Returns
+        -------
+        tuple
+            The device's id and how long its run took (s).
+        """
+        if self.signal_type == self.signal["file"]:
+            self.samples = self._get_waveform(self.ports.index(port))
+        self._reset_plot()
+        device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+        if self.recording:
+            self.recording.add(self.trace, f"{device.dev_id}/trace")
+            self.recording.add(self.timing, f"{device.dev_id}/timing")
+        self._run(device)
+        elapsed_time = (perf_counter_ns() - self.start_time) / 1e9
+        device.close()
+        return device.dev_id, elapsed_time
+
+    # -----
+    # _finish_port
+    # -----
+    def _finish_port(self, run):
+        """
+        Saves and plots the `run` returned by `_run_port`.
+        """
+        dev_id, elapsed_time = run
+        self._save_run(dev_id, elapsed_time)
+        self._plot(dev_id, elapsed_time)
+
+    # -----
+    # _prepare
+    # -----
+    def _prepare(self):
         self.dt = 1.0 / (float(self.cmd_freq))
+        self.scheduler = LoopScheduler(self.cmd_freq, self.spin_time)
+        if self.plot_downsample not in METHODS:
+            raise ValueError(f"Invalid plot_downsample '{self.plot_downsample}'")
         self._get_samples()
+        self.gains = self._get_gains()
+
+    # -----
+    # run_once
+    # -----
+    def run_once(self, device):
+        """
+        Runs the demo on an already open device, without prompting or
+        plotting. The device must stream at least at `cmd_freq`.
 
+        Returns
+        -------
+        dict
+            The run's summary, see `summary`.
+        """
+        if self.signal_type == self.signal["file"]:
+            self.samples = self._get_waveform(self.ports.index(device.port))
+        self._reset_plot()
+        self._run(device)
+        return self.summary()
+
+    # -----
+    # summary
+    # -----
+    def summary(self):
+        """
+        Summarizes the last run: the achieved command frequency, the
+        loop's lateness, the read and write time percentiles (in us) and
+        how far the measurements were from the requests (in ticks or mA).
+        """
+        stats = self.scheduler.stats()
+        # Position requests include where the motor started, the
+        # measurements don't
+        errors = self.trace["measurement"] - (self.trace["request"] - self.pos0)
+        return {
+            "achieved_freq": stats["achieved_freq"],
+            "lateness_p50_us": stats["lateness_p50_us"],
+            "lateness_p99_us": stats["lateness_p99_us"],
+            **percentiles(self.timing["read"] / 1e3, "read", "us"),
+            **percentiles(self.timing["write"] / 1e3, "write", "us"),
+            **percentiles(np.abs(errors), "error"),
+        }
+
+    # -----
+    # _run
+    # -----
+    def _run(self, device):
+        """
+        Sets up the device's controller and plays the whole trajectory
+        on it.
+        """
+        device.set_controller(self.controller_type)
+        device.set_gains(self.gains)
+        self._compile_trajectory(device)
+        self._high_speed(device)
+        device.motor(fxe.FX_NONE, 0)
+        sleep(0.1)
+        self.scheduler.print_stats()
+        device.print_stats()
+
+    # -----
+    # _get_gains
+    # -----
+    def _get_gains(self):
+        """
+        Converts the `controller_type` parameter to the controller to
+        use, and returns that controller's gains.
+        """
         if self.controller_type == 0:
             self.controller_type = fxe.HSS_POSITION
-            gains = self.pos_gains
-        elif self.controller_type == 1:
+            return self.pos_gains
+        if self.controller_type == 1:
             self.controller_type = fxe.HSS_CURRENT
-            gains = self.current_gains
-        else:
-            raise ValueError(f"Invalid controller type '{self.controller_type}'")
-
-        for port in self.ports:
-            input("Press 'ENTER' to continue...")
-            self._reset_plot()
-            device = Device(self.fxs, port, self.baud_rate)
-            device.set_controller(self.controller_type)
-            device.set_gains(gains)
-            self._high_speed(device)
-            device.motor(fxe.FX_NONE, 0)
-            sleep(0.1)
-            self._plot(device)
-            device.close()
+            return self.current_gains
+        raise ValueError(f"Invalid controller type '{self.controller_type}'")
+
+    # -----
+    # replay
+    # -----
+    def replay(self, recording):
+        """
+        Draws the plots of every device of a run recorded with
+        `record_file`, as if it had just finished.
+
+        Parameters
+        ----------
+        recording : flexsea_demos.recording.Recording
+            The recorded run. The demo's parameters must already be set.
+        """
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        self._get_gains()
+        # JSON turned the device ids into strings
+        for dev_id, run in recording.meta["runs"].items():
+            # Read one chunk at a time by the plots
+            self.trace = recording.stream(f"{dev_id}/trace")
+            self.timing = recording.stream(f"{dev_id}/timing")
+            self.cycle_stop_times = run["cycle_stop_times"]
+            print(
+                f"Device {dev_id}: {len(self.trace)} samples over "
+                f"{run['elapsed_time']:.3f} s"
+            )
+            self._plot(int(dev_id), run["elapsed_time"])
+        if self.exporter:
+            self.exporter.join()
+
+    # -----
+    # rerun
+    # -----
+    def rerun(self, recording):
+        """
+        Runs the demo again, unpaced, on the measurements of a run
+        recorded with `record_file`: on every tick, the device reads
+        back what it measured on that tick. Each recorded device is run
+        in turn, on its port, and the plots are those of the new runs.
+        Nothing is recorded.
+
+        Parameters
+        ----------
+        recording : flexsea_demos.recording.Recording
+            The recorded run. The demo's parameters must already be set.
+        """
+        # Only loaded when it's used, like the other backends
+        # pylint: disable=import-outside-toplevel
+        from flexsea_demos.replay_backend import recorded_rows
+        from flexsea_demos.replay_backend import ReplayFlexSEA
+
+        self._prepare()
+        # Every tick reads a new frame
+        self.device_options = {**self.device_options, "read_freshness": 0}
+        self.trajectory_file = None
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        field = "mot_cur" if self.controller_type == fxe.HSS_CURRENT else "mot_ang"
+        # JSON turned the device ids into strings
+        for port, (dev_id, run) in zip(self.ports, recording.meta["runs"].items()):
+            # Position measurements were recorded relative to where the
+            # motor started
+            pos0 = run.get("pos0", 0)
+            offsets = {"mot_ang": pos0} if field == "mot_ang" else None
+            rows = recorded_rows(
+                recording, f"{dev_id}/trace", {field: "measurement"}, offsets
+            )
+            self.fxs = ReplayFlexSEA([(int(dev_id), rows, {"mot_ang": pos0})])
+            self.scheduler = UnpacedScheduler(self.cmd_freq, on_wait=self.fxs.tick)
+            self._finish_port(self._run_port(port))
+        if self.exporter:
+            self.exporter.join()
 
     # -----
     # _get_samples
@@ -122,6 +378,9 @@ class HighSpeedCommand(Command):
         np.random.seed(42)
         if self.signal_type not in self.signal.values():
             raise ValueError(f"Unsupported signal type: `{self.signal_type}`")
+        if self.signal_type == self.signal["file"]:
+            # Each device plays its own column, see `_get_waveform`
+            return
         if self.signal_type == self.signal["sine"]:
             f = self.signal_freq
         else:
@@ -134,111 +393,256 @@ class HighSpeedCommand(Command):
         print("Command table:")
         print(np.int64(self.samples))
 
+    # -----
+    # _get_waveform
+    # -----
+    def _get_waveform(self, index):
+        """
+        Memory-maps `waveform_file` for the `index`-th port, which plays
+        the `index`-th of `waveform_columns` (or the first column if
+        there aren't that many).
+        """
+        if not self.waveform_file:
+            raise ValueError("The file signal type needs a `waveform_file`")
+        columns = self.waveform_columns if self.waveform_columns else [0]
+        column = columns[index] if index < len(columns) else columns[0]
+        waveform = Waveform(
+            self.waveform_file,
+            self.cmd_freq,
+            columns=[column],
+            rate=self.waveform_rate,
+            dtype=self.waveform_dtype,
+            width=self.waveform_width,
+        )
+        print(
+            f"Playing column {column} of '{self.waveform_file}': {len(waveform)} "
+            f"setpoints at {self.cmd_freq} Hz (recorded at {waveform.rate:g} Hz)"
+        )
+        return waveform
+
+    # -----
+    # _compile_trajectory
+    # -----
+    def _compile_trajectory(self, device):
+        """
+        Lays out every cycle of the signal, and the delays between them,
+        in one table. Position requests are relative to where the motor
+        is when the run starts, which is added in `_high_speed`.
+        """
+        self.trajectory = Trajectory(1, {"request": np.float64})
+        self.cycles = []
+        if self.signal_type == self.signal["file"]:
+            # Streamed from the file rather than copied into the table
+            for _ in range(self.nLoops):
+                self.cycles.append(
+                    [
+                        self.trajectory.add(
+                            "file",
+                            device.controller,
+                            len(self.samples),
+                            source=self.samples,
+                        )
+                    ]
+                )
+            self.trajectory.compile()
+            return
+
+        n_delay = 0
+        if self.signal_type == self.signal["sine"]:
+            n_delay = int(self.cycle_delay / self.dt)
+        samples = np.asarray(self.samples, dtype=np.float64)
+        for _ in range(self.nLoops):
+            cycle = [
+                self.trajectory.add(
+                    "cycle", device.controller, len(samples), request=samples[:, None]
+                )
+            ]
+            # Delay between cycles (sine wave only). Nothing is sent; the
+            # last request is kept for plotting
+            if n_delay:
+                cycle.append(
+                    self.trajectory.add("delay", None, n_delay, request=samples[-1])
+                )
+            self.cycles.append(cycle)
+        self.trajectory.compile()
+
     # -----
     # _high_speed
     # -----
     def _high_speed(self, device):
-        self.start_time = time()
+        self.start_time = perf_counter_ns()
         if device.controller_type == fxe.HSS_POSITION:
             sleep(0.1)
             data = device.read()
             pos0 = data.mot_ang
+            self.trajectory.tables["request"] += pos0
         else:
             pos0 = 0
+        self.pos0 = pos0
+        if self.trajectory_file:
+            self.trajectory.dump(self.trajectory_file)
+            print(f"Compiled trajectory written to '{self.trajectory_file}'")
+        is_current = device.controller_type == fxe.HSS_CURRENT
 
-        self.i = 0
-        for rep in range(self.nLoops):
-            elapsed_time = time() - self.start_time
+        self.scheduler.start()
+        for rep, cycle in enumerate(self.cycles):
+            elapsed_time = (perf_counter_ns() - self.start_time) / 1e9
             fxu.print_loop_count_and_time(rep, self.nLoops, elapsed_time)
 
-            for sample in self.samples:
-                sleep(self.dt)
-                if device.controller_type != fxe.HSS_CURRENT:
-                    sample = sample + pos0
-
-                # Read
-                begin_time = time()
-                data = device.read()
-                self.plot_data["dev_read_command_times"].append(time() - begin_time)
-
-                # Write
-                begin_time = time()
-                device.motor(device.controller, sample)
-                self.plot_data["dev_write_command_times"].append(time() - begin_time)
-
-                if device.controller == fxe.FX_CURRENT:
-                    val = data.mot_cur
-                else:
-                    val = data.mot_ang - pos0
-
-                self.plot_data["times"].append(time() - self.start_time)
-                self.plot_data["measurements"].append(val)
-                self.plot_data["requests"].append(sample)
-                self.i += 1
-
-            # Delay between cycles (sine wave only)
-            if self.signal_type == self.signal["sine"]:
-                for _ in range(int(self.cycle_delay / self.dt)):
-                    sleep(self.dt)
+            for segment, requests in self._get_requests(cycle, pos0):
+                if segment.mode is None:
+                    self._read_only(device, requests, is_current, pos0)
+                    continue
+
+                for sample in requests:
+                    self.scheduler.wait()
+
+                    # Read
+                    read_start = perf_counter_ns()
                     data = device.read()
 
-                    if device.controller_type == fxe.HSS_CURRENT:
-                        self.plot_data["measurements"].append(data.mot_cur)
-                    elif device.controller_type == fxe.HSS_POSITION:
-                        self.plot_data["measurements"].append(data.mot_ang - pos0)
+                    # Write
+                    write_start = perf_counter_ns()
+                    device.motor(segment.mode, sample)
+                    write_stop = perf_counter_ns()
 
-                    self.plot_data["times"].append(time() - self.start_time)
-                    self.plot_data["requests"].append(sample)
-                    self.i += 1
+                    val = data.mot_cur if is_current else data.mot_ang - pos0
+
+                    self.timing.append(
+                        write_start - read_start, write_stop - write_start
+                    )
+                    self.trace.append(write_stop - self.start_time, sample, val)
 
             # We'll draw a line at the end of every period
-            self.plot_data["cycle_stop_times"].append(time() - self.start_time)
+            self.cycle_stop_times.append((perf_counter_ns() - self.start_time) / 1e9)
+
+        self.scheduler.stop()
+
+    # -----
+    # _get_requests
+    # -----
+    def _get_requests(self, cycle, pos0):
+        """
+        Yields each segment of `cycle` with its requests, in blocks for
+        segments streamed from a file. Compiled requests already include
+        `pos0`; streamed ones are offset one block at a time.
+        """
+        for segment in cycle:
+            for requests in self.trajectory.chunks("request", segment):
+                requests = requests[:, 0]
+                if segment.source is not None and pos0:
+                    requests = requests + pos0
+                yield segment, requests
+
+    # -----
+    # _read_only
+    # -----
+    def _read_only(self, device, requests, is_current, pos0):
+        """
+        Only reads (and records) the device for a tick per request.
+        """
+        for sample in requests:
+            self.scheduler.wait()
+            data = device.read()
+            val = data.mot_cur if is_current else data.mot_ang - pos0
+            self.trace.append(perf_counter_ns() - self.start_time, sample, val)
+
+    # -----
+    # _save_run
+    # -----
+    def _save_run(self, dev_id, elapsed_time):
+        """
+        Adds what's needed to redo the device's plots, besides its
+        recorded data, to the recording's metadata.
+        """
+        if not self.recording:
+            return
+        self.runs[dev_id] = {
+            "elapsed_time": elapsed_time,
+            "cycle_stop_times": self.cycle_stop_times,
+            "pos0": self.pos0,
+        }
+        # Replaces the previous devices' runs with all of them
+        self.recording.set_meta(runs=self.runs)
 
     # -----
     # _plot
     # -----
-    def _plot(self, device):
-        if self.signal_type == self.signal["sine"]:
-            signal_type_str = "sine"
-        else:
-            signal_type_str = "line"
-        elapsed_time = time() - self.start_time
-        actual_period = self.plot_data["cycle_stop_times"][0]
-        actual_frequency = 1 / actual_period
-        cmd_freq = self.i / elapsed_time
-        # Figure: setpoint, desired vs measured (1st device)
-        self.figure_counter = fxp.plot_setpoint_vs_desired(
-            device.dev_id,
-            self.figure_counter,
-            device.controller_type,
-            actual_frequency,
-            self.signal_amplitude,
-            signal_type_str,
-            cmd_freq,
-            self.plot_data["times"],
-            self.plot_data["requests"],
-            self.plot_data["measurements"],
-            self.plot_data["cycle_stop_times"],
+    def _plot(self, dev_id, elapsed_time):
+        signal_type_str = {v: k for k, v in self.signal.items()}[self.signal_type]
+        actual_period = self.cycle_stop_times[0]
+        # The recorders keep the full resolution data, which is
+        # decimated one chunk at a time
+        times, requests, measurements = downsample_chunks(
+            (
+                (chunk["time"] / 1e9, chunk["request"], chunk["measurement"])
+                for chunk in self.trace.chunks()
+            ),
+            len(self.trace),
+            max_points=self.plot_points,
+            method=self.plot_downsample,
+        )
+        _, write_times, read_times = downsample_chunks(
+            self._get_timing_chunks(),
+            len(self.timing),
+            max_points=self.plot_points,
+            method=self.plot_downsample,
         )
-        self.figure_counter = fxp.plot_exp_stats(
-            device.dev_id,
+        self.figure_counter = plot(
+            draw_high_speed,
+            f"high_speed_{dev_id}",
+            self.exporter,
             self.figure_counter,
-            self.plot_data["dev_write_command_times"],
-            self.plot_data["dev_read_command_times"],
+            dev_id=dev_id,
+            is_current=self.controller_type == fxe.HSS_CURRENT,
+            sig_freq=1 / actual_period,
+            sig_amplitude=self.signal_amplitude,
+            sig_type=signal_type_str,
+            cmd_freq=len(self.trace) / elapsed_time,
+            times=times,
+            requests=requests,
+            measurements=measurements,
+            cycle_stop_times=self.cycle_stop_times,
+            write_times=write_times,
+            read_times=read_times,
         )
-        fxu.print_plot_exit()
-        plt.show()
+
+    # -----
+    # _get_timing_chunks
+    # -----
+    def _get_timing_chunks(self):
+        """
+        Yields the row numbers, write times and read times (s) of the
+        timing data, one chunk at a time.
+        """
+        start = 0
+        for chunk in self.timing.chunks():
+            rows = np.arange(start, start + len(chunk["write"]))
+            start += len(rows)
+            yield rows, chunk["write"] / 1e9, chunk["read"] / 1e9
 
     # -----
     # _reset_plot
     # -----
     def _reset_plot(self):
-        self.plot_data = {
-            "requests": [],
-            "measurements": [],
-            "times": [],
-            "cycle_stop_times": [],
-            "dev_write_command_times": [],
-            "dev_read_command_times": [],
-        }
-        plt.clf()
+        """
+        Preallocates the buffers for the next run. Their size is known
+        up front from the number of loops, samples and the cycle delay.
+        """
+        n_cmds = self.nLoops * len(self.samples)
+        n_delay = 0
+        if self.signal_type == self.signal["sine"]:
+            n_delay = self.nLoops * int(self.cycle_delay / self.dt)
+        if self.controller_type == fxe.HSS_CURRENT:
+            dtype = np.float32
+        else:
+            dtype = np.int32
+
+        # Requests are kept as sent: jittered, resampled and waveform
+        # setpoints aren't whole numbers
+        self.trace = TelemetryRecorder(
+            {"time": np.int64, "request": np.float64, "measurement": dtype},
+            n_cmds + n_delay,
+        )
+        self.timing = TelemetryRecorder({"read": np.int64, "write": np.int64}, n_cmds)
+        self.cycle_stop_times = []
@@ -1,19 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import perf_counter_ns
 from time import sleep
-from time import time
 from typing import List
 
 from cleo import Command
-import matplotlib
-import matplotlib.pyplot as plt
 import numpy as np
 from flexsea import fxEnums as fxe
-from flexsea import fxPlotting as fxp
 from flexsea import fxUtils as fxu
 
-from flexsea_demos.device import Device
+from flexsea_demos.device import open_devices
+from flexsea_demos.downsample import downsample_chunks
+from flexsea_demos.downsample import METHODS
+from flexsea_demos.plotting import get_fxplotting
+from flexsea_demos.plotting import plot
+from flexsea_demos.plotting import PlotExporter
+from flexsea_demos.recording import RecordingWriter
+from flexsea_demos.recording import zip_chunks
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.scheduler import UnpacedScheduler
+from flexsea_demos.telemetry import ColumnSummary
+from flexsea_demos.telemetry import TelemetryRecorder
+from flexsea_demos.trajectory import Trajectory
+from flexsea_demos.utils import read_yaml
 from flexsea_demos.utils import setup
 
 
+# ============================================
+#             draw_high_stress
+# ============================================
+def draw_high_stress(  # pylint: disable=too-many-arguments
+    fig, series, type_str, cmd_freq, current, position, cycle_stop_times
+):
+    """
+    Draws the current and position setpoint vs desired figures of each
+    device. `series` maps the id of each device to the times, requests
+    and measurements of its "current" and "position" plots, and
+    `current` and `position` are the frequency and amplitude of each
+    signal.
+    """
+    fxp = get_fxplotting()
+    for dev_id, plots in series.items():
+        fig = fxp.plot_setpoint_vs_desired(
+            dev_id,
+            fig,
+            fxe.HSS_CURRENT,
+            *current,
+            type_str,
+            cmd_freq,
+            *plots["current"],
+            cycle_stop_times,
+        )
+        fig = fxp.plot_setpoint_vs_desired(
+            dev_id,
+            fig,
+            fxe.HSS_POSITION,
+            *position,
+            type_str,
+            cmd_freq,
+            *plots["position"],
+            cycle_stop_times,
+        )
+    return fig
+
+
 # ============================================
 #             HighStressCommand
 # ============================================
@@ -38,6 +88,20 @@ class HighStressCommand(Command):
         "nLoops": int,
     }
 
+    # Paces the control loop
+    scheduler_class = LoopScheduler
+
+    # What's recorded for each device on every tick
+    telemetry_columns = {
+        "read_times": np.int64,
+        "gains_times": np.int64,
+        "motor_times": np.int64,
+        "pos_requests": np.int32,
+        "pos_measurements": np.int32,
+        "curr_requests": np.float32,
+        "curr_measurements": np.float32,
+    }
+
     # -----
     # constructor
     # -----
@@ -45,6 +109,7 @@ class HighStressCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.cmd_freq = 0
         self.position_amplitude = 0
         self.current_amplitude = 0
@@ -52,26 +117,37 @@ class HighStressCommand(Command):
         self.current_freq = 0
         self.current_asymmetric_g = 0.0
         self.nLoops = 0
+        self.spin_time = 0.0
+        self.parallel = False
+        self.trajectory_file = None
+        self.plot_dir = None
+        self.plot_format = "png"
+        self.plot_points = 2000
+        self.plot_downsample = "lttb"
+        self.record_file = None
+        self.record_compression = None
 
         self.dt = 0
+        self.scheduler = None
+        self.executor = None
         self.devices = []
         self.cur_gains = {"KP": 40, "KI": 400, "KD": 0, "K": 0, "B": 0, "FF": 128}
         self.pos_gains = {"KP": 100, "KI": 10, "KD": 0, "K": 0, "B": 0, "FF": 0}
         self.cmd_count = 0
         self.start_time = 0
-        self.timestamps = []
+        self.timestamps = None
+        self.trajectory = None
+        self.cycles = []
         self.cycle_stop_times = []
         self.figure_ind = 1
+        self.exporter = None
+        self.recording = None
         self.samples = {
             "position_samples": [],
             "current_samples": [],
             "current_samples_line": [],
         }
 
-        matplotlib.use("WebAgg")
-        if fxu.is_pi():
-            matplotlib.rcParams.update({"webagg.address": "0.0.0.0"})
-
     # -----
     # handle
     # -----
@@ -80,130 +156,328 @@ class HighStressCommand(Command):
         Runs the high stress demo.
         """
         setup(self, self.required, self.argument("paramFile"))
+        self._run()
+
+    # -----
+    # _run
+    # -----
+    def _run(self):
+        """
+        Runs the demo with the parameters and backend already set.
+        """
+        self._prepare()
+
+        self.start_time = perf_counter_ns()
+        self.cmd_count = 0
+        self.scheduler.start()
+        try:
+            self._high_stress()
+        finally:
+            self._shutdown()
+        self._finish()
+
+    # -----
+    # _prepare
+    # -----
+    def _prepare(self):
+        """
+        Opens the devices, compiles the trajectory and allocates the
+        recorders, i.e., everything the control loop needs.
+        """
         self.dt = float(1 / (float(self.cmd_freq)))
-        for i, port in enumerate(self.ports):
-            self.devices.append({"port": Device(self.fxs, port, self.baud_rate)})
+        # Stream at least as fast as we send commands
+        self.device_options = {
+            "stream_freq": self.cmd_freq,
+            "read_freshness": self.dt / 2,
+            **self.device_options,
+        }
+        self.scheduler = self.scheduler_class(self.cmd_freq, self.spin_time)
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        if self.plot_downsample not in METHODS:
+            raise ValueError(f"Invalid plot_downsample '{self.plot_downsample}'")
+        self._get_samples()
+        self._open_devices()
+        self._compile_trajectory()
+        capacity = self.trajectory.n_ticks
+        self.timestamps = TelemetryRecorder(
+            {"time": np.int64, "skew": np.int64}, capacity
+        )
+        for dev in self.devices:
+            dev["telemetry"] = TelemetryRecorder(self.telemetry_columns, capacity)
+        self._start_recording()
+
+        if self.parallel:
+            self.executor = ThreadPoolExecutor(max_workers=len(self.devices))
+
+    # -----
+    # _open_devices
+    # -----
+    def _open_devices(self):
+        """
+        Opens every port and takes a first reading of each device.
+        """
+        devices = open_devices(
+            self.fxs, self.ports, self.baud_rate, **self.device_options
+        )
+        for i, device in enumerate(devices):
+            self.devices.append({"port": device, "dev_id": device.dev_id})
             self.devices[i]["initial_pos"] = self.devices[i]["port"].initial_pos
             self.devices[i]["data"] = self.devices[i]["port"].read()
-            self.devices[i]["read_times"] = []
-            self.devices[i]["gains_times"] = []
-            self.devices[i]["motor_times"] = []
-            self.devices[i]["pos_requests"] = []
-            self.devices[i]["pos_measurements"] = []
-            self.devices[i]["curr_requests"] = []
-            self.devices[i]["curr_measurements"] = []
-
-        self._get_samples()
-        self.start_time = time()
-        self.cmd_count = 0
-        self._high_stress()
 
     # -----
     # _high_stress
     # -----
     def _high_stress(self):
         for rep in range(self.nLoops):
-            fxu.print_loop_count_and_time(rep, self.nLoops, time() - self.start_time)
-            self._step0(rep)
-            self._step1(rep)
-            self._step2()
-            self._step3()
-            self._step4()
-            self._step5()
-            self.cycle_stop_times.append(time() - self.start_time)
+            fxu.print_loop_count_and_time(rep, self.nLoops, self._elapsed())
+            for pos, cur, segment in self.get_ticks(rep):
+                self.scheduler.wait()
+                self._send_and_time_cmds(pos, cur, segment)
+            self.cycle_stop_times.append(self._elapsed())
 
-        elapsed_time = time() - self.start_time
+    # -----
+    # _shutdown
+    # -----
+    def _shutdown(self):
+        """
+        Releases what only the control loop needed, whether or not it
+        ran to the end.
+        """
+        if self.executor:
+            self.executor.shutdown()
+
+    # -----
+    # _finish
+    # -----
+    def _finish(self):
+        """
+        Stops the motors, then prints and plots the results of the run.
+        """
+        elapsed_time = self._elapsed()
+        self.scheduler.stop()
 
         for dev in self.devices:
-            dev["port"].motor(fxe.FX_VOLTAGE, 0)
+            if dev["port"]:
+                dev["port"].motor(fxe.FX_VOLTAGE, 0)
         sleep(0.1)
 
         self._print_stats(elapsed_time)
+        self._print_loop_stats()
+        if self.trajectory_file:
+            # Written after the run so that the run-time setpoints show
+            self.trajectory.dump(self.trajectory_file)
+            print(f"Compiled trajectory written to '{self.trajectory_file}'")
+        if self.recording:
+            self.recording.set_meta(
+                elapsed_time=elapsed_time,
+                cmd_count=self.cmd_count,
+                cycle_stop_times=self.cycle_stop_times,
+                dispatch_mode=self._get_dispatch_mode(),
+            )
+            self.recording.close()
+            self.recording.print_stats()
         self._plot()
         for dev in self.devices:
-            dev["port"].close()
+            if dev["port"]:
+                dev["port"].close()
+        if self.exporter:
+            self.exporter.join()
 
     # -----
-    # _step0
+    # replay
     # -----
-    def _step0(self, rep):
-        sleep(self.dt)
-        cmds = []
-        for dev in self.devices:
-            if rep:
-                initial_cmd = {"cur": 0, "pos": dev["port"].get_pos()}
-            else:
-                initial_cmd = {"cur": 0, "pos": dev["port"].initial_pos}
-            cmds.append(initial_cmd)
-        self._send_and_time_cmds(cmds, fxe.FX_POSITION, self.pos_gains, True)
+    def replay(self, recording):
+        """
+        Prints the stats and draws the plots of a run recorded with
+        `record_file`, as if it had just finished.
+
+        Parameters
+        ----------
+        recording : flexsea_demos.recording.Recording
+            The recorded run. The demo's parameters must already be set.
+        """
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        self._get_samples()
+        # Read one chunk at a time by the stats and plots
+        self.timestamps = recording.stream("timestamps")
+        self.devices = [
+            {
+                "port": None,
+                "dev_id": dev_id,
+                "telemetry": recording.stream(f"{dev_id}/telemetry"),
+            }
+            for dev_id in recording.meta["dev_ids"]
+        ]
+        self.cmd_count = recording.meta["cmd_count"]
+        self.cycle_stop_times = recording.meta["cycle_stop_times"]
+
+        self._print_stats(recording.meta["elapsed_time"])
+        self._plot()
+        if self.exporter:
+            self.exporter.join()
 
     # -----
-    # _step1
+    # rerun
     # -----
-    def _step1(self, rep):
-        if rep:
-            # Create interpolation angles for each device
-            lin_samples = []
-            for dev in self.devices:
-                lin_samples.append(
-                    fxu.linear_interp(dev["data"].mot_ang, dev["initial_pos"], 360)
+    def rerun(self, recording):
+        """
+        Runs the demo again, unpaced, on the measurements of a run
+        recorded with `record_file`: on every tick, each device reads
+        back what it measured on that tick. The stats and plots are
+        those of the new run, and nothing is recorded.
+
+        Parameters
+        ----------
+        recording : flexsea_demos.recording.Recording
+            The recorded run. The demo's parameters must already be set.
+        """
+        # Only loaded when it's used, like the other backends
+        # pylint: disable=import-outside-toplevel
+        from flexsea_demos.replay_backend import recorded_rows
+        from flexsea_demos.replay_backend import ReplayFlexSEA
+
+        devices = []
+        for dev_id in recording.meta["dev_ids"]:
+            name = f"{dev_id}/telemetry"
+            # The first request holds the device where it was opened
+            first = next(recording.stream(name).chunks())["pos_requests"]
+            devices.append(
+                (
+                    dev_id,
+                    recorded_rows(
+                        recording,
+                        name,
+                        {"mot_ang": "pos_measurements", "mot_cur": "curr_measurements"},
+                    ),
+                    {"mot_ang": first[0]} if len(first) else None,
                 )
-
-            for samples in np.array(lin_samples).transpose():
-                cmds = [{"cur": 0, "pos": sample} for sample in samples]
-                sleep(self.dt)
-                self._send_and_time_cmds(cmds, fxe.FX_POSITION, self.pos_gains, False)
-                self.cmd_count += 1
+            )
+        self.fxs = ReplayFlexSEA(devices)
+        self.scheduler_class = partial(UnpacedScheduler, on_wait=self.fxs.tick)
+        # Every tick reads a new frame
+        self.device_options = {**self.device_options, "read_freshness": 0}
+        self.record_file = None
+        self.trajectory_file = None
+        self._run()
 
     # -----
-    # _step2
+    # _start_recording
     # -----
-    def _step2(self):
-        for sample in self.samples["position_samples"]:
-            cmds = []
-            for dev in self.devices:
-                cmds.append({"cur": 0, "pos": sample + dev["initial_pos"]})
-            sleep(self.dt)
-            self._send_and_time_cmds(cmds, fxe.FX_POSITION, self.pos_gains, False)
-            self.cmd_count += 1
+    def _start_recording(self):
+        """
+        Streams the timestamps and every device's telemetry to
+        `record_file`, if it's set.
+        """
+        if not self.record_file:
+            return
+        self.recording = RecordingWriter(
+            self.record_file,
+            self.record_compression,
+            meta={
+                "command": self.config.name,
+                "params": read_yaml(self.argument("paramFile")),
+                "dev_ids": [dev["dev_id"] for dev in self.devices],
+            },
+        )
+        self.recording.add(self.timestamps, "timestamps")
+        for dev in self.devices:
+            self.recording.add(dev["telemetry"], f"{dev['dev_id']}/telemetry")
 
     # -----
-    # _step3
+    # get_ticks
     # -----
-    def _step3(self):
-        cmds = [{"cur": 0, "pos": dev["initial_pos"]} for dev in self.devices]
-        # TODO(CA): Investigate this problem and remove the hack below
-        # Set gains several times since they might not get set when only set once.
-        for _ in range(5):
-            self._send_and_time_cmds(cmds, fxe.FX_CURRENT, self.cur_gains, True)
-            sleep(self.dt)
+    def get_ticks(self, rep):
+        """
+        Yields the position and current setpoints (one per device) and
+        the segment of each tick of loop `rep`. Segments that depend on
+        the devices' positions are filled in when they're reached.
+
+        The workers of `high_stress_processes` run their column of the
+        schedule with this and `send_and_time_cmd`.
+        """
+        for segment in self.cycles[rep]:
+            if segment.fill:
+                segment.fill(segment)
+            pos = self.trajectory.view("pos", segment)
+            cur = self.trajectory.view("cur", segment)
+            for row in range(len(segment)):
+                yield pos[row], cur[row], segment
 
     # -----
-    # _step4
+    # _compile_trajectory
     # -----
-    def _step4(self):
-        for sample in self.samples["current_samples"]:
-            sleep(self.dt)
-            # use more current on "way back" to get closer to start
-            sample = np.int64(sample)
-            # Apply gain
-            if sample > 0:
-                sample = np.int64(self.current_asymmetric_g * sample)
-            cmds = [{"cur": sample, "pos": dev["initial_pos"]} for dev in self.devices]
+    def _compile_trajectory(self):
+        """
+        Builds the setpoint tables of the whole run. Each loop is:
+
+            0. Set the position gains and hold the current position
+            1. Go back to the initial position (all but the first loop)
+            2. Position sine wave
+            3. Set the current gains
+            4. Current sine wave, with more current on the way back
+            5. Zero current
+        """
+        initial_pos = np.array([dev["initial_pos"] for dev in self.devices])
+        pos_sine = np.asarray(self.samples["position_samples"])[:, None] + initial_pos
+        cur_sine = np.int64(self.samples["current_samples"])
+        # Use more current on "way back" to get closer to start
+        cur_sine = np.where(
+            cur_sine > 0, np.int64(self.current_asymmetric_g * cur_sine), cur_sine
+        )
+        cur_line = np.asarray(self.samples["current_samples_line"], dtype=np.int64)
 
-            sleep(self.dt)
-            self._send_and_time_cmds(cmds, fxe.FX_CURRENT, self.cur_gains, False)
-            self.cmd_count += 1
+        self.trajectory = Trajectory(
+            len(self.devices), {"pos": np.int64, "cur": np.int64}
+        )
+        add = self.trajectory.add
+        position = {"mode": fxe.FX_POSITION, "gains": self.pos_gains}
+        current = {"mode": fxe.FX_CURRENT, "gains": self.cur_gains, "pos": initial_pos}
+        self.cycles = []
+        for rep in range(self.nLoops):
+            if rep:
+                cycle = [
+                    add(
+                        "step0", n_ticks=1, set_gains=True, fill=self._hold, **position
+                    ),
+                    add("step1", n_ticks=360, fill=self._go_back, **position),
+                ]
+            else:
+                cycle = [
+                    add("step0", n_ticks=1, set_gains=True, pos=initial_pos, **position)
+                ]
+            cycle += [
+                add("step2", n_ticks=len(pos_sine), pos=pos_sine, **position),
+                add("step3", n_ticks=1, set_gains=True, **current),
+                add("step4", n_ticks=len(cur_sine), cur=cur_sine[:, None], **current),
+                add("step5", n_ticks=len(cur_line), cur=cur_line[:, None], **current),
+            ]
+            self.cycles.append(cycle)
+        self.trajectory.compile()
+
+        print("\n".join(self.trajectory.summary()))
 
     # -----
-    # _step5
+    # _hold
     # -----
-    def _step5(self):
-        for sample in self.samples["current_samples_line"]:
-            cmds = [{"cur": sample, "pos": dev["initial_pos"]} for dev in self.devices]
-            sleep(self.dt)
-            self._send_and_time_cmds(cmds, fxe.FX_CURRENT, self.cur_gains, False)
-            self.cmd_count += 1
+    def _hold(self, segment):
+        """
+        Holds every device where it currently is.
+        """
+        pos = self.trajectory.view("pos", segment)
+        pos[:] = [dev["port"].get_pos() for dev in self.devices]
+
+    # -----
+    # _go_back
+    # -----
+    def _go_back(self, segment):
+        """
+        Interpolates from where each device was last measured back to
+        its initial position.
+        """
+        start = [dev["data"].mot_ang for dev in self.devices]
+        end = [dev["initial_pos"] for dev in self.devices]
+        pos = self.trajectory.view("pos", segment)
+        pos[:] = np.linspace(start, end, len(segment))
 
     # -----
     # _get_samples
@@ -217,40 +491,134 @@ class HighStressCommand(Command):
         )
         self.samples["current_samples_line"] = fxu.line_generator(0, 0.5, self.cmd_freq)
 
+    # -----
+    # _elapsed
+    # -----
+    def _elapsed(self):
+        """
+        Seconds since the start of the run.
+        """
+        return (perf_counter_ns() - self.start_time) / 1e9
+
     # -----
     # _send_and_time_cmds
     # -----
-    def _send_and_time_cmds(self, cmds, motor_cmd, gains, set_gains):
+    def _send_and_time_cmds(self, pos, cur, segment):
+        """
+        Sends one tick of `segment` to every device. `pos` and `cur`
+        hold each device's position and current setpoints.
+        """
         try:
-            assert motor_cmd in [fxe.FX_POSITION, fxe.FX_CURRENT]
+            assert segment.mode in [fxe.FX_POSITION, fxe.FX_CURRENT]
         except AssertionError:
             msg = "Unexpected motor command, only FX_POSITION, FX_CURRENT allowed"
             raise AssertionError(msg)
 
-        for dev, cmd in zip(self.devices, cmds):
-            tstart = time()
-            dev["data"] = dev["port"].read()
-            dev["read_times"].append(time() - tstart)
+        if self.executor:
+            futures = [
+                self.executor.submit(
+                    self.send_and_time_cmd, dev, pos[i], cur[i], segment
+                )
+                for i, dev in enumerate(self.devices)
+            ]
+            send_times = [future.result() for future in futures]
+        else:
+            send_times = [
+                self.send_and_time_cmd(dev, pos[i], cur[i], segment)
+                for i, dev in enumerate(self.devices)
+            ]
 
-            if set_gains:
-                tstart = time()
-                # Gains are, in order: kp, ki, kd, K, B & ff
-                dev["port"].set_gains(gains)
-                dev["gains_times"].append(time() - tstart)
-            else:
-                dev["gains_times"].append(0)
+        self._record_tick(send_times, segment.set_gains)
 
-            cmd_val = cmd["cur"] if motor_cmd == fxe.FX_CURRENT else cmd["pos"]
+    # -----
+    # _record_tick
+    # -----
+    def _record_tick(self, send_times, set_gains):
+        """
+        Records when a tick's commands went out and how far apart they
+        were. Ticks that only set the gains aren't counted as commands.
+        """
+        self.timestamps.append(
+            perf_counter_ns() - self.start_time, max(send_times) - min(send_times)
+        )
+        if not set_gains:
+            self.cmd_count += 1
 
-            tstart = time()
-            dev["port"].motor(motor_cmd, cmd_val)
-            dev["motor_times"].append(time() - tstart)
-            dev["pos_requests"].append(cmd["pos"])
-            dev["pos_measurements"].append(dev["data"].mot_ang)
-            dev["curr_requests"].append(cmd["cur"])
-            dev["curr_measurements"].append(dev["data"].mot_cur)
+    # -----
+    # send_and_time_cmd
+    # -----
+    def send_and_time_cmd(self, dev, pos, cur, segment):
+        """
+        Reads from, optionally sets the gains of, and commands a single
+        device. In parallel mode this runs on a worker thread, one per
+        device.
+
+        Returns
+        -------
+        int
+            The `perf_counter_ns` time, in ns, at which the motor
+            command was sent. The spread of these across devices is the
+            inter-device command skew.
+        """
+        calls = self._time_cmd(dev, pos, cur, segment)
+        result = None
+        try:
+            while True:
+                name, args = calls.send(result)
+                result = getattr(dev["port"], name)(*args)
+        except StopIteration as stop:
+            return stop.value
 
-        self.timestamps.append(time() - self.start_time)
+    # -----
+    # _time_cmd
+    # -----
+    def _time_cmd(self, dev, pos, cur, segment):
+        """
+        Times and records the calls that read from, optionally set the
+        gains of, and command a single device.
+
+        This is a generator so that the blocking and the asyncio
+        dispatch share it: it yields the name and arguments of each
+        `Device` call, is sent back its result, and returns the time at
+        which the motor command was sent (see `send_and_time_cmd`).
+        """
+        read_start = perf_counter_ns()
+        data = yield "read", ()
+        gains_start = perf_counter_ns()
+
+        if segment.set_gains:
+            # Gains are, in order: kp, ki, kd, K, B & ff
+            yield "set_gains", (segment.gains,)
+            motor_start = perf_counter_ns()
+        else:
+            motor_start = gains_start
+
+        cmd_val = cur if segment.mode == fxe.FX_CURRENT else pos
+
+        yield "motor", (segment.mode, cmd_val)
+        motor_stop = perf_counter_ns()
+
+        dev["data"] = data
+        dev["telemetry"].append(
+            gains_start - read_start,
+            motor_start - gains_start,
+            motor_stop - motor_start,
+            pos,
+            data.mot_ang,
+            cur,
+            data.mot_cur,
+        )
+
+        return motor_start
+
+    # -----
+    # _get_dispatch_mode
+    # -----
+    def _get_dispatch_mode(self):
+        """
+        How each tick's commands are sent to the devices.
+        """
+        return "parallel" if self.parallel else "serial"
 
     # -----
     # _print_stats
@@ -264,45 +632,80 @@ class HighStressCommand(Command):
         print(f"Actual command frequency (Hz): {self.cmd_count / elapsed_time}")
         print(f"\ncurrent_samples_line: {len(self.samples['current_samples_line'])}")
         print(f"size(TIMESTAMPS): {len(self.timestamps)}")
-        print(f"size(currentRequests): {len(self.devices[0]['curr_requests'])}")
+        print(f"size(TELEMETRY0): {len(self.devices[0]['telemetry'])}\n")
+
+        mode = self._get_dispatch_mode()
+        print(f"Dispatch mode: {mode} ({len(self.devices)} devices)")
+        columns = ("read_times", "gains_times", "motor_times")
+        for dev in self.devices:
+            telemetry = dev["telemetry"]
+            times = {col: ColumnSummary(len(telemetry)) for col in columns}
+            for chunk in telemetry.chunks():
+                for col, summary in times.items():
+                    summary.add(chunk[col])
+            print(
+                f"Device {dev['dev_id']} mean read/gains/motor times (ms): "
+                + " / ".join(f"{times[col].mean / 1e6:.3f}" for col in columns)
+            )
+            if dev["port"]:
+                dev["port"].print_stats()
+        skews = ColumnSummary(len(self.timestamps), qs=(99,))
+        for chunk in self.timestamps.chunks():
+            skews.add(chunk["skew"] / 1e6)
         print(
-            f"size(currentMeasurements0): {len(self.devices[0]['curr_measurements'])}"
+            "Inter-device command skew (ms): "
+            f"mean {skews.mean:.3f}, "
+            f"p99 {skews.percentile(99):.3f}, "
+            f"max {skews.max:.3f}\n"
         )
-        print(f"size(SET_GAINS_TIMES): {len(self.devices[0]['gains_times'])}\n")
+
+    # -----
+    # _print_loop_stats
+    # -----
+    def _print_loop_stats(self):
+        """
+        Prints how closely the control loop kept to its schedule.
+        """
+        self.scheduler.print_stats()
 
     # -----
     # _plot
     # -----
     def _plot(self, type_str="sine wave"):
+        """
+        Plots the requests and measurements of every device, decimated
+        to `plot_points` points per series one chunk at a time. The
+        recorders keep the full resolution data.
+        """
+        series = {}
         for dev in self.devices:
-            self.figure_ind = fxp.plot_setpoint_vs_desired(
-                dev["port"].dev_id,
-                self.figure_ind,
-                fxe.HSS_CURRENT,
-                self.current_freq,
-                self.current_amplitude,
-                type_str,
-                self.cmd_freq,
-                self.timestamps,
-                dev["curr_requests"],
-                dev["curr_measurements"],
-                self.cycle_stop_times,
-            )
-
-            self.figure_ind = fxp.plot_setpoint_vs_desired(
-                dev["port"].dev_id,
-                self.figure_ind,
-                fxe.HSS_POSITION,
-                self.position_freq,
-                self.position_amplitude,
-                type_str,
-                self.cmd_freq,
-                self.timestamps,
-                dev["pos_requests"],
-                dev["pos_measurements"],
-                self.cycle_stop_times,
-            )
-
-        plt.show()
-        sleep(0.1)
-        fxu.print_plot_exit()
+            telemetry = dev["telemetry"]
+            n_rows = min(len(self.timestamps), len(telemetry))
+            series[dev["dev_id"]] = {
+                name: downsample_chunks(
+                    (
+                        (times["time"] / 1e9, chunk[requests], chunk[measurements])
+                        for times, chunk in zip_chunks(self.timestamps, telemetry)
+                    ),
+                    n_rows,
+                    max_points=self.plot_points,
+                    method=self.plot_downsample,
+                )
+                for name, requests, measurements in (
+                    ("current", "curr_requests", "curr_measurements"),
+                    ("position", "pos_requests", "pos_measurements"),
+                )
+            }
+
+        self.figure_ind = plot(
+            draw_high_stress,
+            "high_stress",
+            self.exporter,
+            self.figure_ind,
+            series=series,
+            type_str=type_str,
+            cmd_freq=self.cmd_freq,
+            current=(self.current_freq, self.current_amplitude),
+            position=(self.position_freq, self.position_amplitude),
+            cycle_stop_times=self.cycle_stop_times,
+        )
@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from flexsea import fxUtils as fxu
+
+from flexsea_demos.async_device import AsyncDevice
+from flexsea_demos.commands.high_stress import HighStressCommand
+from flexsea_demos.scheduler import AsyncLoopScheduler
+
+
+# ============================================
+#          HighStressAsyncCommand
+# ============================================
+class HighStressAsyncCommand(HighStressCommand):
+    """
+    Runs the high stress demo on an asyncio event loop.
+
+    high_stress_async
+        {paramFile : Yaml file with demo parameters.}
+    """
+
+    # Paces the control loop
+    scheduler_class = AsyncLoopScheduler
+
+    # Rerunning a recording is only done with the synchronous loop
+    rerun = None
+
+    # -----
+    # _high_stress
+    # -----
+    def _high_stress(self):
+        asyncio.run(self._high_stress_async())
+
+    # -----
+    # _high_stress_async
+    # -----
+    async def _high_stress_async(self):
+        """
+        Same ticks as the synchronous demo, but every device is read
+        from and commanded by its own coroutine, with the blocking
+        library calls running on a thread per device.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(self.devices))
+        for dev in self.devices:
+            dev["async"] = AsyncDevice(dev["port"], executor)
+        try:
+            for rep in range(self.nLoops):
+                fxu.print_loop_count_and_time(rep, self.nLoops, self._elapsed())
+                for pos, cur, segment in self.get_ticks(rep):
+                    await self.scheduler.wait()
+                    send_times = await asyncio.gather(
+                        *(
+                            self.send_and_time_cmd_async(dev, pos[i], cur[i], segment)
+                            for i, dev in enumerate(self.devices)
+                        )
+                    )
+                    self._record_tick(send_times, segment.set_gains)
+                self.cycle_stop_times.append(self._elapsed())
+        finally:
+            executor.shutdown()
+
+    # -----
+    # send_and_time_cmd_async
+    # -----
+    async def send_and_time_cmd_async(self, dev, pos, cur, segment):
+        """
+        Awaitable version of `send_and_time_cmd`, with the same timing
+        and the same definition of the inter-device command skew.
+        """
+        calls = self._time_cmd(dev, pos, cur, segment)
+        result = None
+        try:
+            while True:
+                name, args = calls.send(result)
+                result = await getattr(dev["async"], name)(*args)
+        except StopIteration as stop:
+            return stop.value
+
+    # -----
+    # _get_dispatch_mode
+    # -----
+    def _get_dispatch_mode(self):
+        return "asyncio"
@@ -0,0 +1,475 @@
+import multiprocessing
+from multiprocessing import shared_memory
+from time import perf_counter_ns
+from time import sleep
+
+import numpy as np
+from flexsea import fxEnums as fxe
+from flexsea import fxUtils as fxu
+
+from flexsea_demos.commands.high_stress import HighStressCommand
+from flexsea_demos.device import Device
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.shared_ring import SharedRing
+from flexsea_demos.telemetry import TelemetryRecorder
+from flexsea_demos.trajectory import Segment
+from flexsea_demos.trajectory import Trajectory
+from flexsea_demos.utils import get_backend
+
+# Layout of the control block the coordinator shares with the workers:
+# the phase (cycle) they may run, when its first tick is due and
+# whether they must stop
+_PHASE, _PHASE_START, _STOP = range(3)
+
+# How far ahead of its first tick a phase is announced, in seconds, so
+# that every worker has seen it by then
+PHASE_LEAD = 0.005
+
+# Rate (in Hz) at which the coordinator collects the telemetry
+POLL_FREQ = 500
+
+# What each worker records on every tick, besides its device's telemetry
+TICK_COLUMNS = {"sent": np.int64, "done": np.int64, "set_gains": np.bool_}
+
+
+# ============================================
+#                 _run_device
+# ============================================
+def _run_device(index, port, settings, control, telemetry, ticks, conn):
+    """
+    Runs in the worker process of device `index`.
+
+    Opens the device and reports its id and position, then waits for
+    its column of the schedule. Each cycle starts when the coordinator
+    announces it and is paced on a grid of deadlines that every worker
+    shares. The device's telemetry and the times of each tick are
+    written to the `telemetry` and `ticks` rings.
+    """
+    device = None
+    shms = []
+    runner = HighStressCommand()
+    try:
+        backend = {"backend": settings["backend"], "sim": settings["sim"]}
+        if settings["backend"] == "sim":
+            # Every process has its own simulator; keep the ids unique
+            backend["sim"] = {**settings["sim"], "first_id": 1000 + index}
+        device = Device(
+            get_backend(backend),
+            port,
+            settings["baud_rate"],
+            **settings["device_options"],
+        )
+        conn.send(("ready", device.dev_id, device.initial_pos))
+        message = conn.recv()
+        if message[0] != "run":
+            return
+        _, tables, cycles = message
+
+        dev = {
+            "port": device,
+            "dev_id": device.dev_id,
+            "initial_pos": device.initial_pos,
+            "data": device.read(),
+            "telemetry": telemetry,
+        }
+        runner.devices = [dev]
+        runner.trajectory = Trajectory(
+            1, {name: desc[2] for name, desc in tables.items()}
+        )
+        for name, (shm_name, shape, dtype) in tables.items():
+            shms.append(shared_memory.SharedMemory(name=shm_name))
+            table = np.ndarray(shape, dtype=dtype, buffer=shms[-1].buf)
+            runner.trajectory.tables[name] = table[:, index : index + 1]
+        runner.cycles = [[_get_segment(runner, desc) for desc in c] for c in cycles]
+
+        scheduler = LoopScheduler(settings["cmd_freq"], settings["spin_time"])
+        for rep in range(len(runner.cycles)):
+            while control[_PHASE] < rep:
+                if control[_STOP]:
+                    return
+                sleep(PHASE_LEAD / 10)
+            if rep:
+                scheduler.resume(control[_PHASE_START])
+            else:
+                scheduler.start(control[_PHASE_START])
+            for pos, cur, segment in runner.get_ticks(rep):
+                scheduler.wait()
+                sent = runner.send_and_time_cmd(dev, pos[0], cur[0], segment)
+                ticks.append(sent, perf_counter_ns(), segment.set_gains)
+        scheduler.stop()
+        device.motor(fxe.FX_VOLTAGE, 0)
+        conn.send(("done", scheduler.stats(), device.stats))
+    except Exception as err:  # pylint: disable=broad-except
+        conn.send(("error", f"{type(err).__name__}: {err}"))
+    finally:
+        if device:
+            device.close()
+        # The shared blocks can't be closed while arrays point into them
+        runner.trajectory = None
+        runner.devices = []
+        for shm in shms:
+            shm.close()
+        telemetry.close()
+        ticks.close()
+
+
+# ============================================
+#                _get_segment
+# ============================================
+def _get_segment(runner, desc):
+    """
+    Rebuilds a segment described by `_describe`, with its fill bound to
+    the worker's `runner`.
+    """
+    modes = {mode.value: mode for mode in (fxe.FX_POSITION, fxe.FX_CURRENT)}
+    fill = getattr(runner, desc["fill"]) if desc["fill"] else None
+    segment = Segment(
+        desc["name"],
+        modes[desc["mode"]],
+        desc["n_ticks"],
+        desc["set_gains"],
+        desc["gains"],
+        fill,
+    )
+    segment.start = desc["start"]
+    segment.stop = desc["stop"]
+    return segment
+
+
+# ============================================
+#                 _describe
+# ============================================
+def _describe(segment):
+    """
+    Describes a segment in a form that can be sent to a worker. The
+    control modes are ctypes values, which don't survive pickling, and
+    fills are bound to the coordinator, so both are sent by name.
+    """
+    return {
+        "name": segment.name,
+        "mode": segment.mode.value,
+        "n_ticks": segment.n_ticks,
+        "set_gains": segment.set_gains,
+        "gains": segment.gains,
+        "fill": segment.fill.__name__ if segment.fill else None,
+        "start": segment.start,
+        "stop": segment.stop,
+    }
+
+
+# ============================================
+#         HighStressProcessesCommand
+# ============================================
+class HighStressProcessesCommand(HighStressCommand):
+    """
+    Runs the high stress demo with a process per device.
+
+    high_stress_processes
+        {paramFile : Yaml file with demo parameters.}
+    """
+
+    # Rerunning a recording is only done with the synchronous loop
+    rerun = None
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self):
+        super().__init__()
+        self.backend = "flexsea"
+        self.sim = {}
+        self.ring_size = 4096
+
+        self.control = None
+        self.tables = {}
+
+    # -----
+    # _prepare
+    # -----
+    def _prepare(self):
+        """
+        Starts the workers and sends each of them its part of the
+        schedule. The coordinator's own loop only collects telemetry.
+        """
+        # Every device already has its own process
+        self.parallel = False
+        try:
+            super()._prepare()
+            self.scheduler = LoopScheduler(POLL_FREQ)
+            self._share_schedule()
+        except BaseException:
+            self._shutdown()
+            raise
+
+    # -----
+    # _open_devices
+    # -----
+    def _open_devices(self):
+        """
+        Starts a worker process per port, each of which opens its
+        device, and waits for all of them to be ready.
+
+        Raises
+        ------
+        RuntimeError
+            If any device couldn't be opened.
+        """
+        # Spawned rather than forked: the parent holds library threads
+        # that a forked child shouldn't inherit
+        context = multiprocessing.get_context("spawn")
+        self.control = context.RawArray("q", 3)
+        self.control[_PHASE] = -1
+        settings = {
+            "backend": self.backend,
+            "sim": self.sim,
+            "baud_rate": self.baud_rate,
+            "device_options": self.device_options,
+            "cmd_freq": self.cmd_freq,
+            "spin_time": self.spin_time,
+        }
+        for index, port in enumerate(self.ports):
+            dev = {
+                "port": None,
+                "telemetry_ring": SharedRing(self.telemetry_columns, self.ring_size),
+                "tick_ring": SharedRing(TICK_COLUMNS, self.ring_size),
+            }
+            dev["conn"], child_conn = context.Pipe()
+            dev["process"] = context.Process(
+                target=_run_device,
+                args=(
+                    index,
+                    port,
+                    settings,
+                    self.control,
+                    dev["telemetry_ring"],
+                    dev["tick_ring"],
+                    child_conn,
+                ),
+                name=f"high-stress-{port}",
+                daemon=True,
+            )
+            dev["process"].start()
+            child_conn.close()
+            self.devices.append(dev)
+
+        errors = []
+        for port, dev in zip(self.ports, self.devices):
+            message = self._receive(port, dev)
+            if message[0] == "ready":
+                dev["dev_id"], dev["initial_pos"] = message[1:]
+                print(f"Device {dev['dev_id']} on '{port}' ready", flush=True)
+            else:
+                errors.append(f"'{port}': {message[1]}")
+        if errors:
+            raise RuntimeError(f"Couldn't open {', '.join(errors)}")
+
+    # -----
+    # _share_schedule
+    # -----
+    def _share_schedule(self):
+        """
+        Moves the compiled setpoint tables to shared memory, so that
+        each worker reads (and fills in at run time) its own column of
+        them, and sends the workers the segments of every cycle.
+        """
+        tables = {}
+        for name, table in self.trajectory.tables.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(table.nbytes, 1))
+            shared = np.ndarray(table.shape, dtype=table.dtype, buffer=shm.buf)
+            shared[:] = table
+            self.trajectory.tables[name] = shared
+            self.tables[name] = shm
+            tables[name] = (shm.name, table.shape, table.dtype.str)
+        cycles = [[_describe(segment) for segment in cycle] for cycle in self.cycles]
+        for dev in self.devices:
+            dev["ticks"] = TelemetryRecorder(TICK_COLUMNS, self.trajectory.n_ticks)
+            dev["conn"].send(("run", tables, cycles))
+
+    # -----
+    # _high_stress
+    # -----
+    def _high_stress(self):
+        """
+        Announces each cycle once every worker is done with the previous
+        one and collects the telemetry they write in the meantime.
+        """
+        cycle_ends = np.cumsum(
+            [sum(len(segment) for segment in cycle) for cycle in self.cycles]
+        )
+        for rep in range(self.nLoops):
+            fxu.print_loop_count_and_time(rep, self.nLoops, self._elapsed())
+            self.control[_PHASE_START] = perf_counter_ns() + int(PHASE_LEAD * 1e9)
+            self.control[_PHASE] = rep
+            while self._get_ticks_done() < cycle_ends[rep]:
+                self.scheduler.wait()
+                self._check_workers()
+                self._collect()
+            if len(self.timestamps):
+                self.cycle_stop_times.append(self.timestamps["time"][-1] / 1e9)
+            else:
+                self.cycle_stop_times.append(self._elapsed())
+
+        while any("loop_stats" not in dev for dev in self.devices):
+            self.scheduler.wait()
+            self._check_workers()
+        self._collect()
+
+    # -----
+    # _collect
+    # -----
+    def _collect(self):
+        """
+        Moves the rows the workers wrote since the last call from the
+        rings to the recorders, and records the ticks that every device
+        has completed.
+
+        The devices' rows are matched by their position in the
+        recorders, which only holds if every row of every tick made it.
+
+        Raises
+        ------
+        RuntimeError
+            If a ring was full and dropped rows, after which they can't
+            be matched anymore.
+        """
+        for port, dev in zip(self.ports, self.devices):
+            dropped = dev["telemetry_ring"].dropped + dev["tick_ring"].dropped
+            if dropped:
+                raise RuntimeError(
+                    f"The rings of the device on '{port}' overflowed and dropped "
+                    f"{dropped} rows, so its ticks can't be matched with the other "
+                    "devices'. Increase ring_size"
+                )
+        for dev in self.devices:
+            dev["telemetry"].extend(dev["telemetry_ring"].read())
+            dev["ticks"].extend(dev["tick_ring"].read())
+
+        recorded = len(self.timestamps)
+        completed = min(len(dev["ticks"]) for dev in self.devices)
+        if completed == recorded:
+            return
+        rows = slice(recorded, completed)
+        sent = np.array([dev["ticks"]["sent"][rows] for dev in self.devices])
+        done = np.array([dev["ticks"]["done"][rows] for dev in self.devices])
+        self.timestamps.extend(
+            {
+                "time": done.max(axis=0) - self.start_time,
+                "skew": sent.max(axis=0) - sent.min(axis=0),
+            }
+        )
+        set_gains = self.devices[0]["ticks"]["set_gains"][rows]
+        self.cmd_count += int(np.count_nonzero(~set_gains))
+
+    # -----
+    # _get_ticks_done
+    # -----
+    def _get_ticks_done(self):
+        """
+        Number of ticks every worker has run and that were collected.
+        """
+        return min(len(dev["ticks"]) for dev in self.devices)
+
+    # -----
+    # _check_workers
+    # -----
+    def _check_workers(self):
+        """
+        Handles the messages the workers sent since the last call.
+
+        Raises
+        ------
+        RuntimeError
+            If a worker failed or exited before finishing its schedule.
+        """
+        for port, dev in zip(self.ports, self.devices):
+            while "loop_stats" not in dev and dev["conn"].poll():
+                message = self._receive(port, dev)
+                if message[0] == "error":
+                    raise RuntimeError(f"Device on '{port}' failed: {message[1]}")
+                if message[0] == "done":
+                    dev["loop_stats"], dev["device_stats"] = message[1:]
+
+    # -----
+    # _receive
+    # -----
+    @staticmethod
+    def _receive(port, dev):
+        """
+        Waits for the next message from the worker of `dev`. A worker
+        that exited without a word is reported as an error.
+        """
+        try:
+            return dev["conn"].recv()
+        except EOFError:
+            return ("error", f"the process for '{port}' exited unexpectedly")
+
+    # -----
+    # _shutdown
+    # -----
+    def _shutdown(self):
+        """
+        Stops the workers and frees the shared memory. The setpoint
+        tables are copied out first, so they can still be dumped.
+        """
+        if self.control is not None:
+            self.control[_STOP] = 1
+        for dev in self.devices:
+            if "process" not in dev:
+                continue
+            try:
+                # For the workers still waiting for their schedule
+                dev["conn"].send(("stop",))
+            except OSError:
+                pass
+            dev["process"].join(timeout=5)
+            if dev["process"].is_alive():
+                dev["process"].terminate()
+            dev["conn"].close()
+            dev["telemetry_ring"].close()
+            dev["tick_ring"].close()
+        for name, shm in self.tables.items():
+            self.trajectory.tables[name] = np.array(self.trajectory.tables[name])
+            shm.close()
+            shm.unlink()
+        self.tables = {}
+        super()._shutdown()
+
+    # -----
+    # _print_stats
+    # -----
+    def _print_stats(self, elapsed_time):
+        super()._print_stats(elapsed_time)
+        for dev in self.devices:
+            if "device_stats" not in dev:
+                continue
+            stats = ", ".join(f"{k}: {v}" for k, v in dev["device_stats"].items())
+            print(f"Device {dev['dev_id']} stats: {stats}")
+
+    # -----
+    # _print_loop_stats
+    # -----
+    def _print_loop_stats(self):
+        """
+        Prints how closely each worker kept to the schedule.
+        """
+        print("\nLoop Timing (per device):")
+        print("--------------------------")
+        for dev in self.devices:
+            stats = dev.get("loop_stats")
+            if not stats:
+                continue
+            print(
+                f"Device {dev['dev_id']}: "
+                f"{stats['achieved_freq']:.2f} Hz of {stats['requested_freq']}, "
+                f"{stats['overruns']} overruns, {stats['missed']} missed, "
+                f"lateness p50 {stats['lateness_p50_us']:.1f} us, "
+                f"p99 {stats['lateness_p99_us']:.1f} us, "
+                f"max {stats['lateness_max_us']:.1f} us"
+            )
+        print()
+
+    # -----
+    # _get_dispatch_mode
+    # -----
+    def _get_dispatch_mode(self):
+        return "processes"
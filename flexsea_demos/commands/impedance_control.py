@@ -5,11 +5,21 @@ from typing import List
 
 from cleo import Command
 from flexsea import fxEnums as fxe
-from flexsea import fxUtils as fxu
-import matplotlib
-import matplotlib.pyplot as plt
+import numpy as np
 
+from flexsea_demos.dashboard import Dashboard
 from flexsea_demos.device import Device
+from flexsea_demos.downsample import downsample_chunks
+from flexsea_demos.parallel import run_ports
+from flexsea_demos.plotting import plot
+from flexsea_demos.plotting import plot_positions
+from flexsea_demos.plotting import PlotExporter
+from flexsea_demos.recording import RecordingWriter
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.scheduler import UnpacedScheduler
+from flexsea_demos.telemetry import percentiles
+from flexsea_demos.telemetry import TelemetryRecorder
+from flexsea_demos.utils import read_yaml
 from flexsea_demos.utils import setup
 
 
@@ -22,6 +32,7 @@ class ImpedanceControlCommand(Command):
 
     impedance_control
         {paramFile : Yaml file with demo parameters.}
+        {--parallel : Run every port at once, each on its own thread.}
     """
 
     # Schema of parameters required by the demo
@@ -42,6 +53,7 @@ class ImpedanceControlCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.run_time = 0
         self.gains = {}
         self.transition_time = 0.0
@@ -50,12 +62,19 @@ class ImpedanceControlCommand(Command):
         self.nLoops = 0
         self.transition_steps = 0
         self.start_time = 0.0
+        self.loop_delay = 0.02
+        self.scheduler = None
+        self.display_rate = 10.0
+        self.dashboard = None
         self.fxs = None
-        self.plot_data = {"times": [], "requests": [], "measurements": []}
-
-        matplotlib.use("WebAgg")
-        if fxu.is_pi():
-            matplotlib.rcParams.update({"webagg.address": "0.0.0.0"})
+        self.plot_dir = None
+        self.plot_format = "png"
+        self.plot_points = 2000
+        self.exporter = None
+        self.record_file = None
+        self.record_compression = None
+        self.recording = None
+        self.plot_data = None
 
     # -----
     # handle
@@ -65,19 +84,87 @@ class ImpedanceControlCommand(Command):
         Impedance control demo.
         """
         setup(self, self.required, self.argument("paramFile"))
-        self.nLoops = int(self.run_time / 0.02)
-        self.transition_steps = int(self.transition_time / 0.02)
+        self._prepare()
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        self.recording = RecordingWriter.from_params(
+            self.record_file,
+            self.record_compression,
+            meta={
+                "command": self.config.name,
+                "params": read_yaml(self.argument("paramFile")),
+            },
+        )
+
+        run_ports(self, "_run_port", "_plot")
 
-        for port in self.ports:
-            input("Press 'ENTER' to continue...")
-            device = Device(self.fxs, port, self.baud_rate)
-            self._reset_plot()
+        if self.recording:
+            self.recording.close()
+            self.recording.print_stats()
+        if self.exporter:
+            self.exporter.join()
+
+    # -----
+    # _run_port
+    # -----
+    def _run_port(self, port):
+        """
+        Runs the demo on the device on `port`, and returns its id.
+        """
+        device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+        self._reset_plot()
+        if self.recording:
+            self.recording.add(self.plot_data, f"{device.dev_id}/positions")
 
-            self._impedance_control(device)
+        self._impedance_control(device)
 
-            device.motor(fxe.FX_VOLTAGE, 0)
-            self._plot()
-            device.close()
+        device.motor(fxe.FX_VOLTAGE, 0)
+        device.close()
+        return device.dev_id
+
+    # -----
+    # _prepare
+    # -----
+    def _prepare(self):
+        self.nLoops = int(self.run_time / self.loop_delay)
+        self.transition_steps = int(self.transition_time / self.loop_delay)
+        self.scheduler = LoopScheduler(1.0 / self.loop_delay)
+        self.dashboard = Dashboard(self.display_rate)
+
+    # -----
+    # run_once
+    # -----
+    def run_once(self, device):
+        """
+        Runs the demo on an already open device, without prompting or
+        plotting.
+
+        Returns
+        -------
+        dict
+            The run's summary, see `summary`.
+        """
+        self._reset_plot()
+        self._impedance_control(device)
+        device.motor(fxe.FX_VOLTAGE, 0)
+        return self.summary()
+
+    # -----
+    # summary
+    # -----
+    def summary(self):
+        """
+        Summarizes the last run: the achieved loop frequency, the loop's
+        lateness percentiles (in us) and how far (in ticks) the motor was
+        from the position it was sent to.
+        """
+        stats = self.scheduler.stats()
+        errors = self.plot_data["measurements"] - self.plot_data["requests"]
+        return {
+            "achieved_freq": stats["achieved_freq"],
+            "lateness_p50_us": stats["lateness_p50_us"],
+            "lateness_p99_us": stats["lateness_p99_us"],
+            **percentiles(np.abs(errors), "error"),
+        }
 
     # -----
     # _impedance_control
@@ -91,58 +178,126 @@ class ImpedanceControlCommand(Command):
         positions = [initial_angle, initial_angle + self.delta]
         sleep(0.4)
         self.start_time = time()
-        print("")
+        title = f"Device {device.dev_id}"
+
+        self.scheduler.start()
+        with self.dashboard:
+            for i in range(self.nLoops):
+                data = device.read()
+                measured_pos = data.mot_ang
+
+                if i % self.transition_steps == 0:
+                    self.gains["B"] += self.b_increments
+                    device.set_gains(self.gains)
+                    self.delta = abs(positions[current_pos] - measured_pos)
+                    current_pos = (current_pos + 1) % 2
+                    device.motor(fxe.FX_IMPEDANCE, positions[current_pos])
+                self.scheduler.wait()
+
+                self.dashboard.publish(
+                    title,
+                    data,
+                    (
+                        ("Holding position", positions[current_pos]),
+                        ("K", self.gains["K"]),
+                        ("B", self.gains["B"]),
+                    ),
+                )
+                self.dashboard.set_progress(i, self.nLoops)
+                self.plot_data.append(
+                    time() - self.start_time, positions[current_pos], measured_pos
+                )
+        self.scheduler.stop()
+        self.scheduler.print_stats()
+        device.print_stats()
+
+    # -----
+    # replay
+    # -----
+    def replay(self, recording):
+        """
+        Draws the plot of every device of a run recorded with
+        `record_file`, as if it had just finished.
 
-        for i in range(self.nLoops):
-            data = device.read()
-            measured_pos = data.mot_ang
+        Parameters
+        ----------
+        recording : flexsea_demos.recording.Recording
+            The recorded run. The demo's parameters must already be set.
+        """
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        for name in recording.streams:
+            # Read one chunk at a time by the plot
+            self.plot_data = recording.stream(name)
+            self._plot(int(name.split("/")[0]))
+        if self.exporter:
+            self.exporter.join()
 
-            if i % self.transition_steps == 0:
-                self.gains["B"] += self.b_increments
-                device.set_gains(self.gains)
-                self.delta = abs(positions[current_pos] - measured_pos)
-                current_pos = (current_pos + 1) % 2
-                device.motor(fxe.FX_IMPEDANCE, positions[current_pos])
-            sleep(0.02)
+    # -----
+    # rerun
+    # -----
+    def rerun(self, recording):
+        """
+        Runs the demo again, unpaced, on the measurements of a run
+        recorded with `record_file`: on every tick, the device reads
+        back the position it measured on that tick. Each recorded
+        device is run in turn, on its port, and the plots are those of
+        the new runs. Nothing is recorded.
 
-            if i % 10 == 0:
-                fxu.clear_terminal()
-                print(f"Loop {i} of {self.nLoops}")
-                print(f"Holding position: {positions[current_pos]}")
-                print(self.gains)
-                device.print(data)
+        Parameters
+        ----------
+        recording : flexsea_demos.recording.Recording
+            The recorded run. The demo's parameters must already be set.
+        """
+        # Only loaded when it's used, like the other backends
+        # pylint: disable=import-outside-toplevel
+        from flexsea_demos.replay_backend import recorded_rows
+        from flexsea_demos.replay_backend import ReplayFlexSEA
 
-            self.plot_data["measurements"].append(measured_pos)
-            self.plot_data["times"].append(time() - self.start_time)
-            self.plot_data["requests"].append(positions[current_pos])
+        self._prepare()
+        # Every tick reads a new frame
+        self.device_options = {**self.device_options, "read_freshness": 0}
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        for port, name in zip(self.ports, recording.streams):
+            rows = recorded_rows(recording, name, {"mot_ang": "measurements"})
+            self.fxs = ReplayFlexSEA([(int(name.split("/")[0]), rows, None)])
+            self.scheduler = UnpacedScheduler(
+                1.0 / self.loop_delay, on_wait=self.fxs.tick
+            )
+            self._plot(self._run_port(port))
+        if self.exporter:
+            self.exporter.join()
 
     # -----
     # _plot
     # -----
-    def _plot(self):
-        title = "Impedance Control Demo"
-        plt.plot(
-            self.plot_data["times"],
-            self.plot_data["requests"],
-            color="b",
-            label="Desired position",
+    def _plot(self, dev_id):
+        """
+        Plots the device's requests and measurements, decimated to
+        `plot_points` points one chunk at a time.
+        """
+        times, requests, measurements = downsample_chunks(
+            (
+                (chunk["times"], chunk["requests"], chunk["measurements"])
+                for chunk in self.plot_data.chunks()
+            ),
+            len(self.plot_data),
+            max_points=self.plot_points,
         )
-        plt.plot(
-            self.plot_data["times"],
-            self.plot_data["measurements"],
-            color="r",
-            label="Measured position",
+        plot(
+            plot_positions,
+            f"impedance_control_{dev_id}",
+            self.exporter,
+            title="Impedance Control Demo",
+            times=times,
+            requests=requests,
+            measurements=measurements,
         )
-        plt.xlabel("Time (s)")
-        plt.ylabel("Encoder position")
-        plt.title(title)
-        plt.legend(loc="upper right")
-        fxu.print_plot_exit()
-        plt.show()
 
     # -----
     # _reset_plot
     # -----
     def _reset_plot(self):
-        self.plot_data = {"times": [], "requests": [], "measurements": []}
-        plt.clf()
+        self.plot_data = TelemetryRecorder(
+            {"times": np.float64, "requests": np.int64, "measurements": np.int64},
+            self.nLoops,
+        )
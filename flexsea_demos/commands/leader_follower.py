@@ -1,11 +1,15 @@
+from time import perf_counter_ns
 from time import sleep
 from typing import List
 
 from cleo import Command
+import numpy as np
 from flexsea import fxEnums as fxe
-from flexsea import fxUtils as fxu
 
-from flexsea_demos.device import Device
+from flexsea_demos.dashboard import Dashboard
+from flexsea_demos.device import open_devices
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.telemetry import TelemetryRecorder
 from flexsea_demos.utils import setup
 
 
@@ -23,6 +27,9 @@ class LeaderFollowerCommand(Command):
     # Schema of parameters required by the demo
     required = {"ports": List, "baud_rate": int, "run_time": int}
 
+    # Paces the control loop
+    scheduler_class = LoopScheduler
+
     # -----
     # constructor
     # -----
@@ -30,11 +37,20 @@ class LeaderFollowerCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.run_time = 0
+        self.cmd_freq = None
+        self.spin_time = 0.0
         self.nLoops = 0
         self.devices = []
         self.loop_delay = 0.05
+        self.scheduler = None
+        self.display_rate = 10.0
+        self.dashboard = None
         self.fxs = None
+        self.sample_every = 1
+        self.latencies = None
+        self.errors = None
         self.leader_gains = {"KP": 40, "KI": 400, "KD": 0, "K": 0, "B": 0, "FF": 128}
         self.follower_gains = {"KP": 100, "KI": 1, "KD": 0, "K": 0, "B": 0, "FF": 0}
         self.off_gains = {"KP": 0, "KI": 0, "KD": 0, "K": 0, "B": 0, "FF": 0}
@@ -44,58 +60,159 @@ class LeaderFollowerCommand(Command):
     # -----
     def handle(self):
         """
-        Runs the read_only demo.
+        Runs the leader follower demo.
         """
         setup(self, self.required, self.argument("paramFile"))
-        self.nLoops = int(self.run_time / self.loop_delay)
+        self.dashboard = Dashboard(self.display_rate)
 
         try:
-            assert len(self.ports) == 2
+            assert len(self.ports) >= 2
         except AssertionError:
-            raise AssertionError(f"Need two devices. Got: '{len(self.ports)}'")
-
-        for i in range(2):
-            self.devices.append(Device(self.fxs, self.ports[i], self.baud_rate))
+            raise AssertionError(
+                f"Need a leader and at least one follower. Got: '{len(self.ports)}'"
+            )
+
+        if self.cmd_freq:
+            # Stream at least as fast as we send commands
+            self.device_options = {
+                "stream_freq": self.cmd_freq,
+                "read_freshness": 0.5 / self.cmd_freq,
+                **self.device_options,
+            }
+        self.devices = open_devices(
+            self.fxs, self.ports, self.baud_rate, **self.device_options
+        )
 
         # Set first device to current controller with 0 current (0 torque)
         self.devices[0].set_gains(self.leader_gains)
         self.devices[0].motor(fxe.FX_CURRENT, 0)
 
-        # Set position controller for second device
-        self.devices[1].set_gains(self.follower_gains)
-        self.devices[1].motor(fxe.FX_POSITION, self.devices[1].initial_pos)
+        # Set position controller for the other devices
+        for follower in self.devices[1:]:
+            follower.set_gains(self.follower_gains)
+            follower.motor(fxe.FX_POSITION, follower.initial_pos)
 
+        self._prepare()
         self._leader_follower()
+        self._print_stats()
 
         print("Turning off position control...")
-        for i in range(2):
-            self.devices[i].set_gains(self.off_gains)
-            self.devices[i].motor(fxe.FX_NONE, 0)
+        for device in self.devices:
+            device.set_gains(self.off_gains)
+            device.motor(fxe.FX_NONE, 0)
             sleep(0.5)
-            self.devices[i].close()
+            device.close()
+
+    # -----
+    # _prepare
+    # -----
+    def _prepare(self):
+        """
+        Runs the loop at `cmd_freq` or, if it isn't set, at the rate the
+        leader streams at, and allocates the recorders.
+        """
+        freq = self.cmd_freq if self.cmd_freq else self.devices[0].stream_freq
+        self.loop_delay = 1.0 / freq
+        self.nLoops = int(self.run_time * freq)
+        self.scheduler = self.scheduler_class(freq, self.spin_time)
+        # The followers are only read (and the display only updated)
+        # this often
+        self.sample_every = max(1, round(freq / self.display_rate))
+
+        n_followers = len(self.devices) - 1
+        self.latencies = TelemetryRecorder(
+            {f"latency_{i}": np.int64 for i in range(n_followers)}, self.nLoops
+        )
+        self.errors = TelemetryRecorder(
+            {f"error_{i}": np.int64 for i in range(n_followers)},
+            self.nLoops // self.sample_every + 1,
+        )
 
     # -----
     # _leader_follower
     # -----
     def _leader_follower(self):
-        leader_pos0 = self.devices[0].initial_pos
-        follower_pos0 = self.devices[1].initial_pos
-
-        leader_id = self.devices[0].dev_id
-        follower_id = self.devices[1].dev_id
-
-        for i in range(self.nLoops):
-            sleep(self.loop_delay)
-            fxu.clear_terminal()
-
-            leader_data = self.devices[0].read()
+        """
+        Each tick only reads the leader and sends its displacement to
+        every follower. The followers are read at the display rate, to
+        show them and measure how closely they track the leader.
+        """
+        leader, followers = self.devices[0], self.devices[1:]
+        leader_pos0 = leader.initial_pos
+        follower_pos0 = [follower.initial_pos for follower in followers]
+        sent = [0] * len(followers)
+
+        self.scheduler.start()
+        with self.dashboard:
+            for i in range(self.nLoops):
+                self.scheduler.wait()
+
+                read_start = perf_counter_ns()
+                leader_data = leader.read()
+                diff = leader_data.mot_ang - leader_pos0
+
+                for j, follower in enumerate(followers):
+                    follower.motor(fxe.FX_POSITION, follower_pos0[j] + diff)
+                    sent[j] = perf_counter_ns() - read_start
+                self.latencies.append(*sent)
+
+                if i % self.sample_every == 0:
+                    follower_data = [follower.read() for follower in followers]
+                    self._record_sample(i, leader_data, diff, follower_data)
+        self.scheduler.stop()
 
-            diff = leader_data.mot_ang - leader_pos0
+    # -----
+    # _record_sample
+    # -----
+    def _record_sample(self, i, leader_data, diff, follower_data):
+        """
+        Records how far each follower is from where the leader's
+        displacement `diff` puts it, and updates the display.
+        """
+        errors = [
+            data.mot_ang - follower.initial_pos - diff
+            for follower, data in zip(self.devices[1:], follower_data)
+        ]
+        self.errors.append(*errors)
 
-            self.devices[1].motor(fxe.FX_POSITION, follower_pos0 + diff)
+        leader_id = self.devices[0].dev_id
+        self.dashboard.publish(f"Device {leader_id}", leader_data)
+        for follower, data, error in zip(self.devices[1:], follower_data, errors):
+            self.dashboard.publish(
+                f"Device {follower.dev_id} following device {leader_id}",
+                data,
+                (("Tracking error", error),),
+            )
+        self.dashboard.set_progress(i, self.nLoops)
 
-            print(f"Device {follower_id} following device {leader_id}\n")
-            self.devices[1].print()
-            print("")
-            self.devices[0].print()
-            fxu.print_loop_count(i, self.nLoops)
+    # -----
+    # _print_stats
+    # -----
+    def _print_stats(self):
+        """
+        Prints the loop timing, then each follower's latency (from
+        reading the leader to its command being sent) and tracking error
+        percentiles, and the devices' counters.
+        """
+        self.scheduler.print_stats()
+        for i, follower in enumerate(self.devices[1:]):
+            latencies = self.latencies[f"latency_{i}"] / 1e3
+            errors = np.abs(self.errors[f"error_{i}"])
+            print(f"Device {follower.dev_id}:")
+            print(
+                "\tFollow latency (us): "
+                f"p50 {np.percentile(latencies, 50):.1f}, "
+                f"p90 {np.percentile(latencies, 90):.1f}, "
+                f"p99 {np.percentile(latencies, 99):.1f}, "
+                f"max {np.max(latencies):.1f}"
+            )
+            print(
+                f"\tTracking error (ticks, {len(errors)} samples): "
+                f"p50 {np.percentile(errors, 50):.0f}, "
+                f"p90 {np.percentile(errors, 90):.0f}, "
+                f"p99 {np.percentile(errors, 99):.0f}, "
+                f"max {np.max(errors):.0f}"
+            )
+        print()
+        for device in self.devices:
+            device.print_stats()
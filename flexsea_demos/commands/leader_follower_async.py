@@ -0,0 +1,74 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter_ns
+
+from flexsea import fxEnums as fxe
+
+from flexsea_demos.async_device import AsyncDevice
+from flexsea_demos.commands.leader_follower import LeaderFollowerCommand
+from flexsea_demos.scheduler import AsyncLoopScheduler
+
+
+# ============================================
+#        LeaderFollowerAsyncCommand
+# ============================================
+class LeaderFollowerAsyncCommand(LeaderFollowerCommand):
+    """
+    Runs the leader follower demo on an asyncio event loop.
+
+    leader_follower_async
+        {paramFile : Yaml file with demo parameters.}
+    """
+
+    # Paces the control loop
+    scheduler_class = AsyncLoopScheduler
+
+    # -----
+    # _leader_follower
+    # -----
+    def _leader_follower(self):
+        asyncio.run(self._leader_follower_async())
+
+    # -----
+    # _leader_follower_async
+    # -----
+    async def _leader_follower_async(self):
+        """
+        Same ticks as the synchronous demo, but the leader's
+        displacement is sent to every follower at the same time, and
+        the followers are read at the same time when sampled.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(self.devices))
+        leader, *followers = (AsyncDevice(device, executor) for device in self.devices)
+        leader_pos0 = leader.initial_pos
+
+        async def follow(follower, pos, read_start):
+            await follower.motor(fxe.FX_POSITION, pos)
+            return perf_counter_ns() - read_start
+
+        self.scheduler.start()
+        try:
+            with self.dashboard:
+                for i in range(self.nLoops):
+                    await self.scheduler.wait()
+
+                    read_start = perf_counter_ns()
+                    leader_data = await leader.read()
+                    diff = leader_data.mot_ang - leader_pos0
+
+                    sent = await asyncio.gather(
+                        *(
+                            follow(follower, follower.initial_pos + diff, read_start)
+                            for follower in followers
+                        )
+                    )
+                    self.latencies.append(*sent)
+
+                    if i % self.sample_every == 0:
+                        follower_data = await asyncio.gather(
+                            *(follower.read() for follower in followers)
+                        )
+                        self._record_sample(i, leader_data, diff, follower_data)
+        finally:
+            self.scheduler.stop()
+            executor.shutdown()
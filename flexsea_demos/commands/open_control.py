@@ -3,9 +3,13 @@ from typing import List
 
 from cleo import Command
 from flexsea import fxEnums as fxe
-from flexsea import fxUtils as fxu
+import numpy as np
 
+from flexsea_demos.dashboard import Dashboard
 from flexsea_demos.device import Device
+from flexsea_demos.parallel import run_ports
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.trajectory import Trajectory
 from flexsea_demos.utils import setup
 
 
@@ -18,6 +22,7 @@ class OpenControlCommand(Command):
 
     open_control
         {paramFile : Yaml file with demo parameters.}
+        {--parallel : Run every port at once, each on its own thread.}
     """
 
     # Schema of parameters required by the demo
@@ -36,11 +41,18 @@ class OpenControlCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.run_time = 0
         self.n_cycles = 0
         self.max_voltage = 0
         self.fxs = None
         self.voltages = []
+        self.trajectory = None
+        self.trajectory_file = None
+        self.loop_delay = 0.1
+        self.scheduler = None
+        self.display_rate = 10.0
+        self.dashboard = None
 
     # -----
     # handle
@@ -50,11 +62,18 @@ class OpenControlCommand(Command):
         Runs the open_control demo.
         """
         setup(self, self.required, self.argument("paramFile"))
+        self.scheduler = LoopScheduler(1.0 / self.loop_delay)
+        self.dashboard = Dashboard(self.display_rate)
         self._get_voltages()
-        for port in self.ports:
-            input("Press 'ENTER' to continue...")
-            device = Device(self.fxs, port, self.baud_rate)
-            self._open_control(device)
+        self._compile_trajectory()
+        run_ports(self, "_run_port")
+
+    # -----
+    # _run_port
+    # -----
+    def _run_port(self, port):
+        device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+        self._open_control(device)
 
     # -----
     # _get_voltages
@@ -64,9 +83,31 @@ class OpenControlCommand(Command):
         Generates the list of voltages to step through.
         """
         cycle_time = self.run_time / float(self.n_cycles)
-        step_count = int((cycle_time / 2) / 0.1)
-        for s in range(step_count):
-            self.voltages.append(-1 * self.max_voltage * (s * 1.0 / step_count))
+        step_count = int((cycle_time / 2) / self.loop_delay)
+        self.voltages = -1 * self.max_voltage * (np.arange(step_count) / step_count)
+
+    # -----
+    # _compile_trajectory
+    # -----
+    def _compile_trajectory(self):
+        """
+        Lays out every cycle's ramp up and ramp down in one table.
+        """
+        self.trajectory = Trajectory(1, {"voltage": np.float64})
+        for _ in range(self.n_cycles):
+            self.trajectory.add(
+                "up", fxe.FX_VOLTAGE, len(self.voltages), voltage=self.voltages[:, None]
+            )
+            self.trajectory.add(
+                "down",
+                fxe.FX_VOLTAGE,
+                len(self.voltages),
+                voltage=self.voltages[::-1, None],
+            )
+        self.trajectory.compile()
+        if self.trajectory_file:
+            self.trajectory.dump(self.trajectory_file)
+            print(f"Compiled trajectory written to '{self.trajectory_file}'")
 
     # -----
     # _open_control
@@ -76,15 +117,15 @@ class OpenControlCommand(Command):
         device.motor(fxe.FX_VOLTAGE, 0)
         sleep(0.5)
 
-        for rep in range(self.n_cycles):
-            # Ramp-up
-            print(f"Ramping up motor voltage {rep}...\n")
-            for voltage in self.voltages:
-                self._ramp_device(device, voltage)
-            # Ramp-down
-            print(f"Ramping down motor voltage {rep}...\n")
-            for voltage in self.voltages[-1::-1]:
-                self._ramp_device(device, voltage)
+        self.scheduler.start()
+        with self.dashboard:
+            for i, segment in enumerate(self.trajectory.segments):
+                self.dashboard.set_progress(i // 2, self.n_cycles)
+                for voltage in self.trajectory.view("voltage", segment)[:, 0]:
+                    self._ramp_device(device, voltage, segment.name)
+        self.scheduler.stop()
+        self.scheduler.print_stats()
+        device.print_stats()
 
         device.motor(fxe.FX_NONE, 0)
         sleep(0.1)
@@ -93,7 +134,7 @@ class OpenControlCommand(Command):
     # -----
     # _ramp_device
     # -----
-    def _ramp_device(self, device, voltage):
+    def _ramp_device(self, device, voltage, direction):
         """
         Boilerplate for stepping through voltages.
 
@@ -104,8 +145,14 @@ class OpenControlCommand(Command):
 
         voltage : float
             The voltage to set.
+
+        direction : str
+            Whether the voltage is being ramped "up" or "down".
         """
-        sleep(0.1)
+        self.scheduler.wait()
         device.motor(fxe.FX_VOLTAGE, voltage)
-        fxu.clear_terminal()
-        device.print()
+        self.dashboard.publish(
+            f"Device {device.dev_id}",
+            device.read(),
+            (("Ramping", direction), ("Voltage (mV)", voltage)),
+        )
@@ -4,9 +4,14 @@ from typing import List
 
 from cleo import Command
 from flexsea import fxEnums as fxe
-from flexsea import fxUtils as fxu
+import numpy as np
 
+from flexsea_demos.dashboard import Dashboard
 from flexsea_demos.device import Device
+from flexsea_demos.parallel import run_ports
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.telemetry import percentiles
+from flexsea_demos.telemetry import TelemetryRecorder
 from flexsea_demos.utils import setup
 
 
@@ -19,6 +24,7 @@ class PositionControlCommand(Command):
 
     position_control
         {paramFile : Yaml file with demo parameters.}
+        {--parallel : Run every port at once, each on its own thread.}
     """
 
     # Schema of parameters required by the demo
@@ -31,10 +37,16 @@ class PositionControlCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.run_time = 0
         self.gains = {}
         self.nLoops = 0
+        self.loop_delay = 0.1
+        self.scheduler = None
+        self.display_rate = 10.0
+        self.dashboard = None
         self.fxs = None
+        self.errors = None
 
     # -----
     # handle
@@ -44,11 +56,59 @@ class PositionControlCommand(Command):
         Position control demo.
         """
         setup(self, self.required, self.argument("paramFile"))
-        self.nLoops = int(self.run_time / 0.1)
-        for port in self.ports:
-            input("Press 'ENTER' to continue...")
-            device = Device(self.fxs, port, self.baud_rate)
-            self._position_control(device)
+        self._prepare()
+        run_ports(self, "_run_port")
+
+    # -----
+    # _run_port
+    # -----
+    def _run_port(self, port):
+        device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+        self.run_once(device)
+        device.close()
+
+    # -----
+    # _prepare
+    # -----
+    def _prepare(self):
+        self.nLoops = int(self.run_time / self.loop_delay)
+        self.scheduler = LoopScheduler(1.0 / self.loop_delay)
+        self.dashboard = Dashboard(self.display_rate)
+
+    # -----
+    # run_once
+    # -----
+    def run_once(self, device):
+        """
+        Runs the demo on an already open device, without prompting.
+
+        Returns
+        -------
+        dict
+            The run's summary, see `summary`.
+        """
+        self._reset_errors()
+        self._position_control(device)
+        device.motor(fxe.FX_NONE, 0)
+        sleep(0.5)
+        return self.summary()
+
+    # -----
+    # summary
+    # -----
+    def summary(self):
+        """
+        Summarizes the last run: the achieved loop frequency, the loop's
+        lateness percentiles (in us) and how far (in ticks) the motor was
+        from the position it held.
+        """
+        stats = self.scheduler.stats()
+        return {
+            "achieved_freq": stats["achieved_freq"],
+            "lateness_p50_us": stats["lateness_p50_us"],
+            "lateness_p99_us": stats["lateness_p99_us"],
+            **percentiles(np.abs(self.errors["error"]), "error"),
+        }
 
     # -----
     # _position_control
@@ -59,21 +119,30 @@ class PositionControlCommand(Command):
         initial_angle = data.mot_ang
         device.set_gains(self.gains)
         device.motor(fxe.FX_POSITION, initial_angle)
-        for i in range(self.nLoops):
-            sleep(0.1)
-            fxu.clear_terminal()
-            data = device.read()
-            current_angle = data.mot_ang
-            print("Desired:              ", initial_angle)
-            print("Measured:             ", current_angle)
-            print(
-                "Difference:           ",
-                current_angle - initial_angle,
-                "\n",
-                flush=True,
-            )
-            device.print(data)
-            fxu.print_loop_count(i, self.nLoops)
-        device.motor(fxe.FX_NONE, 0)
-        sleep(0.5)
-        device.close()
+        title = f"Device {device.dev_id}"
+        self.scheduler.start()
+        with self.dashboard:
+            for i in range(self.nLoops):
+                self.scheduler.wait()
+                data = device.read()
+                current_angle = data.mot_ang
+                self.errors.append(current_angle - initial_angle)
+                self.dashboard.publish(
+                    title,
+                    data,
+                    (
+                        ("Desired", initial_angle),
+                        ("Measured", current_angle),
+                        ("Difference", current_angle - initial_angle),
+                    ),
+                )
+                self.dashboard.set_progress(i, self.nLoops)
+        self.scheduler.stop()
+        self.scheduler.print_stats()
+        device.print_stats()
+
+    # -----
+    # _reset_errors
+    # -----
+    def _reset_errors(self):
+        self.errors = TelemetryRecorder({"error": np.int64}, self.nLoops)
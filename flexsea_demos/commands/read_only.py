@@ -1,10 +1,17 @@
-from time import sleep
+from operator import attrgetter
+from time import perf_counter_ns
 from typing import List
 
 from cleo import Command
-from flexsea import fxUtils as fxu
+import numpy as np
 
+from flexsea_demos.dashboard import Dashboard
 from flexsea_demos.device import Device
+from flexsea_demos.parallel import run_ports
+from flexsea_demos.recording import RecordingWriter
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.telemetry import TelemetryRecorder
+from flexsea_demos.utils import read_yaml
 from flexsea_demos.utils import setup
 
 
@@ -17,6 +24,7 @@ class ReadOnlyCommand(Command):
 
     read_only
         {paramFile : Yaml file with demo parameters.}
+        {--parallel : Run every port at once, each on its own thread.}
     """
 
     # Schema of parameters required by the demo
@@ -29,9 +37,21 @@ class ReadOnlyCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.run_time = 0
         self.nLoops = 0
+        self.loop_delay = 0.1
+        self.scheduler = None
+        self.display_rate = 10.0
+        self.dashboard = None
         self.fxs = None
+        self.poll_freq = None
+        self.spin_time = 0.0
+        self.record_file = None
+        self.record_compression = None
+        self.recording = None
+        self.frames = None
+        self.captures = {}
 
     # -----
     # handle
@@ -41,11 +61,37 @@ class ReadOnlyCommand(Command):
         Runs the read_only demo.
         """
         setup(self, self.required, self.argument("paramFile"))
-        self.nLoops = int(self.run_time / 0.1)
-        for port in self.ports:
-            input("Press 'ENTER' to continue...")
-            device = Device(self.fxs, port, self.baud_rate)
+        self.nLoops = int(self.run_time / self.loop_delay)
+        self.scheduler = LoopScheduler(1.0 / self.loop_delay)
+        self.dashboard = Dashboard(self.display_rate)
+        self.recording = RecordingWriter.from_params(
+            self.record_file,
+            self.record_compression,
+            meta={
+                "command": self.config.name,
+                "params": read_yaml(self.argument("paramFile")),
+            },
+        )
+        if not self.recording:
+            run_ports(self, "_run_port")
+            return
+
+        run_ports(self, "_run_port", "_save_capture")
+        self.recording.close()
+        self.recording.print_stats()
+
+    # -----
+    # _run_port
+    # -----
+    def _run_port(self, port):
+        device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+        if not self.recording:
             self._read_only(device)
+            return None
+        capture = self._capture(device)
+        device.print_stats()
+        device.close()
+        return device.dev_id, capture
 
     # -----
     # _read_only
@@ -59,9 +105,176 @@ class ReadOnlyCommand(Command):
         device : flexsea_demos.device.Device
             Object that manages the device information and state.
         """
-        for i in range(self.nLoops):
-            fxu.print_loop_count(i, self.nLoops)
-            sleep(0.1)
-            fxu.clear_terminal()
-            device.print()
+        title = f"Device {device.dev_id}"
+        self.scheduler.start()
+        with self.dashboard:
+            for i in range(self.nLoops):
+                self.dashboard.set_progress(i, self.nLoops)
+                self.scheduler.wait()
+                self.dashboard.publish(title, device.read())
+        self.scheduler.stop()
+        self.scheduler.print_stats()
+        device.print_stats()
         device.close()
+
+    # -----
+    # _capture
+    # -----
+    def _capture(self, device):
+        """
+        Records every frame the device streams, with all of its fields,
+        to the recording. The device is polled at `poll_freq` (twice its
+        stream rate by default), and a read that returns the same frame
+        as the previous one is dropped. Only a summary is shown, at the
+        display rate.
+
+        Raises
+        ------
+        ValueError
+            If `poll_freq` is below the device's stream rate.
+
+        Returns
+        -------
+        dict
+            What's needed to summarize the capture besides its frames,
+            see `_summarize`.
+        """
+        poll_freq = self.poll_freq if self.poll_freq else 2 * device.stream_freq
+        if poll_freq < device.stream_freq:
+            raise ValueError(
+                f"poll_freq ({poll_freq} Hz) is below the stream rate "
+                f"({device.stream_freq} Hz)"
+            )
+        n_polls = int(self.run_time * poll_freq)
+        self.scheduler = LoopScheduler(poll_freq, self.spin_time)
+        sample_every = max(1, round(poll_freq / self.display_rate))
+
+        data = device.read(max_age=0)
+        frame = np.dtype(type(data))
+        self.frames = TelemetryRecorder(
+            {"time": np.int64, **{name: frame[name] for name in frame.names}},
+            self.run_time * device.stream_freq + 1,
+        )
+        self.recording.add(self.frames, f"{device.dev_id}/frames")
+        get_fields = attrgetter(*frame.names)
+        title = f"Device {device.dev_id}"
+        last_time = None
+        duplicates = 0
+
+        start = perf_counter_ns()
+        self.scheduler.start()
+        with self.dashboard:
+            for i in range(n_polls):
+                self.scheduler.wait()
+                data = device.read(max_age=0)
+                if data.state_time == last_time:
+                    duplicates += 1
+                else:
+                    last_time = data.state_time
+                    self.frames.append(perf_counter_ns() - start, *get_fields(data))
+                if i % sample_every == 0:
+                    self.dashboard.publish(
+                        title,
+                        data,
+                        (
+                            ("Frames captured", len(self.frames)),
+                            ("Duplicates dropped", duplicates),
+                        ),
+                    )
+                    self.dashboard.set_progress(i, n_polls)
+        self.scheduler.stop()
+
+        capture = {
+            "stream_freq": device.stream_freq,
+            # The simulator's frames are timed in us, the firmware's in ms
+            "state_time_unit": getattr(self.fxs, "state_time_unit", 1e-3),
+            "elapsed_time": (perf_counter_ns() - start) / 1e9,
+            "duplicates": duplicates,
+        }
+        self.scheduler.print_stats()
+        self._print_capture(device.dev_id, self._summarize(self.frames, capture))
+        return capture
+
+    # -----
+    # _save_capture
+    # -----
+    def _save_capture(self, run):
+        """
+        Adds the capture returned by `_run_port` to the recording's
+        metadata.
+        """
+        dev_id, capture = run
+        self.captures[dev_id] = capture
+        # Replaces the previous devices' captures with all of them
+        self.recording.set_meta(captures=self.captures)
+
+    # -----
+    # replay
+    # -----
+    def replay(self, recording):
+        """
+        Prints the summary of every device of a capture recorded with
+        `record_file`.
+
+        Parameters
+        ----------
+        recording : flexsea_demos.recording.Recording
+            The recorded run. The demo's parameters must already be set.
+        """
+        # JSON turned the device ids into strings
+        for dev_id, capture in recording.meta["captures"].items():
+            frames = recording.stream(f"{dev_id}/frames")
+            self._print_capture(dev_id, self._summarize(frames, capture))
+
+    # -----
+    # _summarize
+    # -----
+    @staticmethod
+    def _summarize(frames, capture):
+        """
+        Compares the frames captured with the number the device should
+        have streamed in that time. Frames that never made it are also
+        counted from the gaps in the device's `state_time`, which is in
+        units of `state_time_unit` seconds (ms if it isn't given). The
+        frames are gone through one chunk at a time.
+
+        Returns
+        -------
+        dict
+            Frames captured and expected, duplicate reads dropped, and
+            frames missing from the gaps.
+        """
+        period = 1.0 / capture.get("state_time_unit", 1e-3) / capture["stream_freq"]
+        missed = 0
+        last = None
+        for chunk in frames.chunks():
+            times = chunk["state_time"].astype(np.float64)
+            if last is not None:
+                # The gap between the last frame of the previous chunk
+                # and the first of this one
+                times = np.concatenate(([last], times))
+            if len(times):
+                last = times[-1]
+            gaps = np.diff(times)
+            gaps = gaps[gaps > 1.5 * period]
+            missed += int(np.sum(np.round(gaps / period) - 1))
+        return {
+            "captured": len(frames),
+            "expected": int(round(capture["elapsed_time"] * capture["stream_freq"])),
+            "duplicates": capture["duplicates"],
+            "missed": missed,
+        }
+
+    # -----
+    # _print_capture
+    # -----
+    @staticmethod
+    def _print_capture(dev_id, summary):
+        expected = max(summary["expected"], 1)
+        print(f"\nDevice {dev_id} capture:")
+        print(
+            f"\tFrames captured: {summary['captured']} of {summary['expected']} "
+            f"expected ({100 * summary['captured'] / expected:.1f}%)"
+        )
+        print(f"\tDuplicate reads dropped: {summary['duplicates']}")
+        print(f"\tFrames missing (state_time gaps): {summary['missed']}")
@@ -0,0 +1,78 @@
+from importlib import import_module
+from time import perf_counter
+
+from cleo import Command
+
+from flexsea_demos.app import COMMANDS
+from flexsea_demos.recording import Recording
+from flexsea_demos.utils import assign_params
+
+
+# ============================================
+#               ReplayCommand
+# ============================================
+class ReplayCommand(Command):
+    """
+    Replays the stats and plots of a recorded run.
+
+    replay
+        {recording : File written by a demo with record_file set.}
+        {--plot-dir= : Render the plots to files in this directory.}
+        {--plot-format=png : Format of the rendered plots, png or svg.}
+        {--rerun : Feed the recorded measurements back through the demo's control loop, unpaced.}
+    """
+
+    # -----
+    # handle
+    # -----
+    def handle(self):
+        """
+        Loads the demo that made the recording with the parameters it
+        was run with, and has it redo its post-processing (stats and
+        plots) from the recorded data. No device is opened. By default,
+        the demo's control loop isn't run again: the recorded requests
+        and measurements are analyzed as they are, one chunk at a time.
+        With `--rerun`, the demo's loop is run again, unpaced, on the
+        recorded measurements (see `flexsea_demos.replay_backend`).
+        """
+        start = perf_counter()
+        rerun = self.option("rerun")
+        with Recording(self.argument("recording")) as recording:
+            name = recording.meta.get("command")
+            demo = self._get_demo(name, "rerun" if rerun else "replay")
+
+            assign_params(demo, recording.meta["params"])
+            if self.option("plot-dir"):
+                demo.plot_dir = self.option("plot-dir")
+                demo.plot_format = self.option("plot-format")
+
+            n_rows = sum(recording.n_rows(stream) for stream in recording.streams)
+            print(f"Replaying {name}: {n_rows} rows in {len(recording)} streams")
+            if rerun:
+                demo.rerun(recording)
+            else:
+                demo.replay(recording)
+        print(f"Replayed in {perf_counter() - start:.3f} s")
+
+    # -----
+    # _get_demo
+    # -----
+    def _get_demo(self, name, method="replay"):
+        """
+        Returns an instance of the demo command `name`, which must have
+        `method`, `replay` or `rerun`.
+
+        Raises
+        ------
+        ValueError
+            If there's no such demo or it can't replay (or rerun) its
+            recordings.
+        """
+        for command, module, class_name, _ in COMMANDS:
+            if command == name:
+                module = import_module(f"flexsea_demos.commands.{module}")
+                demo = getattr(module, class_name)()
+                if getattr(demo, method, None):
+                    return demo
+        action = "rerun" if method == "rerun" else "replayed"
+        raise ValueError(f"Recordings of '{name}' can't be {action}")
@@ -0,0 +1,277 @@
+from copy import deepcopy
+from importlib import import_module
+from itertools import product
+import os
+
+from cleo import Command
+
+from flexsea_demos.app import COMMANDS
+from flexsea_demos.device import open_devices
+from flexsea_demos.utils import assign_params
+from flexsea_demos.utils import get_backend
+from flexsea_demos.utils import print_table
+from flexsea_demos.utils import read_yaml
+from flexsea_demos.utils import TABLE_FORMATS
+from flexsea_demos.utils import validate
+from flexsea_demos.utils import write_table
+
+# Parameters that are only used to open the devices, which is done once
+# for the whole sweep
+FIXED_PARAMS = ("ports", "baud_rate", "device_options", "backend", "sim")
+
+
+# ============================================
+#               SweepCommand
+# ============================================
+class SweepCommand(Command):
+    """
+    Runs a demo once for every combination of parameters.
+
+    sweep
+        {paramFile : Yaml file with sweep parameters.}
+    """
+
+    # Schema of parameters required by the sweep
+    required = {"demo": str, "base": str}
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self):
+        super().__init__()
+        self.demo = ""
+        self.base = ""
+        self.grid = {}
+        self.runs = []
+        self.summary_file = "sweep_summary.csv"
+        self.fxs = None
+        self.devices = []
+
+    # -----
+    # handle
+    # -----
+    def handle(self):
+        """
+        Opens the devices of the base parameter file once, then runs the
+        demo on each of them for every set of overrides, back to back,
+        and writes a summary of each run.
+        """
+        param_file = self.argument("paramFile")
+        assign_params(self, validate(self.required, read_yaml(param_file)))
+        if not self.summary_file.endswith(TABLE_FORMATS):
+            raise ValueError(
+                f"summary_file must be .json or .csv: '{self.summary_file}'"
+            )
+        demo_class = self._get_demo_class()
+        base = read_yaml(os.path.join(os.path.dirname(param_file), self.base))
+        overrides = self._get_overrides()
+        # Every run is checked before any device is opened
+        params = [self._apply(base, run) for run in overrides]
+        for run in params:
+            validate(demo_class.required, run)
+
+        self.fxs = get_backend(base)
+        self.devices = open_devices(
+            self.fxs,
+            base["ports"],
+            base["baud_rate"],
+            **self._get_device_options(base, params),
+        )
+        rows = []
+        try:
+            for number, (run, run_params) in enumerate(zip(overrides, params)):
+                run = self._flatten(run)
+                label = ", ".join(f"{key}={value}" for key, value in run.items())
+                print(f"\nRun {number + 1} of {len(params)}: {label or 'base'}")
+                for device in self.devices:
+                    # Demos change their own parameters as they run, e.g.,
+                    # impedance_control's B gain, so every device gets a
+                    # new one
+                    demo = self._get_demo(demo_class, run_params)
+                    summary = demo.run_once(device)
+                    rows.append(
+                        {"run": number + 1, "device": device.dev_id, **run, **summary}
+                    )
+        finally:
+            for device in self.devices:
+                device.close()
+
+        swept = [name for run in overrides for name in self._flatten(run)]
+        swept = list(dict.fromkeys(swept))
+        self._write_summary(rows, swept)
+        self._print_summary(rows, swept)
+
+    # -----
+    # _get_demo_class
+    # -----
+    def _get_demo_class(self):
+        """
+        Returns the class of the demo to sweep.
+
+        Raises
+        ------
+        ValueError
+            If there's no such demo or it can't be run unattended.
+        """
+        for command, module, class_name, _ in COMMANDS:
+            if command == self.demo:
+                module = import_module(f"flexsea_demos.commands.{module}")
+                demo_class = getattr(module, class_name)
+                if hasattr(demo_class, "run_once"):
+                    return demo_class
+        raise ValueError(f"'{self.demo}' can't be swept")
+
+    # -----
+    # _get_overrides
+    # -----
+    def _get_overrides(self):
+        """
+        Combines every entry of `runs` with every point of `grid`, the
+        product of the values of each of its parameters. Either can be
+        left out.
+
+        Raises
+        ------
+        ValueError
+            If a grid parameter isn't given a list of values, or if a run
+            changes how the devices are opened.
+
+        Returns
+        -------
+        list
+            The parameters to override for each run, in order.
+        """
+        for name, values in self.grid.items():
+            if not isinstance(values, list):
+                raise ValueError(f"Grid parameter '{name}' needs a list of values")
+        points = [
+            dict(zip(self.grid, values)) for values in product(*self.grid.values())
+        ]
+        overrides = [{**run, **point} for run in self.runs or [{}] for point in points]
+        for run in overrides:
+            for name in run:
+                if name.split(".")[0] in FIXED_PARAMS:
+                    raise ValueError(
+                        f"'{name}' can't be swept, the devices are only opened once"
+                    )
+        return overrides
+
+    # -----
+    # _apply
+    # -----
+    @staticmethod
+    def _apply(base, overrides):
+        """
+        Returns a copy of the `base` parameters with `overrides` applied.
+        A dotted name, e.g., `gains.KP`, only overrides that entry of a
+        dictionary parameter.
+        """
+        params = deepcopy(base)
+        for name, value in overrides.items():
+            *parents, key = name.split(".")
+            target = params
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = deepcopy(value)
+        return params
+
+    # -----
+    # _flatten
+    # -----
+    @staticmethod
+    def _flatten(overrides, prefix=""):
+        """
+        Turns the dictionaries in `overrides` into dotted names.
+        """
+        flat = {}
+        for name, value in overrides.items():
+            if isinstance(value, dict):
+                flat.update(SweepCommand._flatten(value, f"{prefix}{name}."))
+            else:
+                flat[f"{prefix}{name}"] = value
+        return flat
+
+    # -----
+    # _get_device_options
+    # -----
+    @staticmethod
+    def _get_device_options(base, params):
+        """
+        The devices stream at least as fast as the fastest run sends
+        commands, if the demo has a `cmd_freq`.
+        """
+        options = base.get("device_options", {})
+        freqs = [run["cmd_freq"] for run in params if "cmd_freq" in run]
+        if not freqs:
+            return options
+        return {
+            "stream_freq": max(freqs),
+            "read_freshness": 0.5 / max(freqs),
+            **options,
+        }
+
+    # -----
+    # _get_demo
+    # -----
+    def _get_demo(self, demo_class, params):
+        """
+        Creates the demo for one run of one device, with its own copy of
+        `params`. Dictionary parameters are merged into the demo's
+        defaults, so that overriding one gain keeps the others.
+        """
+        params = deepcopy(params)
+        demo = demo_class()
+        for name, value in params.items():
+            default = getattr(demo, name, None)
+            if isinstance(value, dict) and isinstance(default, dict):
+                params[name] = {**default, **value}
+        assign_params(demo, params)
+        demo.fxs = self.fxs
+        # pylint: disable=protected-access
+        demo._prepare()
+        return demo
+
+    # -----
+    # _write_summary
+    # -----
+    def _write_summary(self, rows, swept):
+        """
+        Writes one row per run and device to `summary_file`: the swept
+        parameters, then the demo's summary.
+        """
+        columns = ["run", "device", *swept]
+        columns += [name for name in rows[0] if name not in columns] if rows else []
+        write_table(self._get_table(rows, columns, 3), columns, self.summary_file)
+        print(f"\nSummary of {len(rows)} runs written to '{self.summary_file}'")
+
+    # -----
+    # _print_summary
+    # -----
+    def _print_summary(self, rows, swept):
+        """
+        Prints the swept parameters, achieved rate, p99 lateness and p99
+        tracking error of every run.
+        """
+        columns = ["run", "device", *swept]
+        columns += ["achieved_freq", "lateness_p99_us", "error_p99"]
+        print_table(self._get_table(rows, columns, 1), columns)
+
+    # -----
+    # _get_table
+    # -----
+    @staticmethod
+    def _get_table(rows, columns, digits):
+        """
+        Returns `rows` with a value for each of `columns`, empty if a
+        run didn't have it, and with floats rounded to `digits`.
+        """
+        table = []
+        for row in rows:
+            values = {name: row.get(name, "") for name in columns}
+            table.append(
+                {
+                    name: round(value, digits) if isinstance(value, float) else value
+                    for name, value in values.items()
+                }
+            )
+        return table
@@ -3,9 +3,10 @@ from typing import List
 
 from cleo import Command
 from flexsea import fxEnums as fxe
-from flexsea import fxUtils as fxu
 
-from flexsea_demos.device import Device
+from flexsea_demos.dashboard import Dashboard
+from flexsea_demos.device import open_devices
+from flexsea_demos.scheduler import LoopScheduler
 from flexsea_demos.utils import setup
 
 
@@ -30,8 +31,13 @@ class TwoDevPositionCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.run_time = 0
         self.nLoops = 0
+        self.loop_delay = 0.1
+        self.scheduler = None
+        self.display_rate = 10.0
+        self.dashboard = None
         self.devices = []
         self.fxs = None
         self.gains = {"KP": 50, "KI": 3, "KD": 0, "K": 0, "B": 0, "FF": 0}
@@ -45,15 +51,19 @@ class TwoDevPositionCommand(Command):
         Runs the two devices position control demo.
         """
         setup(self, self.required, self.argument("paramFile"))
-        self.nLoops = int(self.run_time / 0.1)
+        self.nLoops = int(self.run_time / self.loop_delay)
+        self.scheduler = LoopScheduler(1.0 / self.loop_delay)
+        self.dashboard = Dashboard(self.display_rate)
 
         try:
             assert len(self.ports) == 2
         except AssertionError:
             raise AssertionError(f"Need two devices. Got: '{len(self.ports)}'")
 
+        self.devices = open_devices(
+            self.fxs, self.ports, self.baud_rate, **self.device_options
+        )
         for i in range(2):
-            self.devices.append(Device(self.fxs, self.ports[i], self.baud_rate))
             self.devices[i].set_gains(self.gains)
             self.devices[i].motor(fxe.FX_POSITION, self.devices[i].initial_pos)
 
@@ -70,18 +80,27 @@ class TwoDevPositionCommand(Command):
     # _two_devices_position_control
     # -----
     def _two_devices_position_control(self):
-        for i in range(self.nLoops):
-            sleep(0.1)
-            fxu.clear_terminal()
-
-            for j in range(2):
-                cur_pos = self.devices[j].get_pos()
-                pos0 = self.devices[j].initial_pos
-
-                print(f"Device {j}:\n---------\n")
-                print(f"Desired:              {pos0}")
-                print(f"Measured:             {cur_pos}")
-                print(f"Difference:           {cur_pos - pos0}\n")
-                self.devices[j].print()
-
-                fxu.print_loop_count(i, self.nLoops)
+        self.scheduler.start()
+        with self.dashboard:
+            for i in range(self.nLoops):
+                self.scheduler.wait()
+
+                for j in range(2):
+                    data = self.devices[j].read()
+                    cur_pos = data.mot_ang
+                    pos0 = self.devices[j].initial_pos
+
+                    self.dashboard.publish(
+                        f"Device {j}",
+                        data,
+                        (
+                            ("Desired", pos0),
+                            ("Measured", cur_pos),
+                            ("Difference", cur_pos - pos0),
+                        ),
+                    )
+                self.dashboard.set_progress(i, self.nLoops)
+        self.scheduler.stop()
+        self.scheduler.print_stats()
+        for device in self.devices:
+            device.print_stats()
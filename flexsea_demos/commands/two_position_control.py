@@ -1,15 +1,22 @@
-from time import sleep
 from time import time
 from typing import Dict
 from typing import List
 
 from cleo import Command
 from flexsea import fxEnums as fxe
-from flexsea import fxUtils as fxu
-import matplotlib
-import matplotlib.pyplot as plt
+import numpy as np
 
+from flexsea_demos.dashboard import Dashboard
 from flexsea_demos.device import Device
+from flexsea_demos.downsample import downsample_chunks
+from flexsea_demos.parallel import run_ports
+from flexsea_demos.plotting import plot
+from flexsea_demos.plotting import plot_positions
+from flexsea_demos.plotting import PlotExporter
+from flexsea_demos.recording import RecordingWriter
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.telemetry import TelemetryRecorder
+from flexsea_demos.utils import read_yaml
 from flexsea_demos.utils import setup
 
 
@@ -21,7 +28,8 @@ class TwoPositionCommand(Command):
     Runs the two position control demo.
 
     two_position_control
-        {paramFile : Yaml file containing the parameters for the demo.}
+        {paramFile : Yaml file with demo parameters.}
+        {--parallel : Run every port at once, each on its own thread.}
     """
 
     # Schema of parameters required by the demo
@@ -41,19 +49,27 @@ class TwoPositionCommand(Command):
         super().__init__()
         self.ports = []
         self.baud_rate = 0
+        self.device_options = {}
         self.run_time = 0
         self.delta = 0
         self.transition_time = 0.0
         self.gains = {}
-        self.plot_data = {"times": [], "requests": [], "measurements": []}
+        self.plot_data = None
         self.nLoops = 0
         self.transition_steps = 0
         self.start_time = 0
+        self.loop_delay = 0.1
+        self.scheduler = None
+        self.display_rate = 10.0
+        self.dashboard = None
         self.fxs = None
-
-        matplotlib.use("WebAgg")
-        if fxu.is_pi():
-            matplotlib.rcParams.update({"webagg.address": "0.0.0.0"})
+        self.plot_dir = None
+        self.plot_format = "png"
+        self.plot_points = 2000
+        self.exporter = None
+        self.record_file = None
+        self.record_compression = None
+        self.recording = None
 
     # -----
     # handle
@@ -63,17 +79,43 @@ class TwoPositionCommand(Command):
         Runs the two position control demo.
         """
         setup(self, self.required, self.argument("paramFile"))
-        self.nLoops = int(self.run_time / 0.1)
-        self.transition_steps = int(self.transition_time / 0.1)
-
-        for port in self.ports:
-            input("Press 'ENTER' to continue...")
-            device = Device(self.fxs, port, self.baud_rate)
-            self._reset_plot()
-            self._two_position_control(device)
-            device.motor(fxe.FX_VOLTAGE, 0)
-            self._plot()
-            device.close()
+        self.nLoops = int(self.run_time / self.loop_delay)
+        self.transition_steps = int(self.transition_time / self.loop_delay)
+        self.scheduler = LoopScheduler(1.0 / self.loop_delay)
+        self.dashboard = Dashboard(self.display_rate)
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        self.recording = RecordingWriter.from_params(
+            self.record_file,
+            self.record_compression,
+            meta={
+                "command": self.config.name,
+                "params": read_yaml(self.argument("paramFile")),
+            },
+        )
+
+        run_ports(self, "_run_port", "_plot")
+
+        if self.recording:
+            self.recording.close()
+            self.recording.print_stats()
+        if self.exporter:
+            self.exporter.join()
+
+    # -----
+    # _run_port
+    # -----
+    def _run_port(self, port):
+        """
+        Runs the demo on the device on `port`, and returns its id.
+        """
+        device = Device(self.fxs, port, self.baud_rate, **self.device_options)
+        self._reset_plot()
+        if self.recording:
+            self.recording.add(self.plot_data, f"{device.dev_id}/positions")
+        self._two_position_control(device)
+        device.motor(fxe.FX_VOLTAGE, 0)
+        device.close()
+        return device.dev_id
 
     # -----
     # _two_position_control
@@ -87,51 +129,88 @@ class TwoPositionCommand(Command):
         device.set_gains(self.gains)
         device.motor(fxe.FX_POSITION, initial_angle)
         self.start_time = time()
+        title = f"Device {device.dev_id}"
+
+        self.scheduler.start()
+        with self.dashboard:
+            for i in range(self.nLoops):
+                self.scheduler.wait()
+                data = device.read()
+                measured_pos = data.mot_ang
+                self.dashboard.publish(
+                    title,
+                    data,
+                    (
+                        ("Desired", positions[current_pos]),
+                        ("Measured", measured_pos),
+                        ("Difference", measured_pos - positions[current_pos]),
+                    ),
+                )
+                self.dashboard.set_progress(i, self.nLoops)
+
+                if i % self.transition_steps == 0:
+                    current_pos = (current_pos + 1) % len(positions)
+                    device.motor(fxe.FX_POSITION, positions[current_pos])
+
+                self.plot_data.append(
+                    time() - self.start_time, positions[current_pos], measured_pos
+                )
+        self.scheduler.stop()
+        self.scheduler.print_stats()
+        device.print_stats()
 
-        for i in range(self.nLoops):
-            sleep(0.1)
-            data = device.read()
-            fxu.clear_terminal()
-            measured_pos = data.mot_ang
-            print(f"Desired:              {positions[current_pos]}")
-            print(f"Measured:             {measured_pos}")
-            print(f"Difference:           {(measured_pos - positions[current_pos])}\n")
-            device.print(data)
-
-            if i % self.transition_steps == 0:
-                current_pos = (current_pos + 1) % len(positions)
-                device.motor(fxe.FX_POSITION, positions[current_pos])
+    # -----
+    # replay
+    # -----
+    def replay(self, recording):
+        """
+        Draws the plot of every device of a run recorded with
+        `record_file`, as if it had just finished.
 
-            self.plot_data["times"].append(time() - self.start_time)
-            self.plot_data["requests"].append(positions[current_pos])
-            self.plot_data["measurements"].append(measured_pos)
+        Parameters
+        ----------
+        recording : flexsea_demos.recording.Recording
+            The recorded run. The demo's parameters must already be set.
+        """
+        self.exporter = PlotExporter.from_params(self.plot_dir, self.plot_format)
+        for name in recording.streams:
+            # Read one chunk at a time by the plot
+            self.plot_data = recording.stream(name)
+            self._plot(int(name.split("/")[0]))
+        if self.exporter:
+            self.exporter.join()
 
     # -----
     # _plot
     # -----
-    def _plot(self):
-        plt.title("Two Position Control Demo")
-        plt.plot(
-            self.plot_data["times"],
-            self.plot_data["requests"],
-            color="b",
-            label="Desired position",
+    def _plot(self, dev_id):
+        """
+        Plots the device's requests and measurements, decimated to
+        `plot_points` points one chunk at a time.
+        """
+        times, requests, measurements = downsample_chunks(
+            (
+                (chunk["times"], chunk["requests"], chunk["measurements"])
+                for chunk in self.plot_data.chunks()
+            ),
+            len(self.plot_data),
+            max_points=self.plot_points,
         )
-        plt.plot(
-            self.plot_data["times"],
-            self.plot_data["measurements"],
-            color="r",
-            label="Measured position",
+        plot(
+            plot_positions,
+            f"two_position_control_{dev_id}",
+            self.exporter,
+            title="Two Position Control Demo",
+            times=times,
+            requests=requests,
+            measurements=measurements,
         )
-        plt.xlabel("Time (s)")
-        plt.ylabel("Encoder position")
-        plt.legend(loc="upper right")
-        fxu.print_plot_exit()
-        plt.show()
 
     # -----
     # _reset_plot
     # -----
     def _reset_plot(self):
-        self.plot_data = {"times": [], "requests": [], "measurements": []}
-        plt.clf()
+        self.plot_data = TelemetryRecorder(
+            {"times": np.float64, "requests": np.int64, "measurements": np.int64},
+            self.nLoops,
+        )
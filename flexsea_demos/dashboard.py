@@ -0,0 +1,224 @@
+import sys
+from threading import Event
+from threading import Lock
+from threading import Thread
+
+# Fields shown for an ActPack, in the same order (and with the same
+# labels) as `fxUtils.print_act_pack`
+ACT_PACK_FIELDS = (
+    ("State time", "state_time"),
+    ("Accel X", "accelx"),
+    ("Accel Y", "accely"),
+    ("Accel Z", "accelz"),
+    ("Gyro X", "gyrox"),
+    ("Gyro Y", "gyroy"),
+    ("Gyro Z", "gyroz"),
+    ("Motor angle", "mot_ang"),
+    ("Motor voltage (mV)", "mot_volt"),
+    ("Battery Current (mA)", "batt_curr"),
+    ("Battery Voltage (mV)", "batt_volt"),
+    ("Battery Temp (C)", "temperature"),
+)
+
+# ANSI escape sequences
+HOME = "\x1b[H"
+CLEAR_SCREEN = "\x1b[2J"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+
+
+# ============================================
+#                 Dashboard
+# ============================================
+class Dashboard:
+    """
+    Draws the latest device data on the terminal from a background
+    thread.
+
+    Clearing the terminal and printing every field of a device from
+    inside a control loop puts terminal I/O (and, for `clear_terminal`,
+    a subprocess) on the control path. Instead, the loop only
+    `publish`es its latest snapshot, which just stores a reference, and
+    the dashboard repaints the screen in place with ANSI cursor control
+    at its own, fixed, rate. Snapshots published between two repaints
+    are never drawn.
+
+    Several loops can use the same dashboard at once (e.g., one per
+    device with `--parallel`), each with its own panel. It starts
+    repainting when the first one starts it and stops when the last one
+    stops it.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Repaints per second.
+
+    stream : file, optional
+        Where to draw. Defaults to `sys.stdout`. If it isn't a
+        terminal, frames are written one after the other instead of
+        being repainted in place.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, rate=10.0, stream=None):
+        if rate <= 0:
+            raise ValueError(f"Invalid display rate: '{rate}'")
+        self.period = 1.0 / rate
+        self.stream = stream if stream else sys.stdout
+        self.ansi = self.stream.isatty()
+        self.panels = {}
+        self.progress = None
+        self.frames = 0
+        self._stop = Event()
+        self._thread = None
+        self._users = 0
+        self._lock = Lock()
+
+    # -----
+    # publish
+    # -----
+    def publish(self, title, data=None, values=()):
+        """
+        Replaces the snapshot shown in panel `title`. Called from the
+        control loop, so it does no formatting.
+
+        Parameters
+        ----------
+        title : str
+            Panel heading. Panels are drawn in the order they were
+            first published.
+
+        data : ctypes.Structure, optional
+            Device state, e.g., as returned by `Device.read`.
+
+        values : tuple, optional
+            `(label, value)` pairs drawn above the device state.
+        """
+        self.panels[title] = (data, values)
+
+    # -----
+    # set_progress
+    # -----
+    def set_progress(self, count, total):
+        """
+        Sets the loop counter drawn below the panels.
+        """
+        self.progress = (count, total)
+
+    # -----
+    # start
+    # -----
+    def start(self):
+        """
+        Starts repainting, unless it already is.
+        """
+        with self._lock:
+            self._users += 1
+            if self._users > 1:
+                return self
+            self._stop.clear()
+            if self.ansi:
+                self.stream.write(CLEAR_SCREEN)
+            self._thread = Thread(target=self._run, name="dashboard", daemon=True)
+            self._thread.start()
+        return self
+
+    # -----
+    # stop
+    # -----
+    def stop(self):
+        """
+        Stops repainting, after drawing the last snapshot once more so
+        that it stays on screen. If other loops still use the dashboard,
+        it keeps repainting until they stop it too.
+        """
+        with self._lock:
+            if self._thread is None:
+                return
+            self._users -= 1
+            if self._users:
+                return
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._draw()
+
+    # -----
+    # _run
+    # -----
+    def _run(self):
+        while not self._stop.wait(self.period):
+            self._draw()
+
+    # -----
+    # _draw
+    # -----
+    def _draw(self):
+        lines = self.render()
+        if self.ansi:
+            text = HOME + "".join(line + CLEAR_LINE + "\n" for line in lines)
+            text += CLEAR_BELOW
+        else:
+            text = "\n".join(lines) + "\n\n"
+        self.stream.write(text)
+        self.stream.flush()
+        self.frames += 1
+
+    # -----
+    # render
+    # -----
+    def render(self):
+        """
+        Formats the latest snapshot of every panel.
+
+        Returns
+        -------
+        list
+            The lines to draw.
+        """
+        lines = []
+        for title, (data, values) in list(self.panels.items()):
+            lines.append(f"[ {title} ]")
+            lines.append("")
+            for label, value in values:
+                lines.append(f"{label + ':':<22}{value}")
+            if values:
+                lines.append("")
+            if data is not None:
+                for label, field in _get_fields(data):
+                    lines.append(f"{label + ':':<22}{getattr(data, field)}")
+                lines.append("")
+        if self.progress:
+            count, total = self.progress
+            lines.append(f"Run {count + 1} of {total}")
+        return lines
+
+    # -----
+    # __enter__
+    # -----
+    def __enter__(self):
+        return self.start()
+
+    # -----
+    # __exit__
+    # -----
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ============================================
+#                 _get_fields
+# ============================================
+def _get_fields(data):
+    """
+    Returns the `(label, attribute)` pairs to draw for `data`: the
+    usual ActPack fields if it has them, otherwise every field of the
+    structure.
+    """
+    # pylint: disable=protected-access
+    names = [field[0] for field in data._fields_]
+    if all(field in names for _, field in ACT_PACK_FIELDS):
+        return ACT_PACK_FIELDS
+    return [(name, name) for name in names]
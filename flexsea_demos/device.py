@@ -1,8 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from time import perf_counter_ns
 from time import sleep
 
 from flexsea import fxEnums as fxe
 from flexsea import fxUtils as fxu
 
+# flexsea crashes when several devices are opened (or start streaming)
+# at the same time, so those calls are made one at a time. Everything
+# else, including waiting for the devices to come up, can overlap
+_open_lock = Lock()
+
 
 # ============================================
 #                   Device
@@ -10,8 +19,44 @@ from flexsea import fxUtils as fxu
 class Device:
     """
     Contains and manages the actpack/exoboot information and state.
+
+    Optional keyword arguments are set as attributes. These include:
+
+    stream_freq : int
+        Frequency (in Hz) at which the device streams data. Should be
+        at least the rate at which the device is read. Default is 100.
+
+    log_en : bool
+        Whether flexsea logs every streamed frame to disk. Default is
+        True.
+
+    gain_retries : int
+        How many times a gain update that wasn't confirmed is re-sent
+        before giving up. Default is 3.
+
+    gain_resends : int
+        How many times a gain update is sent when the backend can't
+        report the device's gains, so it can't be confirmed. Default is
+        5.
+
+    read_freshness : float
+        Reads within this many seconds of the last real read are served
+        from the cached snapshot instead of going to the device. Loops
+        faster than ~500 Hz should use less than their period. Default
+        is 0.001.
+
+    ready_timeout : float
+        How long (in seconds) to wait for the device to report a valid
+        app type and stream its first frame after opening it. Default
+        is 5.
+
+    ready_poll : float
+        Time (in seconds) between readiness checks. Default is 0.01.
     """
 
+    # Order in which the gains are passed to flexsea
+    gain_names = ("KP", "KI", "KD", "K", "B", "FF")
+
     # -----
     # constructor
     # -----
@@ -20,19 +65,41 @@ class Device:
         self.fxs = fxs
         self.port = port
         self.baud_rate = baud_rate
+        self.stream_freq = 100
+        self.log_en = True
+        self.gain_retries = 3
+        self.gain_resends = 5
+        self.read_freshness = 0.001
+        self.ready_timeout = 5.0
+        self.ready_poll = 0.01
+        self.data = None
+        self.data_time = 0
+        self.stats = {
+            "reads": 0,
+            "cached_reads": 0,
+            "stale_reads": 0,
+            "gain_writes": 0,
+            "gain_skips": 0,
+            "gain_retries": 0,
+        }
         for key, value in kwargs.items():
             setattr(self, key, value)
 
-        self.dev_id = self.fxs.open(self.port, self.baud_rate, 0)
-        self.fxs.start_streaming(self.dev_id, freq=100, log_en=True)
-        # NOTE: This sleep is so long because there's an issue that
-        # occurs when trying to open multiple devices in rapid
-        # succession that causes flexsea to crash
-        sleep(1)
-        self.app_type = self.fxs.get_app_type(self.dev_id)
-
-        if self.app_type.value == fxe.FX_INVALID_APP.value:
-            raise KeyError(f"Invalid app type: '{self.app_type.value}'")
+        open_time = perf_counter()
+        with _open_lock:
+            self.dev_id = self.fxs.open(self.port, self.baud_rate, 0)
+            self.fxs.start_streaming(
+                self.dev_id, freq=self.stream_freq, log_en=self.log_en
+            )
+        try:
+            self.app_type = self._wait_until_ready()
+            if self.app_type.value == fxe.FX_INVALID_APP.value:
+                raise KeyError(f"Invalid app type: '{self.app_type.value}'")
+        except Exception:
+            # Don't leave the port open (and streaming) if we give up
+            self.fxs.close(self.dev_id)
+            raise
+        self.time_to_ready = perf_counter() - open_time
 
         try:
             app_name = fxe.APP_NAMES[self.app_type.value]
@@ -46,6 +113,39 @@ class Device:
         self.initial_pos = self.get_pos()
         self.controller_type = None
         self.controller = None
+        self.gains = None
+
+    # -----
+    # _wait_until_ready
+    # -----
+    def _wait_until_ready(self):
+        """
+        Polls the device until it reports a valid app type and its
+        first streamed frame can be read, or `ready_timeout` runs out.
+
+        Returns
+        -------
+        ctypes.c_int
+            The device's app type. Invalid if the device never reported
+            a valid one.
+        """
+        deadline = perf_counter() + self.ready_timeout
+        while True:
+            app_type = self.fxs.get_app_type(self.dev_id)
+            if app_type.value != fxe.FX_INVALID_APP.value:
+                try:
+                    self.fxs.read_device(self.dev_id)
+                    return app_type
+                except (RuntimeError, IOError):
+                    pass
+            if perf_counter() >= deadline:
+                if app_type.value == fxe.FX_INVALID_APP.value:
+                    return app_type
+                raise RuntimeError(
+                    f"Device on port '{self.port}' didn't stream any data within "
+                    f"{self.ready_timeout} s"
+                )
+            sleep(self.ready_poll)
 
     # -----
     # motor
@@ -67,11 +167,49 @@ class Device:
     # -----
     # read
     # -----
-    def read(self):
+    def read(self, max_age=None):
         """
         Reads the current state of the device.
+
+        If the device was read less than `max_age` seconds ago, that
+        snapshot is returned instead of reading again. Reads that go to
+        the device but get back the same frame as the previous read
+        (i.e., the device is being read faster than it streams) are
+        counted as stale.
+
+        Parameters
+        ----------
+        max_age : float, optional
+            Oldest snapshot (in seconds) that may be returned. Defaults
+            to `read_freshness`. Use 0 to force a read.
         """
-        return self.fxs.read_device(self.dev_id)
+        data = self.get_cached(max_age)
+        if data is not None:
+            return data
+        now = perf_counter_ns()
+        data = self.fxs.read_device(self.dev_id)
+        if self.data is not None and data.state_time == self.data.state_time:
+            self.stats["stale_reads"] += 1
+        self.data = data
+        self.data_time = now
+        self.stats["reads"] += 1
+        return data
+
+    # -----
+    # get_cached
+    # -----
+    def get_cached(self, max_age=None):
+        """
+        Returns the last snapshot if it's younger than `max_age` seconds
+        (`read_freshness` by default), otherwise None. Never talks to
+        the device.
+        """
+        if max_age is None:
+            max_age = self.read_freshness
+        if self.data is None or perf_counter_ns() - self.data_time > max_age * 1e9:
+            return None
+        self.stats["cached_reads"] += 1
+        return self.data
 
     # -----
     # print
@@ -79,31 +217,115 @@ class Device:
     def print(self, data=None):
         """
         Reads the data from the device and then prints it to the screen.
+        A snapshot read within the last `read_freshness` seconds is
+        printed instead of reading again.
         """
-        if not data:
+        if data is None:
             data = self.read()
         fxu.print_device(data, self.app_type)
 
     # -----
     # set_gains
     # -----
-    def set_gains(self, gains):
+    def set_gains(self, gains, force=False):
         """
         Sets the gains on the device. Gains are, in order:
         kp, ki, kd, K, B & ff
+
+        The last gains set are cached and writing the same gains again
+        is skipped. If the backend can report the device's gains (the
+        simulator can), a write is confirmed by reading them back, and
+        retried up to `gain_retries` times until they match.
+
+        flexsea itself can't report them, and an update can be lost
+        without any error. Then, every update is sent `gain_resends`
+        times instead, which makes a lost update unlikely but doesn't
+        confirm anything: the cache only holds what was sent.
+
+        Parameters
+        ----------
+        gains : dict
+            Maps KP, KI, KD, K, B & FF to their values.
+
+        force : bool, optional
+            If True, the gains are written even if they match the cache.
+
+        Raises
+        ------
+        IOError
+            If the gains couldn't be confirmed or, without read back,
+            every send failed.
         """
-        # TODO(CA): Investigate this problem and remove the hack below
-        # Set gains several times since they might not get set when only set once.
-        for _ in range(5):
-            self.fxs.set_gains(
-                self.dev_id,
-                gains["KP"],
-                gains["KI"],
-                gains["KD"],
-                gains["K"],
-                gains["B"],
-                gains["FF"],
+        gains = tuple(gains[name] for name in self.gain_names)
+        if gains == self.gains and not force:
+            self.stats["gain_skips"] += 1
+            return
+
+        self.gains = None
+        if getattr(self.fxs, "get_gains", None) is None:
+            self._resend_gains(gains)
+            return
+        for attempt in range(self.gain_retries + 1):
+            if attempt:
+                self.stats["gain_retries"] += 1
+            self.stats["gain_writes"] += 1
+            try:
+                self.fxs.set_gains(self.dev_id, *gains)
+            except IOError:
+                continue
+            if self._verify_gains(gains):
+                self.gains = gains
+                return
+
+        raise IOError(
+            f"Could not set gains on device {self.dev_id} "
+            f"after {self.gain_retries + 1} attempts"
+        )
+
+    # -----
+    # _verify_gains
+    # -----
+    def _verify_gains(self, gains):
+        """
+        Reads the gains back from the device and compares them to
+        `gains`.
+        """
+        return tuple(self.fxs.get_gains(self.dev_id)) == gains
+
+    # -----
+    # _resend_gains
+    # -----
+    def _resend_gains(self, gains):
+        """
+        Sends `gains` `gain_resends` times, for backends that can't
+        confirm them. Sends that fail are skipped.
+        """
+        sent = False
+        for _ in range(self.gain_resends):
+            self.stats["gain_writes"] += 1
+            try:
+                self.fxs.set_gains(self.dev_id, *gains)
+                sent = True
+            except IOError:
+                pass
+        if not sent:
+            raise IOError(
+                f"Could not set gains on device {self.dev_id} "
+                f"after {self.gain_resends} attempts"
             )
+        self.gains = gains
+
+    # -----
+    # print_stats
+    # -----
+    def print_stats(self):
+        """
+        Prints the device's counters.
+        """
+        print(f"Device {self.dev_id} stats:")
+        print(f"\ttime_to_ready: {self.time_to_ready:.3f} s")
+        for key, value in self.stats.items():
+            print(f"\t{key}: {value}")
 
     # -----
     # get_pos
@@ -171,3 +393,64 @@ class Device:
         Shuts down the device.
         """
         self.fxs.close(self.dev_id)
+
+
+# ============================================
+#                open_devices
+# ============================================
+def open_devices(fxs, ports, baud_rate, **kwargs):
+    """
+    Opens the devices on `ports` concurrently.
+
+    Each device is opened on its own thread, so the total startup time
+    is roughly that of the slowest device rather than the sum over all
+    of them.
+
+    Parameters
+    ----------
+    fxs : flexsea.flexsea.FlexSEA
+        The backend used to talk to the devices.
+
+    ports : list
+        The ports to open.
+
+    baud_rate : int
+        Baud rate used for every port.
+
+    kwargs : dict
+        Optional `Device` options.
+
+    Raises
+    ------
+    Exception
+        Whatever error the first device that failed to open raised.
+        Every device that did open is closed again.
+
+    Returns
+    -------
+    list
+        A `Device` for each port, in the same order as `ports`.
+    """
+    with ThreadPoolExecutor(max_workers=max(len(ports), 1)) as executor:
+        futures = [
+            executor.submit(Device, fxs, port, baud_rate, **kwargs) for port in ports
+        ]
+    devices = []
+    error = None
+    for future in futures:
+        try:
+            devices.append(future.result())
+        except Exception as err:  # pylint: disable=broad-except
+            error = error if error else err
+    if error:
+        for device in devices:
+            device.close()
+        raise error
+
+    for device in devices:
+        print(
+            f"Device {device.dev_id} on '{device.port}' ready in "
+            f"{device.time_to_ready:.3f} s",
+            flush=True,
+        )
+    return devices
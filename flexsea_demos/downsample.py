@@ -0,0 +1,177 @@
+import numpy as np
+
+# Decimation methods understood by `downsample`
+METHODS = ("lttb", "minmax")
+
+
+# ============================================
+#                    lttb
+# ============================================
+def lttb(x, y, n_out):
+    """
+    Picks the points of a series to plot with the Largest Triangle Three
+    Buckets algorithm.
+
+    The series is split into `n_out - 2` buckets, and from each one the
+    point that forms the largest triangle with the point kept from the
+    previous bucket and the average of the next one is kept. Peaks,
+    steps and the overall shape survive, unlike with plain striding.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        The series.
+
+    n_out : int
+        Number of points to keep, including the first and last ones.
+
+    Returns
+    -------
+    np.ndarray
+        The sorted indices of the points to keep.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket i spans edges[i] to edges[i + 1]; the first and last points
+    # are kept as they are
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+# ============================================
+#                  min_max
+# ============================================
+def min_max(y, n_out):
+    """
+    Picks the points of a series to plot by keeping the minimum and
+    maximum of each of `n_out / 2` buckets, i.e., the envelope that
+    would be drawn at that many pixels.
+
+    Returns
+    -------
+    np.ndarray
+        The sorted indices of the points to keep.
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    size = -(-n // n_buckets)
+    # Pads the last bucket with its final value so they all have `size`
+    # points
+    padded = np.pad(np.asarray(y), (0, n_buckets * size - n), mode="edge")
+    buckets = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    indices = np.concatenate(
+        (
+            [0, n - 1],
+            offsets + buckets.argmin(axis=1),
+            offsets + buckets.argmax(axis=1),
+        )
+    )
+    return np.unique(np.minimum(indices, n - 1))
+
+
+# ============================================
+#                 downsample
+# ============================================
+def downsample(x, *ys, max_points=2000, method="lttb"):
+    """
+    Reduces series that share `x` to about `max_points` points each
+    before they're plotted.
+
+    The points kept for each series are merged, so that all of them are
+    still drawn against the same `x`. The inputs aren't modified, so
+    the full-resolution data remains available.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The shared x values, e.g., timestamps.
+
+    ys : np.ndarray
+        One or more series, the same length as `x`.
+
+    max_points : int
+        Points to keep per series. 0 or None keeps every point.
+
+    method : str
+        One of `METHODS`.
+
+    Returns
+    -------
+    tuple
+        The decimated `x`, followed by each decimated series.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Invalid downsampling method '{method}', expected {METHODS}")
+    if not max_points or len(x) <= max_points:
+        return (x, *ys)
+
+    if method == "lttb":
+        picked = [lttb(x, y, max_points) for y in ys]
+    else:
+        picked = [min_max(y, max_points) for y in ys]
+    indices = np.unique(np.concatenate(picked))
+    return tuple(np.asarray(values)[indices] for values in (x, *ys))
+
+
+# ============================================
+#             downsample_chunks
+# ============================================
+def downsample_chunks(chunks, n_rows, max_points=2000, method="lttb"):
+    """
+    `downsample` for series that are gone through one chunk at a time,
+    e.g., read from a `flexsea_demos.recording.Recording`, so that only
+    one chunk and the points kept so far are ever in memory.
+
+    Each chunk keeps its share of `max_points`, in proportion to its
+    rows, and the kept points are joined. A single chunk gives the same
+    result as `downsample`.
+
+    Parameters
+    ----------
+    chunks : iterable
+        Tuples of the chunk's `x` followed by each of its series.
+
+    n_rows : int
+        Rows in all of the chunks together.
+
+    max_points, method
+        See `downsample`.
+
+    Returns
+    -------
+    tuple
+        The decimated `x`, followed by each decimated series.
+    """
+    parts = []
+    for chunk in chunks:
+        share = max_points
+        if max_points and n_rows > max_points:
+            share = max(3, int(np.ceil(max_points * len(chunk[0]) / n_rows)))
+        parts.append(downsample(*chunk, max_points=share, method=method))
+    if len(parts) == 1:
+        return parts[0]
+    return tuple(np.concatenate(values) for values in zip(*parts))
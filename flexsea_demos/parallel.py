@@ -0,0 +1,137 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import copy
+import io
+import sys
+from threading import get_ident
+
+
+# ============================================
+#                 run_ports
+# ============================================
+def run_ports(command, run, finish=None):
+    """
+    Runs a single device demo on each of the command's `ports`.
+
+    By default, the ports are run one after the other, after the user
+    presses ENTER for each. With the command's `--parallel` option,
+    they are all run at once, after a single confirmation, each on its
+    own thread by its own copy of the command (see `_get_worker`). What
+    each device prints is held back and then printed, one device after
+    the other, once every device is done. `finish` is always called on
+    the main thread, e.g., to plot, which is done for one device at a
+    time too.
+
+    Parameters
+    ----------
+    command : cleo.Command
+        The demo, with its parameters set.
+
+    run : str
+        Name of the demo's method that runs one port. It's called with
+        the port.
+
+    finish : str, optional
+        Name of the demo's method that's called once a port has been
+        run, with what `run` returned.
+
+    Raises
+    ------
+    Exception
+        Whatever error the first device that failed raised, once every
+        device is done.
+    """
+    if not command.option("parallel"):
+        for port in command.ports:
+            input("Press 'ENTER' to continue...")
+            result = getattr(command, run)(port)
+            if finish:
+                getattr(command, finish)(result)
+        return
+
+    input(f"Press 'ENTER' to run {len(command.ports)} devices at once...")
+    workers = [_get_worker(command) for _ in command.ports]
+    output = _ThreadOutput(sys.stdout)
+    with contextlib.redirect_stdout(output):
+        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+            futures = [
+                executor.submit(output.capture, getattr(worker, run), port)
+                for worker, port in zip(workers, command.ports)
+            ]
+    error = None
+    for worker, port, future in zip(workers, command.ports, futures):
+        result, text, exc = future.result()
+        print(f"\n========== {port} ==========")
+        print(text, end="")
+        if exc:
+            print(f"Failed: {exc!r}")
+            error = error if error else exc
+        elif finish:
+            getattr(worker, finish)(result)
+    if error:
+        raise error
+
+
+# ============================================
+#                _get_worker
+# ============================================
+def _get_worker(command):
+    """
+    Copies the command for one port. The copies share the parameters,
+    compiled trajectories, dashboard, recording and exporter, but each
+    gets its own loop scheduler and gains, which a run changes.
+    """
+    worker = copy.copy(command)
+    worker.scheduler = copy.deepcopy(command.scheduler)
+    if isinstance(getattr(command, "gains", None), dict):
+        worker.gains = dict(command.gains)
+    return worker
+
+
+# ============================================
+#               _ThreadOutput
+# ============================================
+class _ThreadOutput(io.TextIOBase):
+    """
+    Stands in for stdout. What's written from a thread running
+    `capture` is kept for that thread, and anything else goes to
+    `stream`.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+        self.buffers = {}
+
+    # -----
+    # capture
+    # -----
+    def capture(self, func, *args):
+        """
+        Calls `func(*args)` and returns its result, what it printed, and
+        the error it raised, if any.
+        """
+        buffer = self.buffers[get_ident()] = io.StringIO()
+        result = error = None
+        try:
+            result = func(*args)
+        except Exception as err:  # pylint: disable=broad-except
+            error = err
+        finally:
+            del self.buffers[get_ident()]
+        return result, buffer.getvalue(), error
+
+    # -----
+    # write
+    # -----
+    def write(self, text):
+        return self.buffers.get(get_ident(), self.stream).write(text)
+
+    # -----
+    # flush
+    # -----
+    def flush(self):
+        self.stream.flush()
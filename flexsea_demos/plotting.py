@@ -0,0 +1,234 @@
+from functools import lru_cache
+import multiprocessing
+import os
+
+from flexsea import fxUtils as fxu
+
+# Formats the plots can be exported to
+EXPORT_FORMATS = ("png", "svg")
+
+# Set in the processes that render plots to files
+_headless = False
+
+
+# ============================================
+#                get_pyplot
+# ============================================
+@lru_cache(maxsize=None)
+def get_pyplot():
+    """
+    Imports and configures matplotlib.
+
+    Importing matplotlib (and picking its backend) is slow, especially
+    on a Raspberry Pi, so it's deferred until a demo actually draws
+    something rather than done when the command module is imported.
+
+    Returns
+    -------
+    module
+        `matplotlib.pyplot`, using the WebAgg backend, or the
+        non-interactive Agg backend when rendering to files.
+    """
+    # pylint: disable=import-outside-toplevel
+    import matplotlib
+
+    if _headless:
+        matplotlib.use("Agg")
+    else:
+        matplotlib.use("WebAgg")
+        if fxu.is_pi():
+            matplotlib.rcParams.update({"webagg.address": "0.0.0.0"})
+
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+# ============================================
+#              get_fxplotting
+# ============================================
+def get_fxplotting():
+    """
+    Imports flexsea's plotting utilities once matplotlib has been
+    configured.
+
+    Returns
+    -------
+    module
+        `flexsea.fxPlotting`.
+    """
+    get_pyplot()
+    # pylint: disable=import-outside-toplevel
+    from flexsea import fxPlotting as fxp
+
+    return fxp
+
+
+# ============================================
+#                   plot
+# ============================================
+def plot(draw, name, exporter=None, fig=1, **kwargs):
+    """
+    Draws a demo's figures.
+
+    Parameters
+    ----------
+    draw : callable
+        Called as `draw(fig, **kwargs)` to draw the figures, starting
+        with figure number `fig`. It must return the next figure number.
+        It has to be a module-level function so that it can be sent to
+        the exporter's process.
+
+    name : str
+        Prefix of the exported files.
+
+    exporter : PlotExporter, optional
+        If given, the figures are rendered to files in the background.
+        Otherwise they're shown in the browser and this blocks until
+        the user is done with them.
+
+    fig : int
+        Number of the first figure.
+
+    Returns
+    -------
+    int
+        The next figure number.
+    """
+    if exporter:
+        exporter.submit(draw, name, **kwargs)
+        return fig
+    plt = get_pyplot()
+    fig = draw(fig, **kwargs)
+    fxu.print_plot_exit()
+    plt.show()
+    return fig
+
+
+# ============================================
+#               plot_positions
+# ============================================
+def plot_positions(fig, title, times, requests, measurements):
+    """
+    Draws desired vs measured position, as done by the position based
+    demos.
+    """
+    plt = get_pyplot()
+    plt.figure(fig)
+    plt.clf()
+    plt.title(title)
+    plt.plot(times, requests, color="b", label="Desired position")
+    plt.plot(times, measurements, color="r", label="Measured position")
+    plt.xlabel("Time (s)")
+    plt.ylabel("Encoder position")
+    plt.legend(loc="upper right")
+    return fig + 1
+
+
+# ============================================
+#                  _render
+# ============================================
+def _render(draw, kwargs, prefix, fmt):
+    """
+    Runs in the exporter's process: draws the figures with the Agg
+    backend and saves each of them as `<prefix>_fig<n>.<fmt>`.
+    """
+    # pylint: disable=global-statement
+    global _headless
+    _headless = True
+    plt = get_pyplot()
+
+    draw(1, **kwargs)
+    for number in plt.get_fignums():
+        plt.figure(number).savefig(f"{prefix}_fig{number}.{fmt}")
+    plt.close("all")
+
+
+# ============================================
+#               PlotExporter
+# ============================================
+class PlotExporter:
+    """
+    Renders plots to files from background processes.
+
+    The data is handed to a new process as soon as a run finishes, so
+    the demo can close the device and start on the next port while the
+    figures are drawn and written. Drawing happens with matplotlib's
+    non-interactive Agg backend, so no display or browser is needed.
+
+    Parameters
+    ----------
+    directory : str
+        Where the files are written. Created if it doesn't exist.
+
+    fmt : str
+        One of `EXPORT_FORMATS`.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, directory, fmt="png"):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(
+                f"Invalid plot format '{fmt}', expected one of {EXPORT_FORMATS}"
+            )
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fmt = fmt
+        # Spawned rather than forked: the parent holds open serial ports
+        # and library threads that a forked child shouldn't inherit
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs = []
+
+    # -----
+    # submit
+    # -----
+    def submit(self, draw, name, **kwargs):
+        """
+        Starts rendering the figures drawn by `draw(fig, **kwargs)` to
+        `<directory>/<name>_fig<n>.<fmt>` and returns right away.
+        """
+        prefix = os.path.join(self.directory, name)
+        process = self._context.Process(
+            target=_render, args=(draw, kwargs, prefix, self.fmt)
+        )
+        process.start()
+        self._jobs.append((name, process))
+
+    # -----
+    # join
+    # -----
+    def join(self):
+        """
+        Waits for every submitted plot to be written.
+
+        Returns
+        -------
+        list
+            The names of the plots that failed to render.
+        """
+        failed = []
+        for name, process in self._jobs:
+            process.join()
+            if process.exitcode != 0:
+                failed.append(name)
+        self._jobs = []
+
+        print(f"Plots written to '{self.directory}'")
+        for name in failed:
+            print(f"Failed to render plot '{name}'")
+        return failed
+
+    # -----
+    # from_params
+    # -----
+    @classmethod
+    def from_params(cls, plot_dir, plot_format="png"):
+        """
+        Returns an exporter if the demo's `plot_dir` parameter is set,
+        or None to show the plots interactively.
+        """
+        if not plot_dir:
+            return None
+        return cls(plot_dir, plot_format)
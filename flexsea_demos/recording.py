@@ -0,0 +1,524 @@
+import json
+import lzma
+import mmap
+import queue
+import struct
+from threading import Lock
+from threading import Thread
+from time import perf_counter
+import zlib
+
+import numpy as np
+
+# Start of every recording
+MAGIC = b"FXREC\x00\x01\x00"
+
+# Every record starts with its tag, stream index, compression, row count
+# and payload size
+RECORD_HEADER = struct.Struct("<4sHHIQ")
+STREAM = b"STRM"
+CHUNK = b"CHNK"
+META = b"META"
+
+# Chunk compression codes
+COMPRESSION = {None: 0, "zlib": 1, "lzma": 2}
+
+
+# ============================================
+#              RecordingWriter
+# ============================================
+class RecordingWriter:
+    """
+    Streams the data recorded by a demo to a binary file from a
+    background thread.
+
+    `TelemetryRecorder`s are attached with `add`. Every `chunk_size`
+    rows, a recorder hands views of its new rows to the writer, which
+    puts them on a bounded queue and returns. The rows are never
+    written to again, so nothing is copied on the control loop's side,
+    and it never waits for the disk: the writer thread compresses (if
+    asked to) and writes the chunks. If the queue is ever full, the
+    chunk is dropped and counted rather than blocking the loop.
+
+    The file is a sequence of records, each a `RECORD_HEADER` followed
+    by its payload:
+
+    * `STRM`: declares a stream, with its name and columns as JSON.
+    * `CHNK`: rows of a stream. The payload is each column's values,
+      one column after the other, optionally compressed as a whole.
+    * `META`: JSON describing the run, e.g., the demo's parameters.
+
+    Uncompressed chunks can be memory-mapped in place by `Recording`.
+
+    Parameters
+    ----------
+    path : str
+        The file to write.
+
+    compression : str, optional
+        None, "zlib" or "lzma".
+
+    chunk_size : int, optional
+        Rows per chunk.
+
+    queue_size : int, optional
+        Maximum number of chunks waiting to be written.
+
+    meta : dict, optional
+        Written at the start of the file. See `set_meta`.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self, path, compression=None, chunk_size=4096, queue_size=256, meta=None
+    ):
+        if compression not in COMPRESSION:
+            raise ValueError(
+                f"Invalid compression '{compression}', expected one of "
+                f"{list(COMPRESSION)}"
+            )
+        self.path = path
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self.streams = []
+        self.raw_bytes = 0
+        self.written_bytes = 0
+        self.chunks = 0
+        self.dropped_rows = 0
+        self.high_water = 0
+        self.write_time = 0.0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = Lock()
+        self._file = open(path, "wb")  # pylint: disable=consider-using-with
+        self._file.write(MAGIC)
+        self._thread = Thread(target=self._run, name="recording-writer", daemon=True)
+        self._thread.start()
+        if meta:
+            self.set_meta(**meta)
+
+    # -----
+    # add
+    # -----
+    def add(self, recorder, name):
+        """
+        Records everything appended to `recorder` as stream `name`. Can
+        be called from several threads, e.g., one per device.
+        """
+        columns = [
+            [col, np.dtype(dtype).str] for col, dtype in recorder.columns.items()
+        ]
+        payload = json.dumps({"name": name, "columns": columns}).encode()
+        with self._lock:
+            index = len(self.streams)
+            self.streams.append(recorder)
+            recorder.stream = (self, index)
+            # Declarations are never dropped
+            self._queue.put((STREAM, index, 0, payload))
+
+    # -----
+    # set_meta
+    # -----
+    def set_meta(self, **meta):
+        """
+        Records information about the run. Each key overrides the value
+        of any earlier one with the same name. Values must be JSON
+        serializable.
+        """
+        self._queue.put((META, 0, 0, json.dumps(meta).encode()))
+
+    # -----
+    # write
+    # -----
+    def write(self, index, columns):
+        """
+        Queues a chunk of rows of stream `index`. Called by the
+        recorders; never blocks.
+        """
+        n_rows = len(columns[0])
+        try:
+            self._queue.put_nowait((CHUNK, index, n_rows, columns))
+        except queue.Full:
+            self.dropped_rows += n_rows
+            return
+        self.high_water = max(self.high_water, self._queue.qsize())
+
+    # -----
+    # close
+    # -----
+    def close(self):
+        """
+        Writes the rows the recorders haven't handed over yet, then
+        waits for everything to be on disk.
+        """
+        for recorder in self.streams:
+            recorder.flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    # -----
+    # _run
+    # -----
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            start = perf_counter()
+            tag, index, n_rows, payload = item
+            codec = 0
+            if tag == CHUNK:
+                payload = b"".join(np.ascontiguousarray(col).data for col in payload)
+                self.raw_bytes += len(payload)
+                codec = COMPRESSION[self.compression]
+                if codec == 1:
+                    payload = zlib.compress(payload, 1)
+                elif codec == 2:
+                    payload = lzma.compress(payload, preset=0)
+                self.chunks += 1
+            header = RECORD_HEADER.pack(tag, index, codec, n_rows, len(payload))
+            self._file.write(header)
+            self._file.write(payload)
+            self.written_bytes += len(header) + len(payload)
+            self.write_time += perf_counter() - start
+
+    # -----
+    # stats
+    # -----
+    def stats(self):
+        """
+        Returns
+        -------
+        dict
+            Bytes recorded and written, the writer's throughput (recorded
+            bytes per second spent writing), the highest number of chunks
+            that were waiting in the queue, and the rows dropped because
+            it was full.
+        """
+        throughput = self.raw_bytes / self.write_time if self.write_time else 0.0
+        return {
+            "chunks": self.chunks,
+            "raw_bytes": self.raw_bytes,
+            "written_bytes": self.written_bytes,
+            "throughput": throughput,
+            "high_water": self.high_water,
+            "queue_size": self._queue.maxsize,
+            "dropped_rows": self.dropped_rows,
+        }
+
+    # -----
+    # print_stats
+    # -----
+    def print_stats(self):
+        """
+        Prints the summary returned by `stats`.
+        """
+        stats = self.stats()
+        print(f"Recording written to '{self.path}':")
+        print(f"\tchunks: {stats['chunks']}")
+        print(
+            f"\tbytes: {stats['raw_bytes']} recorded, "
+            f"{stats['written_bytes']} written ({self.compression or 'uncompressed'})"
+        )
+        print(f"\tthroughput: {stats['throughput'] / 1e6:.1f} MB/s")
+        print(f"\tqueue high-water mark: {stats['high_water']}/{stats['queue_size']}")
+        print(f"\tdropped rows: {stats['dropped_rows']}")
+
+    # -----
+    # from_params
+    # -----
+    @classmethod
+    def from_params(cls, record_file, record_compression=None, meta=None):
+        """
+        Returns a writer if the demo's `record_file` parameter is set,
+        or None.
+        """
+        if not record_file:
+            return None
+        return cls(record_file, record_compression, meta=meta)
+
+
+# ============================================
+#                 Recording
+# ============================================
+class Recording:
+    """
+    Reads a file written by `RecordingWriter`.
+
+    The file is memory-mapped, and only the data that's used is read
+    from disk. `chunks` goes through a stream one chunk at a time: the
+    columns of an uncompressed chunk are views into the map, and a
+    compressed chunk is decompressed when it's reached. `stream` wraps
+    that for the demos' stats and plots. Indexing a stream returns all
+    of its rows at once, which copies them into memory unless the
+    stream is a single uncompressed chunk.
+
+    Call `close`, or use the recording as a context manager, to release
+    the map.
+
+    Parameters
+    ----------
+    path : str
+        The file to read.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, path):
+        self.path = path
+        self.meta = {}
+        self._columns = {}
+        self._chunks = {}
+        self._names = []
+        with open(path, "rb") as in_file:
+            self._map = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"'{path}' isn't a recording")
+        self._scan()
+
+    # -----
+    # _scan
+    # -----
+    def _scan(self):
+        offset = len(MAGIC)
+        size = len(self._map)
+        while offset + RECORD_HEADER.size <= size:
+            tag, index, codec, n_rows, length = RECORD_HEADER.unpack_from(
+                self._map, offset
+            )
+            offset += RECORD_HEADER.size
+            if offset + length > size:
+                # Truncated, e.g., the demo was killed while writing
+                break
+            if tag == STREAM:
+                stream = json.loads(self._map[offset : offset + length])
+                self._names.append(stream["name"])
+                self._columns[stream["name"]] = [
+                    (col, np.dtype(dtype)) for col, dtype in stream["columns"]
+                ]
+                self._chunks[stream["name"]] = []
+            elif tag == META:
+                self.meta.update(json.loads(self._map[offset : offset + length]))
+            elif tag == CHUNK:
+                self._chunks[self._names[index]].append((offset, codec, n_rows, length))
+            offset += length
+
+    # -----
+    # streams
+    # -----
+    @property
+    def streams(self):
+        """
+        The names of the recorded streams, in the order they were added.
+        """
+        return list(self._names)
+
+    # -----
+    # columns
+    # -----
+    def columns(self, name):
+        """
+        Maps the name of each column of stream `name` to its dtype.
+        """
+        return dict(self._columns[name])
+
+    # -----
+    # n_rows
+    # -----
+    def n_rows(self, name):
+        """
+        Number of rows recorded in stream `name`.
+        """
+        return sum(n_rows for _, _, n_rows, _ in self._chunks[name])
+
+    # -----
+    # chunks
+    # -----
+    def chunks(self, name):
+        """
+        Yields the rows of stream `name` one chunk at a time, each as a
+        dict of arrays. Those of uncompressed chunks are read-only views
+        into the file.
+        """
+        columns = self._columns[name]
+        for offset, codec, n_rows, length in self._chunks[name]:
+            if codec == 0:
+                buffer = memoryview(self._map)[offset : offset + length]
+            elif codec == 1:
+                buffer = zlib.decompress(self._map[offset : offset + length])
+            else:
+                buffer = lzma.decompress(self._map[offset : offset + length])
+            chunk = {}
+            start = 0
+            for col, dtype in columns:
+                chunk[col] = np.frombuffer(
+                    buffer, dtype=dtype, count=n_rows, offset=start
+                )
+                start += n_rows * dtype.itemsize
+            yield chunk
+
+    # -----
+    # stream
+    # -----
+    def stream(self, name):
+        """
+        Returns stream `name` as a `RecordedStream`, which is read one
+        chunk at a time.
+        """
+        if name not in self._chunks:
+            raise KeyError(name)
+        return RecordedStream(self, name)
+
+    # -----
+    # __getitem__
+    # -----
+    def __getitem__(self, name):
+        """
+        Returns the columns of stream `name`, as a dict of arrays. The
+        chunks are concatenated, i.e., copied, unless there's only one.
+        Use `chunks` to go through a long stream without loading it.
+        """
+        chunks = list(self.chunks(name))
+        if len(chunks) == 1:
+            return chunks[0]
+        return {
+            col: np.concatenate(
+                [chunk[col] for chunk in chunks] or [np.zeros(0, dtype)]
+            )
+            for col, dtype in self._columns[name]
+        }
+
+    # -----
+    # close
+    # -----
+    def close(self):
+        """
+        Releases the map. If arrays returned by the recording still
+        point into it, it's only unmapped once they're gone.
+        """
+        if self._map is None:
+            return
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._map = None
+
+    # -----
+    # __enter__
+    # -----
+    def __enter__(self):
+        return self
+
+    # -----
+    # __exit__
+    # -----
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # -----
+    # __len__
+    # -----
+    def __len__(self):
+        return len(self._names)
+
+
+# ============================================
+#               RecordedStream
+# ============================================
+class RecordedStream:
+    """
+    A stream of a `Recording`. Like a `TelemetryRecorder`, it has a
+    length and yields its rows with `chunks`, so the demos' stats and
+    plots take either, but its rows are only read (or decompressed) one
+    chunk at a time.
+
+    Parameters
+    ----------
+    recording : Recording
+        The recording the stream is in.
+
+    name : str
+        The stream's name.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, recording, name):
+        self.recording = recording
+        self.name = name
+
+    # -----
+    # chunks
+    # -----
+    def chunks(self):
+        """
+        Yields the stream's rows one chunk at a time, see
+        `Recording.chunks`. A stream with no rows yields one empty chunk.
+        """
+        empty = True
+        for chunk in self.recording.chunks(self.name):
+            empty = False
+            yield chunk
+        if empty:
+            columns = self.recording.columns(self.name)
+            yield {col: np.zeros(0, dtype) for col, dtype in columns.items()}
+
+    # -----
+    # __len__
+    # -----
+    def __len__(self):
+        return self.recording.n_rows(self.name)
+
+
+# ============================================
+#                 zip_chunks
+# ============================================
+def zip_chunks(*streams):
+    """
+    Goes through several streams of the same run together, e.g., the
+    timestamps and the telemetry of a device, yielding a tuple with a
+    chunk of each. The streams needn't have been chunked alike: chunks
+    are split (as views) so that those yielded together have the same
+    rows. As with `zip`, the longer streams are cut short.
+
+    Parameters
+    ----------
+    streams
+        Objects with a `chunks` method, e.g., `RecordedStream`s or
+        `flexsea_demos.telemetry.TelemetryRecorder`s.
+    """
+    iters = [stream.chunks() for stream in streams]
+    chunks = [next(chunk_iter, None) for chunk_iter in iters]
+    if None in chunks:
+        return
+    first = list(chunks)
+    starts = [0] * len(chunks)
+    yielded = False
+    while None not in chunks:
+        sizes = [
+            len(next(iter(chunk.values()))) - start
+            for chunk, start in zip(chunks, starts)
+        ]
+        n_rows = min(sizes)
+        if n_rows:
+            yield tuple(
+                {col: values[start : start + n_rows] for col, values in chunk.items()}
+                for chunk, start in zip(chunks, starts)
+            )
+            yielded = True
+        for i, size in enumerate(sizes):
+            starts[i] += n_rows
+            if size == n_rows:
+                chunks[i] = next(iters[i], None)
+                starts[i] = 0
+    if not yielded:
+        # Still yields the columns, empty
+        yield tuple(
+            {col: values[:0] for col, values in chunk.items()} for chunk in first
+        )
@@ -0,0 +1,292 @@
+import ctypes as c
+from threading import Lock
+
+from flexsea import fxEnums as fxe
+from flexsea.dev_spec import AllDevices as fxd
+
+
+# ============================================
+#              ReplayDevice
+# ============================================
+class ReplayDevice:
+    """
+    Plays back the recorded frames of a single device.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, dev_id, rows, initial=None):
+        self.dev_id = dev_id
+        self.lock = Lock()
+        self.gains = (0, 0, 0, 0, 0, 0)
+        self.ticks = 0
+        self.ticks_past_end = 0
+
+        self._chunks = iter(rows)
+        self._chunk = {}
+        self._row = 0
+        self._size = 0
+        self.state = None
+        if initial is None:
+            self._next_row()
+        else:
+            self._set_state(initial)
+
+    # -----
+    # tick
+    # -----
+    def tick(self):
+        """
+        Moves on to the next recorded row. Past the last one, the last
+        row is read again.
+        """
+        with self.lock:
+            self.ticks += 1
+            self._next_row()
+
+    # -----
+    # _next_row
+    # -----
+    def _next_row(self):
+        while self._row >= self._size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                if self.state is None:
+                    raise ValueError(f"Device {self.dev_id} has no recorded rows")
+                self.ticks_past_end += 1
+                self._number_state()
+                return
+            self._chunk = chunk
+            self._row = 0
+            self._size = len(next(iter(chunk.values()), ()))
+        self._set_state(
+            {name: values[self._row] for name, values in self._chunk.items()}
+        )
+        self._row += 1
+
+    # -----
+    # _set_state
+    # -----
+    def _set_state(self, fields):
+        state = fxd.ActPackState()
+        state.id = self.dev_id
+        for name, value in fields.items():
+            setattr(state, name, int(value))
+        self.state = state
+        self._number_state()
+
+    # -----
+    # _number_state
+    # -----
+    def _number_state(self):
+        # Numbers the frames, so that `Device` sees a new one every tick
+        self.state.state_time = self.ticks
+        self.state.SystemTime = self.ticks
+
+
+# ============================================
+#              ReplayFlexSEA
+# ============================================
+class ReplayFlexSEA:
+    """
+    In-process stand-in for `flexsea.flexsea.FlexSEA` that plays back
+    the measurements of a recorded run, so that a demo's control loop
+    can be fed them again, e.g., faster than real time.
+
+    Each port that's opened is given the next of `devices`. Its frames
+    are built from the recorded rows, one row per tick of the control
+    loop: `tick`, which the loop's `UnpacedScheduler` calls every time
+    it would have waited, moves every device on to its next row, and
+    every read until the next tick returns that row. Motor commands and
+    gains are accepted but change nothing, since what the devices
+    measure was recorded.
+
+    Parameters
+    ----------
+    devices : list
+        One `(dev_id, rows, initial)` tuple per device. `rows` yields
+        chunks of recorded rows, as dicts that map `ActPackState` fields
+        to arrays of values, e.g., built from `Recording.chunks`.
+        `initial`, if it isn't None, maps fields to their values in the
+        frames read before the first tick, and the first tick moves on
+        to the first row. Otherwise, the first row is read before the
+        first tick, and the second row after it.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, devices):
+        self._recorded = list(devices)
+        self.ids = []
+        self.devices = {}
+        self._lock = Lock()
+
+    # -----
+    # tick
+    # -----
+    def tick(self):
+        """
+        Moves every open device on to its next recorded row.
+        """
+        for device in list(self.devices.values()):
+            device.tick()
+
+    # -----
+    # open
+    # -----
+    def open(self, port, baud_rate, log_level=4):
+        """
+        Connects to the next recorded device.
+        """
+        with self._lock:
+            if not self._recorded:
+                raise ValueError(f"fxOpen: no recorded device left for port {port}")
+            dev_id, rows, initial = self._recorded.pop(0)
+            self.devices[dev_id] = ReplayDevice(dev_id, rows, initial)
+            self.ids.append(dev_id)
+        return dev_id
+
+    # -----
+    # close
+    # -----
+    def close(self, dev_id):
+        """
+        Disconnects from the device with the given id.
+        """
+        with self._lock:
+            self._get_device(dev_id, "fxClose")
+            del self.devices[dev_id]
+            self.ids.remove(dev_id)
+
+    # -----
+    # close_all
+    # -----
+    def close_all(self):
+        """
+        Disconnects from every device.
+        """
+        with self._lock:
+            self.devices.clear()
+            self.ids.clear()
+
+    # -----
+    # get_ids
+    # -----
+    def get_ids(self):
+        """
+        Returns the ids of all open devices.
+        """
+        return self.ids
+
+    # -----
+    # start_streaming
+    # -----
+    def start_streaming(self, dev_id, freq, log_en):
+        """
+        Recorded devices are always streaming.
+        """
+        self._get_device(dev_id, "fxStartStreaming")
+
+    # -----
+    # stop_streaming
+    # -----
+    def stop_streaming(self, dev_id):
+        """
+        Recorded devices are always streaming.
+        """
+        self._get_device(dev_id, "fxStopStreaming")
+
+    # -----
+    # read_device
+    # -----
+    def read_device(self, dev_id):
+        """
+        Returns the frame of the current tick.
+        """
+        device = self._get_device(dev_id, "fxReadDevice")
+        with device.lock:
+            return fxd.ActPackState.from_buffer_copy(device.state)
+
+    # -----
+    # set_gains
+    # -----
+    def set_gains(self, dev_id, kp, ki, kd, k_val, b_val, ff):
+        """
+        Keeps the gains, so that `get_gains` confirms them.
+        """
+        device = self._get_device(dev_id, "fxSetGains")
+        with device.lock:
+            device.gains = (kp, ki, kd, k_val, b_val, ff)
+
+    # -----
+    # get_gains
+    # -----
+    def get_gains(self, dev_id):
+        """
+        Returns the gains last set.
+        """
+        device = self._get_device(dev_id, "get_gains")
+        with device.lock:
+            return device.gains
+
+    # -----
+    # send_motor_command
+    # -----
+    def send_motor_command(self, dev_id, ctrl_mode, value):
+        """
+        Accepts the command. The recorded measurements don't depend on
+        it.
+        """
+        self._get_device(dev_id, "fxSendMotorCommand")
+
+    # -----
+    # get_app_type
+    # -----
+    def get_app_type(self, dev_id):
+        """
+        Every recorded device is an ActPack.
+        """
+        self._get_device(dev_id, "fxGetAppType")
+        return c.c_int(fxe.FX_ACT_PACK.value)
+
+    # -----
+    # _get_device
+    # -----
+    def _get_device(self, dev_id, name):
+        try:
+            return self.devices[dev_id]
+        except KeyError as err:
+            raise ValueError(f"{name}: invalid device ID: {dev_id}") from err
+
+
+# ============================================
+#               recorded_rows
+# ============================================
+def recorded_rows(recording, name, fields, offsets=None):
+    """
+    Yields the chunks of stream `name` of `recording` as the rows of a
+    `ReplayFlexSEA` device, one chunk at a time.
+
+    Parameters
+    ----------
+    recording : flexsea_demos.recording.Recording
+        The recorded run.
+
+    name : str
+        The stream the device's measurements were recorded in.
+
+    fields : dict
+        Maps `ActPackState` fields to the columns they're read from.
+
+    offsets : dict, optional
+        Maps fields to a value that's added to them, e.g., because the
+        demo recorded its measurements relative to where it started.
+    """
+    offsets = offsets if offsets else {}
+    for chunk in recording.chunks(name):
+        yield {
+            field: chunk[col] + offsets[field] if field in offsets else chunk[col]
+            for field, col in fields.items()
+        }
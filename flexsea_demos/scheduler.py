@@ -0,0 +1,275 @@
+import asyncio
+from array import array
+from time import perf_counter_ns
+from time import sleep
+
+
+# ============================================
+#               LoopScheduler
+# ============================================
+class LoopScheduler:
+    """
+    Paces a control loop on absolute deadlines.
+
+    Sleeping for a fixed `dt` every iteration makes the real period
+    `dt` plus however long the body of the loop took. Instead, the
+    scheduler keeps a grid of deadlines spaced exactly one period apart
+    (measured with a monotonic clock) and `wait` sleeps until the next
+    one, so time spent reading and writing is absorbed by the sleep
+    rather than added to it.
+
+    Parameters
+    ----------
+    freq : float
+        Loop frequency (in Hz).
+
+    spin_time : float, optional
+        The last `spin_time` seconds before each deadline are
+        busy-waited instead of slept, trading CPU for wake-up accuracy.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, freq, spin_time=0.0):
+        if freq <= 0:
+            raise ValueError(f"Invalid loop frequency: '{freq}'")
+        self.freq = freq
+        self.period_ns = int(round(1e9 / freq))
+        self.spin_ns = int(spin_time * 1e9)
+        self.start_ns = 0
+        self.stop_ns = 0
+        self.deadline_ns = 0
+        self.iterations = 0
+        self.overruns = 0
+        self.missed = 0
+        self.lateness = array("q")
+
+    # -----
+    # start
+    # -----
+    def start(self, start_ns=None):
+        """
+        Resets the statistics and places the first deadline one period
+        from now, or from `start_ns` (a `perf_counter_ns` time). Loops
+        in different processes given the same `start_ns` share a grid
+        of deadlines.
+        """
+        self.start_ns = perf_counter_ns() if start_ns is None else start_ns
+        self.stop_ns = 0
+        self.deadline_ns = self.start_ns + self.period_ns
+        self.iterations = 0
+        self.overruns = 0
+        self.missed = 0
+        self.lateness = array("q")
+
+    # -----
+    # resume
+    # -----
+    def resume(self, start_ns):
+        """
+        Moves the grid of deadlines so that the next one is a period
+        after `start_ns`, e.g., after the loop was paused. Unlike
+        `start`, the statistics are kept.
+        """
+        self.deadline_ns = start_ns + self.period_ns
+
+    # -----
+    # wait
+    # -----
+    def wait(self):
+        """
+        Blocks until the next deadline.
+
+        If the loop body took longer than a period the deadline has
+        already passed; this counts as an overrun and `wait` returns
+        immediately. Deadlines that were overrun by more than a whole
+        period are skipped (and counted as missed) rather than made up
+        for with a burst of back-to-back iterations.
+
+        Returns
+        -------
+        int
+            How late (in ns) the loop woke up relative to its deadline.
+        """
+        remaining = self.deadline_ns - perf_counter_ns()
+        if remaining > self.spin_ns:
+            sleep((remaining - self.spin_ns) / 1e9)
+        return self._wake(remaining <= 0)
+
+    # -----
+    # _wake
+    # -----
+    def _wake(self, overrun):
+        """
+        Spins until the deadline (unless it had already passed), records
+        how late the loop woke up and moves on to the next deadline.
+        """
+        deadline = self.deadline_ns
+        now = perf_counter_ns()
+        if overrun:
+            self.overruns += 1
+        else:
+            while now < deadline:
+                now = perf_counter_ns()
+
+        late = now - deadline
+        self.lateness.append(late)
+        self.iterations += 1
+
+        skipped = late // self.period_ns
+        self.missed += skipped
+        self.deadline_ns = deadline + (skipped + 1) * self.period_ns
+        return late
+
+    # -----
+    # stop
+    # -----
+    def stop(self):
+        """
+        Marks the end of the run.
+        """
+        self.stop_ns = perf_counter_ns()
+
+    # -----
+    # stats
+    # -----
+    def stats(self):
+        """
+        Summarizes the run.
+
+        Returns
+        -------
+        dict
+            Iteration count, achieved frequency, overrun and missed
+            deadline counts, and lateness percentiles (in us).
+        """
+        stop_ns = self.stop_ns if self.stop_ns else perf_counter_ns()
+        elapsed = (stop_ns - self.start_ns) / 1e9
+        lateness = sorted(self.lateness)
+        stats = {
+            "iterations": self.iterations,
+            "requested_freq": self.freq,
+            "achieved_freq": self.iterations / elapsed if elapsed > 0 else 0.0,
+            "overruns": self.overruns,
+            "missed": self.missed,
+        }
+        for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)):
+            stats[f"lateness_{name}_us"] = _percentile(lateness, q) / 1e3
+        return stats
+
+    # -----
+    # print_stats
+    # -----
+    def print_stats(self):
+        """
+        Prints the summary returned by `stats`.
+        """
+        stats = self.stats()
+        print("\nLoop Timing:")
+        print("------------")
+        print(f"Iterations: {stats['iterations']}")
+        print(f"Requested loop frequency (Hz): {stats['requested_freq']}")
+        print(f"Achieved loop frequency (Hz): {stats['achieved_freq']:.2f}")
+        print(f"Overruns: {stats['overruns']}")
+        print(f"Missed deadlines: {stats['missed']}")
+        print(
+            "Lateness (us): "
+            f"p50 {stats['lateness_p50_us']:.1f}, "
+            f"p90 {stats['lateness_p90_us']:.1f}, "
+            f"p99 {stats['lateness_p99_us']:.1f}, "
+            f"max {stats['lateness_max_us']:.1f}\n"
+        )
+
+
+# ============================================
+#             AsyncLoopScheduler
+# ============================================
+class AsyncLoopScheduler(LoopScheduler):
+    """
+    A `LoopScheduler` for coroutines: `wait` must be awaited and sleeps
+    with `asyncio.sleep`, so other tasks on the event loop keep running
+    until the deadline.
+
+    The event loop's timers are only accurate to about a millisecond,
+    so loops faster than a few hundred Hz should set `spin_time`.
+    """
+
+    # -----
+    # wait
+    # -----
+    async def wait(self):
+        """
+        Waits for the next deadline. See `LoopScheduler.wait`.
+
+        Returns
+        -------
+        int
+            How late (in ns) the loop woke up relative to its deadline.
+        """
+        remaining = self.deadline_ns - perf_counter_ns()
+        if remaining > self.spin_ns:
+            await asyncio.sleep((remaining - self.spin_ns) / 1e9)
+        return self._wake(remaining <= 0)
+
+
+# ============================================
+#             UnpacedScheduler
+# ============================================
+class UnpacedScheduler(LoopScheduler):
+    """
+    A `LoopScheduler` that never waits: every tick starts as soon as the
+    previous one is done, e.g., to feed a recorded run back through a
+    demo's loop faster than real time. `freq` is only reported as the
+    requested frequency, and lateness is always zero.
+
+    Parameters
+    ----------
+    freq : float
+        Frequency (in Hz) the loop would normally run at.
+
+    spin_time : float, optional
+        Ignored, so that the scheduler can replace a `LoopScheduler`.
+
+    on_wait : callable, optional
+        Called, with no arguments, at the start of every tick, i.e.,
+        every time the loop would have waited.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, freq, spin_time=0.0, on_wait=None):
+        super().__init__(freq, spin_time)
+        self.on_wait = on_wait
+
+    # -----
+    # wait
+    # -----
+    def wait(self):
+        """
+        Starts the next tick right away.
+
+        Returns
+        -------
+        int
+            Zero, the loop is never late.
+        """
+        if self.on_wait:
+            self.on_wait()
+        self.lateness.append(0)
+        self.iterations += 1
+        return 0
+
+
+# ============================================
+#                 _percentile
+# ============================================
+def _percentile(values, q):
+    """
+    Nearest-rank percentile of the already sorted sequence `values`.
+    """
+    if not values:
+        return 0
+    index = min(len(values) - 1, max(0, int(round(q * len(values))) - 1))
+    return values[index]
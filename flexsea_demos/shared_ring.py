@@ -0,0 +1,161 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Counters at the start of the block: rows written, rows read and rows
+# dropped because the ring was full
+_HEAD, _TAIL, _DROPPED = range(3)
+_COUNTERS = 3
+
+
+# ============================================
+#                SharedRing
+# ============================================
+class SharedRing:
+    """
+    Fixed-size queue of typed rows in shared memory, for handing the
+    telemetry of a control loop running in one process to another.
+
+    There must be a single writer, which calls `append` (with the same
+    arguments as `flexsea_demos.telemetry.TelemetryRecorder.append`),
+    and a single reader, which calls `read`. Rows are written straight
+    into the shared columns and the writer publishes them by advancing
+    a counter, so nothing is pickled or sent through a pipe. Neither
+    side ever waits for the other: if the ring is full, the row is
+    dropped and counted.
+
+    A ring is passed to another process by pickling it (e.g., as an
+    argument of `multiprocessing.Process`), which attaches the other
+    process to the same memory.
+
+    Parameters
+    ----------
+    columns : dict
+        Maps column names to NumPy dtypes, in `append` order.
+
+    capacity : int
+        Maximum number of rows waiting to be read.
+
+    name : str, optional
+        Name of an existing ring's shared memory block to attach to.
+        A new block is created if it's not given.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, columns, capacity, name=None):
+        self.columns = dict(columns)
+        self.capacity = int(capacity)
+        dtypes = [np.dtype(dtype) for dtype in self.columns.values()]
+        # Every column starts on an 8 byte boundary
+        sizes = [-(-self.capacity * dtype.itemsize // 8) * 8 for dtype in dtypes]
+        if name is None:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=8 * _COUNTERS + sum(sizes)
+            )
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = name is None
+
+        self._counters = np.ndarray(_COUNTERS, dtype=np.int64, buffer=self.shm.buf)
+        if self.owner:
+            self._counters[:] = 0
+        self.data = {}
+        offset = 8 * _COUNTERS
+        for (col, dtype), size in zip(zip(self.columns, dtypes), sizes):
+            self.data[col] = np.ndarray(
+                self.capacity, dtype=dtype, buffer=self.shm.buf, offset=offset
+            )
+            offset += size
+        self._arrays = list(self.data.values())
+        # Each counter is only ever written by one side, which keeps its
+        # own copy
+        self._head = int(self._counters[_HEAD])
+        self._tail = int(self._counters[_TAIL])
+
+    # -----
+    # __reduce__
+    # -----
+    def __reduce__(self):
+        return (self.__class__, (self.columns, self.capacity, self.shm.name))
+
+    # -----
+    # append
+    # -----
+    def append(self, *values):
+        """
+        Writes one row. `values` are given in column order.
+        """
+        head = self._head
+        if head - self._counters[_TAIL] >= self.capacity:
+            self._counters[_DROPPED] += 1
+            return
+        i = head % self.capacity
+        for array, value in zip(self._arrays, values):
+            array[i] = value
+        # Published only once the whole row is written
+        self._head = head + 1
+        self._counters[_HEAD] = self._head
+
+    # -----
+    # read
+    # -----
+    def read(self):
+        """
+        Takes the rows written since the last call off the ring.
+
+        Returns
+        -------
+        dict
+            Maps each column name to an array (a copy) of the new rows.
+        """
+        head = int(self._counters[_HEAD])
+        start = self._tail % self.capacity
+        stop = start + head - self._tail
+        if stop <= self.capacity:
+            rows = {col: array[start:stop].copy() for col, array in self.data.items()}
+        else:
+            stop -= self.capacity
+            rows = {
+                col: np.concatenate((array[start:], array[:stop]))
+                for col, array in self.data.items()
+            }
+        self._tail = head
+        self._counters[_TAIL] = head
+        return rows
+
+    # -----
+    # dropped
+    # -----
+    @property
+    def dropped(self):
+        """
+        Number of rows dropped because the ring was full.
+        """
+        return int(self._counters[_DROPPED])
+
+    # -----
+    # close
+    # -----
+    def close(self):
+        """
+        Detaches this process from the ring. The process that created
+        it also frees the memory.
+        """
+        # The block can't be closed while arrays still point into it
+        self.data = {}
+        self._arrays = []
+        self._counters = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # -----
+    # __len__
+    # -----
+    def __len__(self):
+        """
+        Number of rows waiting to be read.
+        """
+        return int(self._counters[_HEAD] - self._counters[_TAIL])
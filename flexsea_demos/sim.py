@@ -0,0 +1,496 @@
+import ctypes as c
+from math import exp
+from random import Random
+from threading import Lock
+from time import monotonic
+from time import sleep
+
+from flexsea import fxEnums as fxe
+from flexsea.dev_spec import AllDevices as fxd
+
+
+# ============================================
+#                 SimDevice
+# ============================================
+class SimDevice:
+    """
+    Holds the state of a single simulated device.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, dev_id, port, baud_rate):
+        self.dev_id = dev_id
+        self.port = port
+        self.baud_rate = baud_rate
+        self.lock = Lock()
+
+        self.streaming = False
+        self.stream_freq = 0
+        self.stream_start = 0.0
+        self.ready_at = 0.0
+        self.log_en = False
+
+        self.mode = fxe.FX_NONE.value
+        self.setpoint = 0.0
+        self.gains = (0, 0, 0, 0, 0, 0)
+
+        self.sim_time = 0.0
+        self.frame = -1
+        self.state = None
+        self.mot_ang = 0.0
+        self.mot_vel = 0.0
+        self.mot_cur = 0.0
+        self.mot_volt = 0.0
+
+        self.firmware_requested_at = None
+        self.bootloader_activated_at = None
+
+
+# ============================================
+#                 SimFlexSEA
+# ============================================
+class SimFlexSEA:
+    """
+    In-process stand-in for `flexsea.flexsea.FlexSEA`.
+
+    Implements the subset of the FlexSEA API used by
+    `flexsea_demos.device.Device` so that the demos can be run (and
+    timed) without any hardware attached. Every call can be given an
+    artificial latency to mimic the serial link, and the motor follows
+    simple first-order dynamics towards whatever setpoint it was last
+    commanded.
+
+    Parameters
+    ----------
+    latency : float
+        Default latency (in seconds) added to every library call.
+
+    call_latency : dict, optional
+        Per-call overrides of `latency`, keyed by method name, e.g.,
+        `{"read_device": 0.0004, "set_gains": 0.001}`.
+
+    current_tau : float
+        Time constant (in seconds) of the current loop.
+
+    position_tau : float
+        Time constant (in seconds) of the position loop.
+
+    velocity_tau : float
+        Mechanical time constant (in seconds) relating motor current to
+        motor velocity.
+
+    ticks_per_ma : float
+        Steady-state motor velocity (ticks/s) per mA of current.
+
+    resistance : float
+        Winding resistance (in ohms) used to turn voltage commands into
+        current.
+
+    initial_pos : int
+        Encoder position every simulated device starts at.
+
+    firmware : str
+        Version string (x.y.z) reported for every MCU.
+
+    firmware_delay : float
+        Time (in seconds) between a firmware version request and the
+        version becoming available.
+
+    bootloader_delay : float
+        Time (in seconds) between a bootloader activation request and
+        the bootloader reporting itself as active.
+
+    ready_delay : float
+        Time (in seconds) between a device starting to stream and it
+        reporting its app type and producing its first frame.
+
+    gain_drop_rate : float
+        Probability that a `set_gains` call is silently lost.
+
+    seed : int
+        Seed for the random number generator used to drop gain updates.
+
+    first_id : int
+        Id of the first device opened. Later ones count up from it.
+
+    Notes
+    -----
+    The frames' `state_time` is in microseconds (`state_time_unit`),
+    rather than the firmware's milliseconds, so that every frame has its
+    own `state_time` at any stream rate. It wraps around after about 35
+    minutes.
+    """
+
+    # Time (in seconds) of one unit of the frames' `state_time`
+    state_time_unit = 1e-6
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self,
+        latency=0.0,
+        call_latency=None,
+        current_tau=0.002,
+        position_tau=0.02,
+        velocity_tau=0.05,
+        ticks_per_ma=20.0,
+        resistance=0.5,
+        initial_pos=0,
+        firmware="7.2.3",
+        firmware_delay=0.5,
+        bootloader_delay=1.0,
+        ready_delay=0.05,
+        gain_drop_rate=0.0,
+        seed=0,
+        first_id=1000,
+    ):
+        self.latency = latency
+        self.call_latency = call_latency if call_latency else {}
+        self.current_tau = current_tau
+        self.position_tau = position_tau
+        self.velocity_tau = velocity_tau
+        self.ticks_per_ma = ticks_per_ma
+        self.resistance = resistance
+        self.initial_pos = initial_pos
+        self.firmware = _encode_version(firmware)
+        self.firmware_delay = firmware_delay
+        self.bootloader_delay = bootloader_delay
+        self.ready_delay = ready_delay
+        self.gain_drop_rate = gain_drop_rate
+        self.rng = Random(seed)
+
+        self.ids = []
+        self.devices = {}
+        self._next_id = first_id
+        self._lock = Lock()
+
+    # -----
+    # open
+    # -----
+    def open(self, port, baud_rate, log_level=4):
+        """
+        Establishes a (simulated) connection with a device.
+        """
+        self._delay("open")
+        with self._lock:
+            dev_id = self._next_id
+            self._next_id += 1
+            device = SimDevice(dev_id, port, baud_rate)
+            device.mot_ang = float(self.initial_pos)
+            device.setpoint = float(self.initial_pos)
+            self.devices[dev_id] = device
+            self.ids.append(dev_id)
+        return dev_id
+
+    # -----
+    # close
+    # -----
+    def close(self, dev_id):
+        """
+        Disconnects from the device with the given id.
+        """
+        self._delay("close")
+        with self._lock:
+            if dev_id not in self.devices:
+                raise ValueError("fxClose: invalid device ID")
+            del self.devices[dev_id]
+            self.ids.remove(dev_id)
+
+    # -----
+    # close_all
+    # -----
+    def close_all(self):
+        """
+        Disconnects from every device.
+        """
+        with self._lock:
+            self.devices.clear()
+            self.ids.clear()
+
+    # -----
+    # get_ids
+    # -----
+    def get_ids(self):
+        """
+        Returns the ids of all open devices.
+        """
+        return self.ids
+
+    # -----
+    # start_streaming
+    # -----
+    def start_streaming(self, dev_id, freq, log_en):
+        """
+        Starts streaming data from the device at `freq` Hz. Logging is
+        accepted but ignored.
+        """
+        device = self._get_device(dev_id, "fxStartStreaming")
+        with device.lock:
+            self._delay("start_streaming")
+            now = monotonic()
+            device.streaming = True
+            device.stream_freq = freq
+            device.stream_start = now
+            device.ready_at = now + self.ready_delay
+            device.sim_time = now
+            device.frame = -1
+            device.log_en = log_en
+
+    # -----
+    # stop_streaming
+    # -----
+    def stop_streaming(self, dev_id):
+        """
+        Stops streaming data from the device.
+        """
+        device = self._get_device(dev_id, "fxStopStreaming")
+        with device.lock:
+            self._delay("stop_streaming")
+            device.streaming = False
+
+    # -----
+    # read_device
+    # -----
+    def read_device(self, dev_id):
+        """
+        Returns the most recent frame streamed by the device. Frames
+        are produced at the streaming frequency, so reading faster than
+        that returns the same frame more than once.
+        """
+        device = self._get_device(dev_id, "fxReadDevice")
+        with device.lock:
+            self._delay("read_device")
+            if not device.streaming or monotonic() < device.ready_at:
+                raise RuntimeError("fxReadDevice: no read data")
+            frame = int((monotonic() - device.stream_start) * device.stream_freq)
+            if frame != device.frame:
+                frame_time = device.stream_start + frame / device.stream_freq
+                self._advance(device, frame_time)
+                device.frame = frame
+                device.state = self._get_state(device, frame)
+            state = fxd.ActPackState.from_buffer_copy(device.state)
+        return state
+
+    # -----
+    # set_gains
+    # -----
+    def set_gains(self, dev_id, kp, ki, kd, k_val, b_val, ff):
+        """
+        Stores the controller gains on the device. With probability
+        `gain_drop_rate` the update is lost without any error.
+        """
+        device = self._get_device(dev_id, "fxSetGains")
+        with device.lock:
+            self._delay("set_gains")
+            if self.rng.random() >= self.gain_drop_rate:
+                device.gains = (kp, ki, kd, k_val, b_val, ff)
+
+    # -----
+    # get_gains
+    # -----
+    def get_gains(self, dev_id):
+        """
+        Returns the gains the device is actually using. The real
+        library has no equivalent; `Device` uses this, when available,
+        to verify gain updates.
+        """
+        device = self._get_device(dev_id, "get_gains")
+        with device.lock:
+            self._delay("get_gains")
+            return device.gains
+
+    # -----
+    # send_motor_command
+    # -----
+    def send_motor_command(self, dev_id, ctrl_mode, value):
+        """
+        Changes the device's control mode and setpoint.
+        """
+        device = self._get_device(dev_id, "fxSendMotorCommand")
+        mode = getattr(ctrl_mode, "value", ctrl_mode)
+        if mode not in (
+            fxe.FX_POSITION.value,
+            fxe.FX_VOLTAGE.value,
+            fxe.FX_CURRENT.value,
+            fxe.FX_IMPEDANCE.value,
+            fxe.FX_NONE.value,
+        ):
+            raise ValueError(f"fxSendMotorCommand: Invalid control mode: {ctrl_mode}")
+        with device.lock:
+            self._delay("send_motor_command")
+            self._advance(device, monotonic())
+            device.mode = mode
+            device.setpoint = float(int(value))
+
+    # -----
+    # get_app_type
+    # -----
+    def get_app_type(self, dev_id):
+        """
+        Every simulated device is an ActPack, once it has started
+        streaming and `ready_delay` has passed.
+        """
+        self._delay("get_app_type")
+        device = self.devices.get(dev_id)
+        if device is None or not device.streaming or monotonic() < device.ready_at:
+            return c.c_int(fxe.FX_INVALID_APP.value)
+        return c.c_int(fxe.FX_ACT_PACK.value)
+
+    # -----
+    # find_poles
+    # -----
+    def find_poles(self, dev_id):
+        """
+        Pretends to find the motor poles.
+        """
+        self._get_device(dev_id, "fxFindPoles")
+        self._delay("find_poles")
+
+    # -----
+    # activate_bootloader
+    # -----
+    def activate_bootloader(self, dev_id, target):
+        """
+        Starts activating the bootloader. It reports itself as active
+        once `bootloader_delay` has passed.
+        """
+        device = self._get_device(dev_id, "fxActivateBootloader")
+        with device.lock:
+            self._delay("activate_bootloader")
+            if device.bootloader_activated_at is None:
+                device.bootloader_activated_at = monotonic()
+
+    # -----
+    # is_bootloader_activated
+    # -----
+    def is_bootloader_activated(self, dev_id):
+        """
+        Returns `FX_SUCCESS` if the bootloader is active and raises an
+        `IOError` otherwise, just like the real library.
+        """
+        device = self._get_device(dev_id, "fxIsBootloaderActivated")
+        with device.lock:
+            self._delay("is_bootloader_activated")
+            activated_at = device.bootloader_activated_at
+        if activated_at is None or monotonic() - activated_at < self.bootloader_delay:
+            raise IOError("fxIsBootloaderActivated: command failed")
+        return fxe.FX_SUCCESS.value
+
+    # -----
+    # request_firmware_version
+    # -----
+    def request_firmware_version(self, dev_id):
+        """
+        Requests the firmware versions of the onboard MCUs.
+        """
+        device = self._get_device(dev_id, "fxRequestFirmwareVersion")
+        with device.lock:
+            self._delay("request_firmware_version")
+            device.firmware_requested_at = monotonic()
+        return fxe.FX_SUCCESS.value
+
+    # -----
+    # get_last_received_firmware_version
+    # -----
+    def get_last_received_firmware_version(self, dev_id):
+        """
+        Returns the firmware versions. All fields are zero until
+        `firmware_delay` has passed since the request.
+        """
+        device = self._get_device(dev_id, "fxGetLastReceivedFirmwareVersion")
+        with device.lock:
+            self._delay("get_last_received_firmware_version")
+            requested_at = device.firmware_requested_at
+        fw = fxe.FW()
+        if (
+            requested_at is not None
+            and monotonic() - requested_at >= self.firmware_delay
+        ):
+            fw.Mn = fw.Ex = fw.Re = fw.Habs = self.firmware
+        return fw
+
+    # -----
+    # _get_device
+    # -----
+    def _get_device(self, dev_id, name):
+        try:
+            return self.devices[dev_id]
+        except KeyError as err:
+            raise ValueError(f"{name}: invalid device ID: {dev_id}") from err
+
+    # -----
+    # _delay
+    # -----
+    def _delay(self, name):
+        latency = self.call_latency.get(name, self.latency)
+        if latency > 0:
+            sleep(latency)
+
+    # -----
+    # _advance
+    # -----
+    def _advance(self, device, t):
+        """
+        Integrates the device's first-order dynamics up to time `t`.
+        """
+        dt = t - device.sim_time
+        if dt <= 0:
+            return
+        device.sim_time = t
+
+        if device.mode in (fxe.FX_POSITION.value, fxe.FX_IMPEDANCE.value):
+            old_ang = device.mot_ang
+            alpha = 1.0 - exp(-dt / self.position_tau)
+            device.mot_ang += (device.setpoint - device.mot_ang) * alpha
+            device.mot_vel = (device.mot_ang - old_ang) / dt
+            device.mot_cur = device.mot_vel / self.ticks_per_ma
+            device.mot_volt = device.mot_cur * self.resistance
+            return
+
+        if device.mode == fxe.FX_CURRENT.value:
+            target_cur = device.setpoint
+        elif device.mode == fxe.FX_VOLTAGE.value:
+            target_cur = device.setpoint / self.resistance
+        else:
+            target_cur = 0.0
+        alpha = 1.0 - exp(-dt / self.current_tau)
+        device.mot_cur += (target_cur - device.mot_cur) * alpha
+        alpha = 1.0 - exp(-dt / self.velocity_tau)
+        device.mot_vel += (device.mot_cur * self.ticks_per_ma - device.mot_vel) * alpha
+        device.mot_ang += device.mot_vel * dt
+        device.mot_volt = device.mot_cur * self.resistance
+
+    # -----
+    # _get_state
+    # -----
+    @staticmethod
+    def _get_state(device, frame):
+        state = fxd.ActPackState()
+        state.id = device.dev_id
+        # Computed from the frame number, so that rounding never gives
+        # two frames the same time
+        state.state_time = int(frame * 1000000 // device.stream_freq) % 2**31
+        state.SystemTime = state.state_time
+        state.accelz = 1000
+        state.mot_ang = int(device.mot_ang)
+        state.mot_vel = int(device.mot_vel)
+        state.mot_cur = int(device.mot_cur)
+        state.mot_volt = int(device.mot_volt)
+        state.batt_volt = 36000
+        state.temperature = 30
+        return state
+
+
+# ============================================
+#               _encode_version
+# ============================================
+def _encode_version(version):
+    """
+    Encodes an x.y.z version string the way the firmware does, i.e.,
+    as 2^x * 3^y * 5^z. This is the inverse of `fxUtils.decode`.
+    """
+    x, y, z = (int(v) for v in version.split("."))
+    return (2**x) * (3**y) * (5**z)
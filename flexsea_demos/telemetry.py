@@ -0,0 +1,254 @@
+import numpy as np
+
+
+# ============================================
+#             TelemetryRecorder
+# ============================================
+class TelemetryRecorder:
+    """
+    Preallocated, columnar storage for the data recorded by a control
+    loop.
+
+    Each column is a typed NumPy array that is written to by index, so
+    recording a sample doesn't allocate. If a run records more samples
+    than estimated, every column grows by `chunk_size` rows.
+
+    Parameters
+    ----------
+    columns : dict
+        Maps column names to NumPy dtypes. The order of the columns is
+        the order in which `append` expects its values.
+
+    capacity : int
+        Number of rows to preallocate.
+
+    chunk_size : int, optional
+        Number of rows to add when the recorder runs out of space.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, columns, capacity, chunk_size=4096):
+        self.columns = dict(columns)
+        self.capacity = max(int(capacity), 1)
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.data = {
+            name: np.zeros(self.capacity, dtype=dtype)
+            for name, dtype in self.columns.items()
+        }
+        self._arrays = list(self.data.values())
+        # Set by `RecordingWriter.add` to (writer, stream index)
+        self.stream = None
+        self._flushed = 0
+
+    # -----
+    # append
+    # -----
+    def append(self, *values):
+        """
+        Records one row. `values` are given in column order.
+        """
+        i = self.size
+        if i == self.capacity:
+            self._grow()
+        for array, value in zip(self._arrays, values):
+            array[i] = value
+        self.size = i + 1
+        if self.stream and self.size - self._flushed >= self.stream[0].chunk_size:
+            self.flush()
+
+    # -----
+    # extend
+    # -----
+    def extend(self, data):
+        """
+        Records several rows at once. `data` maps every column name to
+        an array of the new rows' values.
+        """
+        n_rows = len(data[next(iter(self.columns))])
+        while self.size + n_rows > self.capacity:
+            self._grow()
+        rows = slice(self.size, self.size + n_rows)
+        for name, array in self.data.items():
+            array[rows] = data[name]
+        self.size += n_rows
+        if self.stream and self.size - self._flushed >= self.stream[0].chunk_size:
+            self.flush()
+
+    # -----
+    # flush
+    # -----
+    def flush(self):
+        """
+        Hands the rows recorded since the last flush to the attached
+        `RecordingWriter`, if any. They are views: rows are never written
+        to again once appended, so nothing is copied.
+        """
+        if not self.stream or self.size == self._flushed:
+            return
+        writer, index = self.stream
+        rows = slice(self._flushed, self.size)
+        writer.write(index, [array[rows] for array in self._arrays])
+        self._flushed = self.size
+
+    # -----
+    # _grow
+    # -----
+    def _grow(self):
+        self.capacity += self.chunk_size
+        for name, array in self.data.items():
+            self.data[name] = np.resize(array, self.capacity)
+        self._arrays = list(self.data.values())
+
+    # -----
+    # seconds
+    # -----
+    def seconds(self, name):
+        """
+        Returns an integer nanosecond column converted to seconds.
+        """
+        return self[name] / 1e9
+
+    # -----
+    # as_dict
+    # -----
+    def as_dict(self):
+        """
+        Returns the recorded part of every column.
+        """
+        return {name: self[name] for name in self.data}
+
+    # -----
+    # chunks
+    # -----
+    def chunks(self):
+        """
+        Yields the recorded rows as a single chunk (see `as_dict`), so
+        that code that goes through a `flexsea_demos.recording.Recording`
+        stream one chunk at a time also takes a recorder.
+        """
+        yield self.as_dict()
+
+    # -----
+    # __getitem__
+    # -----
+    def __getitem__(self, name):
+        """
+        Returns a view of the recorded part of column `name`.
+        """
+        return self.data[name][: self.size]
+
+    # -----
+    # __len__
+    # -----
+    def __len__(self):
+        return self.size
+
+
+# ============================================
+#                percentiles
+# ============================================
+def percentiles(values, name, unit=None):
+    """
+    Summarizes `values` as their 50th, 90th and 99th percentiles and
+    their maximum, named `{name}_p50` to `{name}_max`, followed by
+    `_{unit}` if it's given. They are NaN if there are no values.
+    """
+    suffix = f"_{unit}" if unit else ""
+    keys = [f"{name}_{q}{suffix}" for q in ("p50", "p90", "p99", "max")]
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return dict.fromkeys(keys, np.nan)
+    return dict(zip(keys, (*np.percentile(values, (50, 90, 99)), np.max(values))))
+
+
+# ============================================
+#               ColumnSummary
+# ============================================
+class ColumnSummary:
+    """
+    Summarizes a column that's gone through one chunk at a time, e.g.,
+    from a `flexsea_demos.recording.Recording`, without holding all of
+    it: its mean and maximum, and the percentiles given when it's
+    created.
+
+    The percentiles are those `np.percentile` would return for the whole
+    column. Only the values at or above the lowest one are kept, which
+    is why the number of rows must be known up front.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of values that will be added.
+
+    qs : tuple, optional
+        Percentiles (0 to 100) to compute.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, n_rows, qs=()):
+        self.n_rows = n_rows
+        self.qs = tuple(qs)
+        self.count = 0
+        self.total = 0.0
+        self.max = np.nan
+        # Rank (from 0, ascending) of the lowest value any percentile
+        # needs; only the values from there up are kept
+        lowest = min(self.qs, default=100) / 100 * max(n_rows - 1, 0)
+        self._keep = n_rows - int(np.floor(lowest))
+        self._top = np.zeros(0, dtype=np.float64)
+
+    # -----
+    # add
+    # -----
+    def add(self, values):
+        """
+        Adds the next chunk of values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return
+        self.count += values.size
+        self.total += float(np.sum(values))
+        self.max = float(np.nanmax([self.max, np.max(values)]))
+        if self.qs:
+            top = np.concatenate((self._top, values))
+            if len(top) > self._keep:
+                top = np.partition(top, len(top) - self._keep)[-self._keep :]
+            self._top = top
+
+    # -----
+    # mean
+    # -----
+    @property
+    def mean(self):
+        """
+        The mean of the values added so far, NaN if there are none.
+        """
+        return self.total / self.count if self.count else np.nan
+
+    # -----
+    # percentile
+    # -----
+    def percentile(self, q):
+        """
+        Returns percentile `q`, one of those given when creating the
+        summary, once all `n_rows` values have been added.
+        """
+        if q not in self.qs:
+            raise ValueError(f"Percentile {q} wasn't asked for, only {self.qs}")
+        if self.count != self.n_rows:
+            raise ValueError(f"{self.count} of {self.n_rows} values were added")
+        if not self.count:
+            return np.nan
+        # Same linear interpolation as np.percentile, shifted to the
+        # values that were kept
+        rank = q / 100 * (self.n_rows - 1) - (self.n_rows - self._keep)
+        top = np.sort(self._top)
+        below = int(np.floor(rank))
+        above = min(below + 1, len(top) - 1)
+        return top[below] + (rank - below) * (top[above] - top[below])
@@ -0,0 +1,250 @@
+import numpy as np
+
+
+# ============================================
+#                  Segment
+# ============================================
+class Segment:
+    """
+    A run of consecutive ticks of a `Trajectory` that share a control
+    mode.
+
+    Parameters
+    ----------
+    name : str
+        Label used when printing or dumping the trajectory.
+
+    mode : ctypes.c_int
+        The flexsea control mode the ticks are sent with, or None for
+        ticks that only read the devices.
+
+    n_ticks : int
+        Number of ticks in the segment.
+
+    set_gains : bool
+        Whether the segment's gains are (re)written on each tick.
+
+    gains : dict
+        Controller gains to write if `set_gains` is True.
+
+    fill : callable, optional
+        Called with the segment right before it runs, to write the
+        setpoints that are only known at run time (e.g., ones that start
+        from a measured position) into its rows.
+
+    source : flexsea_demos.waveform.Waveform, optional
+        Where the segment's setpoints are streamed from (anything with a
+        `chunks` method and a length). Such segments take no rows in
+        the tables.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self, name, mode, n_ticks, set_gains=False, gains=None, fill=None, source=None
+    ):
+        self.name = name
+        self.mode = mode
+        self.n_ticks = int(n_ticks)
+        self.set_gains = set_gains
+        self.gains = gains
+        self.fill = fill
+        self.source = source
+        self.start = 0
+        self.stop = 0
+        self.values = {}
+
+    # -----
+    # __len__
+    # -----
+    def __len__(self):
+        return self.n_ticks
+
+
+# ============================================
+#                 Trajectory
+# ============================================
+class Trajectory:
+    """
+    Compiles a demo's setpoints into contiguous command tables before
+    its control loop starts.
+
+    A trajectory is a sequence of `Segment`s (ramps, holds, cycles of a
+    sine wave, etc.). `compile` concatenates them into one
+    `(n_ticks, n_devices)` array per column, with every offset, gain
+    and ramp already applied, so the control loop only has to index
+    them. Setpoints that depend on what the devices measure at run
+    time are written into their segment's rows, with one vectorized
+    operation, right before the segment runs. Segments too long to keep
+    in memory can be streamed from a `source` instead.
+
+    Parameters
+    ----------
+    n_devices : int
+        Number of devices (columns of each table).
+
+    columns : dict
+        Maps the name of each table (e.g., "pos", "cur") to its dtype.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, n_devices, columns):
+        self.n_devices = n_devices
+        self.columns = dict(columns)
+        self.segments = []
+        self.n_ticks = 0
+        self.n_rows = 0
+        self.tables = {}
+
+    # -----
+    # add
+    # -----
+    def add(
+        self,
+        name,
+        mode,
+        n_ticks,
+        set_gains=False,
+        gains=None,
+        fill=None,
+        source=None,
+        **values,
+    ):
+        """
+        Appends a segment.
+
+        Parameters
+        ----------
+        name, mode, n_ticks, set_gains, gains, fill, source
+            See `Segment`.
+
+        values : dict
+            The setpoints of each column, as anything that broadcasts to
+            `(n_ticks, n_devices)`: a scalar, a `(n_ticks, 1)` column
+            shared by every device, a `(n_devices,)` row of per-device
+            constants, or a full table. Columns that are left out are
+            zero.
+
+        Returns
+        -------
+        Segment
+            The new segment.
+        """
+        segment = Segment(name, mode, n_ticks, set_gains, gains, fill, source)
+        segment.values = values
+        segment.start = self.n_rows
+        segment.stop = self.n_rows if source else self.n_rows + segment.n_ticks
+        self.n_rows = segment.stop
+        self.n_ticks += segment.n_ticks
+        self.segments.append(segment)
+        return segment
+
+    # -----
+    # compile
+    # -----
+    def compile(self):
+        """
+        Allocates the tables and fills in every segment.
+
+        Returns
+        -------
+        Trajectory
+            self, so that building and compiling can be chained.
+        """
+        shape = (self.n_rows, self.n_devices)
+        self.tables = {
+            name: np.zeros(shape, dtype=dtype) for name, dtype in self.columns.items()
+        }
+        for segment in self.segments:
+            for name, values in segment.values.items():
+                self.tables[name][segment.start : segment.stop] = values
+            # The inputs aren't needed anymore
+            segment.values = {}
+        return self
+
+    # -----
+    # view
+    # -----
+    def view(self, name, segment):
+        """
+        Returns the rows of table `name` that belong to `segment`. It's
+        a view, so writing to it fills in run-time setpoints.
+        """
+        return self.tables[name][segment.start : segment.stop]
+
+    # -----
+    # chunks
+    # -----
+    def chunks(self, name, segment, chunk_size=4096):
+        """
+        Yields the setpoints of table `name` for `segment` as
+        `(n, n_devices)` arrays: its rows of the table, or blocks of at
+        most `chunk_size` rows if it's streamed from a source.
+        """
+        if segment.source is None:
+            yield self.view(name, segment)
+        else:
+            yield from segment.source.chunks(chunk_size)
+
+    # -----
+    # summary
+    # -----
+    def summary(self):
+        """
+        Returns one line per segment: its rows, mode and whether it
+        sets the gains.
+        """
+        lines = []
+        for segment in self.segments:
+            mode = segment.mode.value if segment.mode is not None else "-"
+            gains = ", sets gains" if segment.set_gains else ""
+            fill = ", filled at run time" if segment.fill else ""
+            if segment.source is None:
+                rows = f"rows {segment.start}-{segment.stop - 1}"
+            else:
+                rows = "streamed"
+            lines.append(
+                f"{segment.name:<12} {rows} ({len(segment)} ticks), "
+                f"mode {mode}{gains}{fill}"
+            )
+        return lines
+
+    # -----
+    # dump
+    # -----
+    def dump(self, path):
+        """
+        Writes the compiled tables to a CSV file, one row per tick.
+        Streamed segments aren't included.
+
+        The first columns are the tick, the segment's name, its control
+        mode and whether it sets the gains, followed by one column per
+        table and device, e.g., `pos_0, pos_1, cur_0, cur_1`.
+        """
+        names = np.empty(self.n_rows, dtype=object)
+        modes = np.full(self.n_rows, -1, dtype=np.int64)
+        set_gains = np.zeros(self.n_rows, dtype=np.int64)
+        for segment in self.segments:
+            rows = slice(segment.start, segment.stop)
+            names[rows] = segment.name
+            if segment.mode is not None:
+                modes[rows] = segment.mode.value
+            set_gains[rows] = segment.set_gains
+
+        header = ["tick", "segment", "mode", "set_gains"]
+        columns = [np.arange(self.n_rows), names, modes, set_gains]
+        for name, table in self.tables.items():
+            header.extend(f"{name}_{i}" for i in range(self.n_devices))
+            columns.extend(table.T)
+
+        np.savetxt(
+            path,
+            np.column_stack(columns),
+            fmt="%s",
+            delimiter=",",
+            header=",".join(header),
+            comments="",
+        )
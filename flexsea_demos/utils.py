@@ -1,10 +1,14 @@
+import csv
+import json
 import os
 
 from cleo.config import ApplicationConfig as BaseApplicationConfig
 from clikit.api.formatter import Style
-from flexsea import flexsea as flex
 import yaml
 
+# Extensions of the files `write_table` can write
+TABLE_FORMATS = (".json", ".csv")
+
 
 # ============================================
 #                    setup
@@ -28,7 +32,50 @@ def setup(cls, schema, param_file):
     params = read_yaml(param_file)
     params = validate(schema, params)
     assign_params(cls, params)
-    setattr(cls, "fxs", flex.FlexSEA())
+    setattr(cls, "fxs", get_backend(params))
+
+
+# ============================================
+#                get_backend
+# ============================================
+def get_backend(params):
+    """
+    Creates the object used to talk to the devices.
+
+    The optional `backend` parameter selects between the real flexsea
+    library (`flexsea`, the default) and the in-process simulator
+    (`sim`). When using the simulator, the optional `sim` parameter is
+    a dictionary of keyword arguments passed to
+    `flexsea_demos.sim.SimFlexSEA`.
+
+    Parameters
+    ----------
+    params : dict
+        The validated parameters read from the parameter file.
+
+    Raises
+    ------
+    ValueError
+        If the requested backend is unknown.
+
+    Returns
+    -------
+    flexsea.flexsea.FlexSEA or flexsea_demos.sim.SimFlexSEA
+        The backend.
+    """
+    backend = params.get("backend", "flexsea")
+    # Loading the C library, or the device structs the simulator needs,
+    # is slow, so only the backend that's used is imported
+    # pylint: disable=import-outside-toplevel
+    if backend == "flexsea":
+        from flexsea import flexsea as flex
+
+        return flex.FlexSEA()
+    if backend == "sim":
+        from flexsea_demos.sim import SimFlexSEA
+
+        return SimFlexSEA(**params.get("sim", {}))
+    raise ValueError(f"Unknown backend: '{backend}'")
 
 
 # ============================================
@@ -142,6 +189,45 @@ def sanitize_path(path):
     return path
 
 
+# ============================================
+#                print_table
+# ============================================
+def print_table(rows, columns):
+    """
+    Prints `rows`, dictionaries with a value for each of `columns`, as
+    a table with aligned columns.
+    """
+    widths = [
+        max([len(name)] + [len(str(row[name])) for row in rows]) for name in columns
+    ]
+    for cells in [columns] + [[row[name] for name in columns] for row in rows]:
+        print("  ".join(f"{str(cell):<{width}}" for cell, width in zip(cells, widths)))
+
+
+# ============================================
+#                write_table
+# ============================================
+def write_table(rows, columns, path):
+    """
+    Writes `rows`, dictionaries with a value for each of `columns`, to
+    `path` as a JSON list of rows or as CSV, depending on its extension.
+
+    Raises
+    ------
+    ValueError
+        If the extension isn't one of `TABLE_FORMATS`.
+    """
+    if not path.endswith(TABLE_FORMATS):
+        raise ValueError(f"Table files must be one of {TABLE_FORMATS}: '{path}'")
+    with open(path, "w", newline="", encoding="utf-8") as out_file:
+        if path.endswith(".json"):
+            json.dump(rows, out_file, indent=4)
+        else:
+            writer = csv.DictWriter(out_file, columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
 # ============================================
 #              ApplicationConfig
 # ============================================
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+
+# ============================================
+#                  Waveform
+# ============================================
+class Waveform:
+    """
+    Setpoints played back from a file through a memory map.
+
+    The file is never read into memory as a whole: `chunks` resamples
+    and returns one block of setpoints at a time, so only the pages
+    backing the current block are touched. Playback is deterministic.
+
+    Parameters
+    ----------
+    path : str
+        A `.npy` file, or a raw file of little-endian values (any other
+        extension). Either holds one row per sample and one column per
+        channel.
+
+    cmd_freq : float
+        Rate (in Hz) at which the setpoints are played.
+
+    columns : list, optional
+        The file columns to play, one per device. Defaults to the
+        first column.
+
+    rate : float, optional
+        Rate (in Hz) at which the file was recorded. If it isn't
+        `cmd_freq` the samples are linearly interpolated. Defaults to
+        `cmd_freq`.
+
+    dtype : str, optional
+        Type of the values of a raw file, e.g., "f4" or "i2". The byte
+        order is always little-endian. Ignored for `.npy` files.
+
+    width : int, optional
+        Number of columns of a raw file. Ignored for `.npy` files.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, path, cmd_freq, columns=None, rate=None, dtype="f8", width=1):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Could not find waveform file: '{path}'")
+        if os.path.splitext(path)[1] == ".npy":
+            data = np.load(path, mmap_mode="r")
+        else:
+            dtype = np.dtype(dtype).newbyteorder("<")
+            data = np.memmap(path, dtype=dtype, mode="r").reshape(-1, width)
+        if data.ndim == 1:
+            data = data.reshape(-1, 1)
+        if data.ndim != 2 or not len(data):
+            raise ValueError(f"Waveform file '{path}' has shape {data.shape}")
+
+        self.path = path
+        self.data = data
+        self.columns = list(columns) if columns else [0]
+        if max(self.columns) >= data.shape[1]:
+            raise ValueError(
+                f"Waveform file '{path}' has {data.shape[1]} columns, but column "
+                f"{max(self.columns)} was requested"
+            )
+        self.cmd_freq = float(cmd_freq)
+        self.rate = float(rate) if rate else self.cmd_freq
+        # Source samples per played sample
+        self.step = self.rate / self.cmd_freq
+        self.n_samples = int((len(data) - 1) / self.step) + 1
+
+    # -----
+    # __len__
+    # -----
+    def __len__(self):
+        """
+        Number of setpoints played, i.e., after resampling.
+        """
+        return self.n_samples
+
+    # -----
+    # chunks
+    # -----
+    def chunks(self, chunk_size=4096):
+        """
+        Yields the setpoints in order, as `(n, len(columns))` float
+        arrays of at most `chunk_size` rows.
+        """
+        for start in range(0, self.n_samples, chunk_size):
+            stop = min(start + chunk_size, self.n_samples)
+            yield self.get(start, stop)
+
+    # -----
+    # get
+    # -----
+    def get(self, start, stop):
+        """
+        Returns setpoints `start` to `stop` (exclusive) after
+        resampling.
+        """
+        if self.step == 1.0:
+            return np.asarray(self.data[start:stop, self.columns], dtype=np.float64)
+
+        position = np.arange(start, stop) * self.step
+        low = np.floor(position).astype(np.int64)
+        frac = (position - low)[:, None]
+        # Only the source rows spanned by this block are read
+        first = low[0]
+        last = min(low[-1] + 2, len(self.data))
+        window = np.asarray(self.data[first:last, self.columns], dtype=np.float64)
+        low -= first
+        high = np.minimum(low + 1, len(window) - 1)
+        return window[low] * (1 - frac) + window[high] * frac
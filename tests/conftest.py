@@ -0,0 +1,57 @@
+from collections import Counter
+
+from cleo import CommandTester
+import pytest
+import yaml
+
+from flexsea_demos.app import FlexseaDemoApplication
+from flexsea_demos.sim import SimFlexSEA
+
+
+@pytest.fixture
+def run_command(tmp_path, monkeypatch):
+    """
+    Runs a command of the application as the CLI would, answering its
+    prompts with ENTER.
+
+    The fixture is a function that takes the command's name, its
+    parameters (written to `params.yaml` in `tmp_path`, which is passed
+    as its parameter file) and any other arguments and options. It
+    returns the command's exit status. Commands that don't take a
+    parameter file are given `params=None`.
+    """
+    monkeypatch.setattr("builtins.input", lambda prompt: None)
+
+    def run(name, params=None, args=""):
+        if params is not None:
+            param_file = tmp_path / "params.yaml"
+            param_file.write_text(yaml.safe_dump(params))
+            args = f"{param_file} {args}"
+        command = FlexseaDemoApplication().find(name)
+        return CommandTester(command).execute(args.strip())
+
+    return run
+
+
+@pytest.fixture
+def sim_calls(monkeypatch):
+    """
+    Counts the calls made to `SimFlexSEA` methods.
+
+    The fixture is a function that takes the names of the methods to
+    count and returns a `Counter` keyed by `(method, device id)`.
+    """
+    calls = Counter()
+
+    def count(*names):
+        for name in names:
+            method = getattr(SimFlexSEA, name)
+
+            def counted(fxs, dev_id, *args, _name=name, _method=method):
+                calls[_name, dev_id] += 1
+                return _method(fxs, dev_id, *args)
+
+            monkeypatch.setattr(SimFlexSEA, name, counted)
+        return calls
+
+    return count
@@ -0,0 +1,26 @@
+from importlib import import_module
+
+from benchmarks.startup import loaded_modules
+from flexsea_demos.app import COMMANDS
+from flexsea_demos.app import FlexseaDemoApplication
+
+
+def test_registry_matches_commands():
+    app = FlexseaDemoApplication()
+    for name, _, _, description in COMMANDS:
+        lazy = app.find(name)
+        command = lazy.load()
+        assert command.config.name == name
+        assert command.config.description == description
+        assert lazy.config.description == description
+        # The whole signature, help texts and defaults included
+        assert command.signature == lazy.signature
+
+
+def test_commands_import():
+    for _, module, class_name, _ in COMMANDS:
+        assert hasattr(import_module(f"flexsea_demos.commands.{module}"), class_name)
+
+
+def test_no_heavy_imports_at_startup():
+    assert not loaded_modules()
@@ -0,0 +1,51 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from flexsea import fxEnums as fxe
+import pytest
+
+from flexsea_demos.async_device import AsyncDevice
+from flexsea_demos.scheduler import AsyncLoopScheduler
+from flexsea_demos.sim import SimFlexSEA
+
+
+def test_async_device():
+    gains = {"KP": 40, "KI": 400, "KD": 0, "K": 0, "B": 0, "FF": 128}
+    fxs = SimFlexSEA(latency=0.001, ready_delay=0.0)
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            devices = await asyncio.gather(
+                AsyncDevice.open(fxs, "sim0", 230400, executor),
+                AsyncDevice.open(fxs, "sim1", 230400, executor, read_freshness=1.0),
+            )
+            await asyncio.gather(*(device.set_gains(gains) for device in devices))
+            await asyncio.gather(
+                *(device.motor(fxe.FX_CURRENT, 500) for device in devices)
+            )
+            await asyncio.sleep(0.05)
+            data = await devices[0].read(max_age=0)
+            cached = await devices[1].read()
+            assert devices[1].stats["cached_reads"] >= 1
+            await asyncio.gather(*(device.close() for device in devices))
+        return data, cached
+
+    data, cached = asyncio.run(run())
+    assert data.mot_cur == pytest.approx(500, abs=5)
+    assert cached.mot_cur == 0
+    assert not fxs.get_ids()
+
+
+def test_async_scheduler():
+    scheduler = AsyncLoopScheduler(200, spin_time=0.002)
+
+    async def run():
+        scheduler.start()
+        for _ in range(20):
+            await scheduler.wait()
+        scheduler.stop()
+
+    asyncio.run(run())
+    stats = scheduler.stats()
+    assert stats["iterations"] == 20
+    assert stats["achieved_freq"] == pytest.approx(200, rel=0.2)
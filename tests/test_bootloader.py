@@ -0,0 +1,66 @@
+import csv
+from threading import Barrier
+
+import pytest
+
+from flexsea_demos.sim import SimFlexSEA
+
+
+def _bootloader(run_command, tmp_path, **params):
+    params = {
+        "ports": ["sim0", "sim1", "sim2"],
+        "baud_rate": 230400,
+        "target": "Mn",
+        "backend": "sim",
+        "output_file": str(tmp_path / "bootloader.csv"),
+        **params,
+    }
+    status = run_command("bootloader", params)
+    with open(tmp_path / "bootloader.csv", newline="", encoding="utf-8") as in_file:
+        return status, list(csv.DictReader(in_file))
+
+
+def test_ports_are_activated_at_once(run_command, sim_calls, tmp_path, monkeypatch):
+    # Every activation waits for the other two, so activating the ports
+    # one after the other would break the barrier
+    barrier = Barrier(3, timeout=5)
+    activate = SimFlexSEA.activate_bootloader
+
+    def activate_together(fxs, dev_id, target):
+        barrier.wait()
+        return activate(fxs, dev_id, target)
+
+    monkeypatch.setattr(SimFlexSEA, "activate_bootloader", activate_together)
+    calls = sim_calls("is_bootloader_activated")
+    status, rows = _bootloader(
+        run_command,
+        tmp_path,
+        sim={"ready_delay": 0.0, "bootloader_delay": 0.3},
+        poll_max=0.1,
+    )
+    assert status == 0
+    assert [row["port"] for row in rows] == ["sim0", "sim1", "sim2"]
+    for row in rows:
+        assert row["status"] == "activated"
+        assert float(row["time"]) >= 0.3
+        polls = int(row["polls"])
+        assert polls == calls["is_bootloader_activated", int(row["dev_id"])]
+        # Checked after 0.05, 0.15, 0.25 and 0.35 s at the latest, where
+        # polling every poll_min would take 6 checks
+        assert 1 <= polls <= 4
+
+
+def test_timeout(run_command, tmp_path):
+    status, rows = _bootloader(
+        run_command,
+        tmp_path,
+        sim={"ready_delay": 0.0, "bootloader_delay": 5.0},
+        timeout=0.2,
+    )
+    assert status == 1
+    assert [row["status"] for row in rows] == ["timeout"] * 3
+
+
+def test_invalid_target(run_command, tmp_path):
+    with pytest.raises(ValueError, match="Invalid target 'Foo'"):
+        _bootloader(run_command, tmp_path, target="Foo")
@@ -0,0 +1,31 @@
+from io import StringIO
+from time import sleep
+
+from flexsea_demos.dashboard import Dashboard
+from flexsea_demos.device import Device
+from flexsea_demos.sim import SimFlexSEA
+
+
+def test_render():
+    device = Device(SimFlexSEA(initial_pos=123), "sim0", 230400)
+    dashboard = Dashboard(stream=StringIO())
+    dashboard.publish("Device 0", device.read(), (("Desired", 5),))
+    dashboard.set_progress(2, 10)
+    lines = dashboard.render()
+    assert lines[0] == "[ Device 0 ]"
+    assert "Desired:              5" in lines
+    assert "Motor angle:          123" in lines
+    assert lines[-1] == "Run 3 of 10"
+    device.close()
+
+
+def test_rate_limited():
+    stream = StringIO()
+    with Dashboard(rate=20, stream=stream) as dashboard:
+        for i in range(2000):
+            dashboard.publish("Counter", values=(("i", i),))
+            sleep(0.0001)
+    # Far fewer repaints than updates, and the final one shows the
+    # latest value
+    assert 1 <= dashboard.frames < 100
+    assert stream.getvalue().endswith("i:                    1999\n\n\n")
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from flexsea_demos.downsample import downsample
+from flexsea_demos.downsample import downsample_chunks
+from flexsea_demos.downsample import lttb
+from flexsea_demos.downsample import min_max
+
+
+def test_lttb():
+    x = np.arange(10000) / 1000
+    y = np.sin(2 * np.pi * x)
+    y[5000] = 10  # A single sample spike
+
+    indices = lttb(x, y, 200)
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert (np.diff(indices) > 0).all()
+    assert 5000 in indices
+
+    assert (lttb(x[:100], y[:100], 200) == np.arange(100)).all()
+
+
+def test_min_max():
+    y = np.zeros(10001, dtype=np.int32)
+    y[1234] = -5
+    y[9999] = 7
+
+    indices = min_max(y, 100)
+    assert len(indices) <= 102
+    assert {0, 1234, 9999, 10000} <= set(indices)
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample(method):
+    times = np.linspace(0, 10, 100000)
+    requests = np.sign(np.sin(times)).astype(np.int32)
+    measurements = np.cos(times).astype(np.float32)
+
+    x, reqs, meas = downsample(
+        times, requests, measurements, max_points=500, method=method
+    )
+    assert len(x) == len(reqs) == len(meas) <= 1000
+    assert reqs.dtype == np.int32 and meas.dtype == np.float32
+    assert reqs.min() == requests.min() and reqs.max() == requests.max()
+    # The inputs are untouched
+    assert len(times) == 100000
+
+    assert downsample(times, requests, max_points=0)[1] is requests
+    with pytest.raises(ValueError):
+        downsample(times, requests, method="stride")
+
+
+def test_downsample_chunks():
+    x = np.arange(10000) / 1000
+    y = np.sin(2 * np.pi * x)
+    y[5000] = 10
+
+    chunks = [(x[i : i + 3000], y[i : i + 3000]) for i in range(0, len(x), 3000)]
+    times, values = downsample_chunks(chunks, len(x), max_points=200)
+    assert len(times) <= 200 + 2 * len(chunks)
+    assert (np.diff(times) > 0).all()
+    assert 10 in values
+
+    whole = downsample(x, y, max_points=200)
+    for ours, theirs in zip(downsample_chunks([(x, y)], len(x), 200), whole):
+        assert (ours == theirs).all()
@@ -0,0 +1,56 @@
+import csv
+from threading import Barrier
+
+from flexsea_demos.sim import SimFlexSEA
+
+
+def _check_version(run_command, tmp_path, **params):
+    params = {
+        "ports": ["sim0", "sim1", "sim2"],
+        "baud_rate": 230400,
+        "backend": "sim",
+        "output_file": str(tmp_path / "versions.csv"),
+        **params,
+    }
+    status = run_command("check_version", params)
+    with open(tmp_path / "versions.csv", newline="", encoding="utf-8") as in_file:
+        return status, list(csv.DictReader(in_file))
+
+
+def test_ports_are_queried_at_once(run_command, sim_calls, tmp_path, monkeypatch):
+    # Every request waits for the other two, so querying the ports one
+    # after the other would break the barrier
+    barrier = Barrier(3, timeout=5)
+    request = SimFlexSEA.request_firmware_version
+
+    def request_together(fxs, dev_id):
+        barrier.wait()
+        return request(fxs, dev_id)
+
+    monkeypatch.setattr(SimFlexSEA, "request_firmware_version", request_together)
+    calls = sim_calls("get_last_received_firmware_version")
+    status, rows = _check_version(
+        run_command,
+        tmp_path,
+        sim={"ready_delay": 0.0, "firmware_delay": 0.3, "firmware": "1.2.3"},
+    )
+    assert status == 0
+    assert [row["port"] for row in rows] == ["sim0", "sim1", "sim2"]
+    for row in rows:
+        assert row["status"] == "ok"
+        assert [row[mcu] for mcu in ("mn", "ex", "re", "habs")] == ["1.2.3"] * 4
+        assert float(row["time"]) >= 0.3
+        # Polled every 0.05 s, so the version is there by the 7th poll
+        polls = calls["get_last_received_firmware_version", int(row["dev_id"])]
+        assert 1 <= polls <= 7
+
+
+def test_timeout(run_command, tmp_path):
+    status, rows = _check_version(
+        run_command,
+        tmp_path,
+        sim={"ready_delay": 0.0, "firmware_delay": 5.0},
+        timeout=0.1,
+    )
+    assert status == 1
+    assert [row["status"] for row in rows] == ["timeout"] * 3
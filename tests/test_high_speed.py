@@ -0,0 +1,38 @@
+import numpy as np
+
+from flexsea_demos.commands.high_speed import HighSpeedCommand
+from flexsea_demos.device import Device
+from flexsea_demos.sim import SimFlexSEA
+from flexsea_demos.utils import assign_params
+
+
+def test_jittered_requests_are_kept():
+    command = HighSpeedCommand()
+    assign_params(
+        command,
+        {
+            "ports": ["sim0"],
+            "baud_rate": 230400,
+            "controller_type": 0,
+            "signal_type": 1,
+            "cmd_freq": 500,
+            "signal_amplitude": 500,
+            "nLoops": 1,
+            "signal_freq": 10,
+            "cycle_delay": 0.0,
+            "request_jitter": True,
+            "jitter": 20,
+        },
+    )
+    command.fxs = SimFlexSEA(ready_delay=0.0)
+    command._prepare()
+    device = Device(command.fxs, "sim0", 230400, stream_freq=500)
+    command.run_once(device)
+    device.close()
+
+    requests = command.trace["request"]
+    assert requests.dtype == np.float64
+    assert len(requests) == len(command.samples)
+    # The position setpoints as compiled, not truncated to whole ticks
+    assert np.any(requests != np.round(requests))
+    assert np.allclose(requests, np.asarray(command.samples) + command.pos0)
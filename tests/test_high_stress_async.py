@@ -0,0 +1,67 @@
+import asyncio
+from time import perf_counter_ns
+from types import SimpleNamespace
+
+from flexsea import fxEnums as fxe
+import pytest
+
+from flexsea_demos.commands.high_stress_async import HighStressAsyncCommand
+from flexsea_demos.telemetry import TelemetryRecorder
+
+
+class _Port:
+    """
+    Records when each call of a tick started.
+    """
+
+    def __init__(self):
+        self.calls = {}
+
+    def read(self):
+        self.calls["read"] = perf_counter_ns()
+        return SimpleNamespace(mot_ang=10, mot_cur=20)
+
+    def set_gains(self, gains):
+        self.calls["set_gains"] = perf_counter_ns()
+
+    def motor(self, mode, value):
+        self.calls["motor"] = perf_counter_ns()
+        self.calls["command"] = (mode, value)
+
+
+class _AsyncPort(_Port):
+    async def read(self):
+        return super().read()
+
+    async def set_gains(self, gains):
+        super().set_gains(gains)
+
+    async def motor(self, mode, value):
+        super().motor(mode, value)
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+@pytest.mark.parametrize("set_gains", [False, True])
+def test_both_modes_time_the_same_send(mode, set_gains):
+    command = HighStressAsyncCommand()
+    port = _Port() if mode == "sync" else _AsyncPort()
+    dev = {
+        "port": port,
+        "async": port,
+        "telemetry": TelemetryRecorder(command.telemetry_columns, 1),
+    }
+    segment = SimpleNamespace(mode=fxe.FX_CURRENT, set_gains=set_gains, gains={})
+    if mode == "sync":
+        sent = command.send_and_time_cmd(dev, 100, 200, segment)
+    else:
+        sent = asyncio.run(command.send_and_time_cmd_async(dev, 100, 200, segment))
+
+    # The skew is taken from when the motor command was sent, in both
+    assert port.calls["read"] <= sent <= port.calls["motor"]
+    if set_gains:
+        assert port.calls["set_gains"] <= sent
+    assert port.calls["command"] == (fxe.FX_CURRENT, 200)
+    assert dev["data"].mot_ang == 10
+    telemetry = dev["telemetry"]
+    assert len(telemetry) == 1
+    assert list(telemetry["curr_measurements"]) == [20]
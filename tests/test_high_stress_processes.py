@@ -0,0 +1,59 @@
+import csv
+
+import pytest
+
+from flexsea_demos.commands.high_stress_processes import HighStressProcessesCommand
+from flexsea_demos.commands.high_stress_processes import TICK_COLUMNS
+from flexsea_demos.shared_ring import SharedRing
+
+
+def test_high_stress_processes(run_command, tmp_path, capsys):
+    params = {
+        "ports": ["sim0", "sim1"],
+        "baud_rate": 230400,
+        "backend": "sim",
+        "sim": {"ready_delay": 0.0},
+        "cmd_freq": 200,
+        "position_amplitude": 1000,
+        "current_amplitude": 500,
+        "position_freq": 2,
+        "current_freq": 5,
+        "current_asymmetric_g": 1.15,
+        "nLoops": 2,
+        "plot_dir": str(tmp_path / "plots"),
+        "trajectory_file": str(tmp_path / "trajectory.csv"),
+    }
+    run_command("high_stress_processes", params)
+
+    out = capsys.readouterr().out
+    assert "Dispatch mode: processes (2 devices)" in out
+    assert "Device 1000: " in out and "Device 1001: " in out
+    with open(tmp_path / "trajectory.csv", encoding="utf-8") as in_file:
+        trajectory = list(csv.DictReader(in_file))
+    assert f"size(TIMESTAMPS): {len(trajectory)}" in out
+    # The second cycle's way back to the initial position starts from
+    # where each device was measured, which the workers filled in
+    step1 = [row for row in trajectory if row["segment"] == "step1"]
+    assert step1 and all(int(step1[0][f"pos_{i}"]) != 0 for i in range(2))
+
+
+def test_ring_overflow():
+    command = HighStressProcessesCommand()
+    command.ports = ["sim0", "sim1"]
+    for _ in command.ports:
+        command.devices.append(
+            {
+                "telemetry_ring": SharedRing(command.telemetry_columns, 4),
+                "tick_ring": SharedRing(TICK_COLUMNS, 4),
+            }
+        )
+    # The second device's worker got 2 ticks ahead of a full ring
+    for _ in range(6):
+        command.devices[1]["tick_ring"].append(0, 0, False)
+    try:
+        with pytest.raises(RuntimeError, match="'sim1' overflowed and dropped 2"):
+            command._collect()
+    finally:
+        for dev in command.devices:
+            dev["telemetry_ring"].close()
+            dev["tick_ring"].close()
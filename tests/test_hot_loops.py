@@ -0,0 +1,49 @@
+from benchmarks.hot_loops import compare
+from benchmarks.hot_loops import LOOPS
+from benchmarks.hot_loops import measure_loop
+from benchmarks.hot_loops import run_loop
+
+
+def test_compare_flags_regressions():
+    baseline = {
+        "device": {"read_ratio": 1.5, "motor_ratio": 1.0, "read_us": 1.0},
+        "read_only": {
+            "achieved_freq": 1000.0,
+            "iterations": 100,
+            "cost": 1.0,
+            "retained_blocks_per_tick": 0.0,
+        },
+    }
+    results = {
+        "device": {"read_ratio": 1.6, "motor_ratio": 2.0, "read_us": 9.0},
+        "read_only": {
+            "achieved_freq": 100.0,
+            "iterations": 50,
+            "cost": 1.3,
+            "retained_blocks_per_tick": 1.0,
+        },
+        "high_speed": {"cost": 9.0, "retained_blocks_per_tick": 9.0},
+    }
+
+    regressions = compare(results, baseline, tolerance=0.25)
+
+    # A slower host only shows in the frequencies and times, which
+    # aren't compared
+    assert len(regressions) == 3
+    assert regressions[0].startswith("device motor_ratio")
+    assert regressions[1].startswith("read_only cost")
+    assert regressions[2].startswith("read_only retained_blocks_per_tick")
+
+
+def test_every_loop_runs():
+    for name in LOOPS:
+        result = run_loop(name, ticks=200, rate=20000)
+        assert result["iterations"] > 0
+        assert result["achieved_freq"] > 0
+
+
+def test_measure_loop():
+    result = measure_loop("read_only", ticks=200, repeat=3)
+    assert result["iterations"] == 200
+    assert result["cost"] > 0
+    assert result["retained_blocks_per_tick"] >= 0
@@ -0,0 +1,17 @@
+def test_several_followers(run_command, capsys):
+    params = {
+        "ports": ["sim0", "sim1", "sim2"],
+        "baud_rate": 230400,
+        "run_time": 1,
+        "backend": "sim",
+        "sim": {"ready_delay": 0.0},
+        "cmd_freq": 200,
+        "display_rate": 20,
+    }
+    run_command("leader_follower", params)
+
+    out = capsys.readouterr().out
+    assert "Device 1001 following device 1000" in out
+    assert "Device 1002 following device 1000" in out
+    assert out.count("Follow latency (us)") == 2
+    assert out.count("Tracking error (ticks, 20 samples)") == 2
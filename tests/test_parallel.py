@@ -0,0 +1,53 @@
+import pytest
+
+
+def test_one_confirmation_and_output_per_port(run_command, monkeypatch, capsys):
+    params = {
+        "ports": ["sim0", "sim1", "sim2"],
+        "baud_rate": 230400,
+        "run_time": 1,
+        "backend": "sim",
+        "sim": {"ready_delay": 0.0},
+    }
+    prompts = []
+    monkeypatch.setattr("builtins.input", prompts.append)
+    run_command("read_only", params, "--parallel")
+
+    assert prompts == ["Press 'ENTER' to run 3 devices at once..."]
+    out = capsys.readouterr().out
+    sections = out.split("========== ")[1:]
+    assert [section.split(" ")[0] for section in sections] == ["sim0", "sim1", "sim2"]
+    for section in sections:
+        assert section.count("Loop Timing") == 1
+
+
+@pytest.mark.parametrize("demo", ["impedance_control", "two_position_control"])
+def test_loops_draw_through_the_dashboard(
+    run_command, tmp_path, monkeypatch, capsys, demo
+):
+    params = {
+        "ports": ["sim0", "sim1"],
+        "baud_rate": 230400,
+        "run_time": 1,
+        "backend": "sim",
+        "sim": {"ready_delay": 0.0},
+        "gains": {"KP": 40, "KI": 400, "KD": 0, "K": 300, "B": 1600, "FF": 0},
+        "transition_time": 0.2,
+        "delta": 7500,
+        "b_increments": 500,
+        "plot_dir": str(tmp_path / "plots"),
+    }
+    commands = []
+    monkeypatch.setattr("os.system", commands.append)
+    run_command(demo, params, "--parallel")
+
+    # Nothing clears the terminal behind the captured output, and the
+    # device data is drawn by the dashboard rather than held back in
+    # each port's output
+    assert commands == []
+    out = capsys.readouterr().out
+    dashboard, *sections = out.split("========== ")
+    assert "[ Device 1000 ]" in dashboard and "[ Device 1001 ]" in dashboard
+    assert len(sections) == 2
+    for section in sections:
+        assert "Motor angle" not in section
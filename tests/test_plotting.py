@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from flexsea_demos.commands.high_speed import draw_high_speed
+from flexsea_demos.plotting import plot
+from flexsea_demos.plotting import plot_positions
+from flexsea_demos.plotting import PlotExporter
+
+
+def test_export(tmp_path):
+    exporter = PlotExporter(str(tmp_path / "plots"), "svg")
+    times = np.linspace(0, 1, 100)
+    fig = plot(
+        plot_positions,
+        "positions",
+        exporter,
+        title="Test",
+        times=times,
+        requests=np.sin(times),
+        measurements=np.cos(times),
+    )
+    # Nothing is drawn in this process
+    assert fig == 1
+
+    plot(
+        draw_high_speed,
+        "high_speed_1",
+        exporter,
+        dev_id=1,
+        is_current=True,
+        sig_freq=1.0,
+        sig_amplitude=500,
+        sig_type="sine",
+        cmd_freq=1000.0,
+        times=times,
+        requests=times,
+        measurements=times,
+        cycle_stop_times=[0.5, 1.0],
+        write_times=times / 1e3,
+        read_times=times / 1e3,
+    )
+    assert exporter.join() == []
+    assert sorted(path.name for path in (tmp_path / "plots").iterdir()) == [
+        "high_speed_1_fig1.svg",
+        "high_speed_1_fig2.svg",
+        "high_speed_1_fig3.svg",
+        "high_speed_1_fig4.svg",
+        "high_speed_1_fig5.svg",
+        "positions_fig1.svg",
+    ]
+
+
+def test_export_failure(tmp_path):
+    exporter = PlotExporter(str(tmp_path), "png")
+    # Missing arguments make the drawing fail in the background process
+    plot(plot_positions, "broken", exporter, title="Test")
+    assert exporter.join() == ["broken"]
+
+    with pytest.raises(ValueError):
+        PlotExporter(str(tmp_path), "jpg")
@@ -0,0 +1,32 @@
+import numpy as np
+
+from flexsea_demos.recording import Recording
+
+
+def test_capture(run_command, tmp_path, capsys):
+    record_file = tmp_path / "capture.fxrec"
+    params = {
+        "ports": ["sim0"],
+        "baud_rate": 230400,
+        "run_time": 1,
+        "backend": "sim",
+        "sim": {"ready_delay": 0.0},
+        "device_options": {"stream_freq": 200},
+        "record_file": str(record_file),
+    }
+    run_command("read_only", params)
+    out = capsys.readouterr().out
+    assert "Frames captured:" in out
+
+    recording = Recording(str(record_file))
+    frames = recording["1000/frames"]
+    assert {"time", "state_time", "mot_ang", "accelz", "batt_volt"} <= set(frames)
+    # Polled 400 times, at twice the stream rate: every poll either got
+    # a new frame, which was kept, or one that was already kept
+    assert np.all(np.diff(frames["state_time"]) > 0)
+    duplicates = recording.meta["captures"]["1000"]["duplicates"]
+    assert len(frames["state_time"]) + duplicates == 400
+    assert duplicates > 0
+
+    run_command("replay", args=str(record_file))
+    assert "Device 1000 capture:" in capsys.readouterr().out
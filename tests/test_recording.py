@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from flexsea_demos.recording import Recording
+from flexsea_demos.recording import RecordingWriter
+from flexsea_demos.recording import zip_chunks
+from flexsea_demos.telemetry import TelemetryRecorder
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+def test_round_trip(tmp_path, compression):
+    path = str(tmp_path / "run.fxrec")
+    writer = RecordingWriter(
+        path, compression, chunk_size=100, meta={"command": "high_speed"}
+    )
+    trace = TelemetryRecorder({"time": np.int64, "request": np.float32}, 10)
+    timing = TelemetryRecorder({"read": np.int64}, 10)
+    writer.add(trace, "1000/trace")
+    writer.add(timing, "1000/timing")
+    for i in range(250):
+        trace.append(i * 1000, i / 2)
+        if i % 2:
+            timing.append(i)
+    writer.set_meta(cycle_stop_times=[0.1, 0.2])
+    writer.close()
+
+    stats = writer.stats()
+    # Two full chunks of the trace and one of the timing, then what was
+    # left of each when closing
+    assert stats["chunks"] == 5
+    assert stats["raw_bytes"] == 250 * 12 + 125 * 8
+    assert stats["dropped_rows"] == 0
+    assert stats["high_water"] <= stats["queue_size"]
+
+    recording = Recording(path)
+    assert recording.streams == ["1000/trace", "1000/timing"]
+    assert recording.meta == {"command": "high_speed", "cycle_stop_times": [0.1, 0.2]}
+    data = recording["1000/trace"]
+    assert (data["time"] == trace["time"]).all()
+    assert data["request"].dtype == np.float32
+    assert (data["request"] == trace["request"]).all()
+    assert (recording["1000/timing"]["read"] == np.arange(1, 250, 2)).all()
+
+
+def test_truncated(tmp_path):
+    path = str(tmp_path / "run.fxrec")
+    writer = RecordingWriter(path, chunk_size=10)
+    recorder = TelemetryRecorder({"value": np.int32}, 100)
+    writer.add(recorder, "values")
+    for i in range(25):
+        recorder.append(i)
+    writer.close()
+
+    # As if the demo had been killed while writing the last chunk
+    with open(path, "r+b") as out_file:
+        out_file.truncate(out_file.seek(0, 2) - 4)
+    assert (Recording(path)["values"]["value"] == np.arange(20)).all()
+
+    with pytest.raises(ValueError):
+        RecordingWriter(str(tmp_path / "run2.fxrec"), "gzip")
+
+
+def test_chunks(tmp_path):
+    path = str(tmp_path / "run.fxrec")
+    writer = RecordingWriter(path, chunk_size=10)
+    recorder = TelemetryRecorder({"value": np.int32}, 100)
+    writer.add(recorder, "values")
+    for i in range(25):
+        recorder.append(i)
+    writer.close()
+
+    with Recording(path) as recording:
+        chunks = [chunk["value"] for chunk in recording.chunks("values")]
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        # Views into the file, not copies
+        assert not chunks[0].flags.owndata and not chunks[0].flags.writeable
+        assert (np.concatenate(chunks) == recording["values"]["value"]).all()
+
+
+def test_stream(tmp_path):
+    path = str(tmp_path / "run.fxrec")
+    writer = RecordingWriter(path, chunk_size=10)
+    values = TelemetryRecorder({"value": np.int32}, 100)
+    empty = TelemetryRecorder({"value": np.int32}, 100)
+    writer.add(values, "values")
+    writer.add(empty, "empty")
+    for i in range(25):
+        values.append(i)
+    writer.close()
+
+    recorder = TelemetryRecorder({"time": np.int64}, 100)
+    for i in range(25):
+        recorder.append(i * 1000)
+    with Recording(path) as recording:
+        stream = recording.stream("values")
+        assert len(stream) == 25
+        # The recording's chunks of 10 rows are split to match the
+        # recorder's single one, and the other way around
+        zipped = list(zip_chunks(stream, recorder))
+        assert [len(chunk["value"]) for chunk, _ in zipped] == [10, 10, 5]
+        assert all(
+            (chunk["value"] * 1000 == times["time"]).all() for chunk, times in zipped
+        )
+
+        chunks = list(recording.stream("empty").chunks())
+        assert len(chunks) == 1 and chunks[0]["value"].dtype == np.int32
+        with pytest.raises(KeyError):
+            recording.stream("missing")
@@ -0,0 +1,140 @@
+from cleo import CommandTester
+import numpy as np
+import pytest
+
+from flexsea_demos.app import FlexseaDemoApplication
+from flexsea_demos.commands.replay import ReplayCommand
+from flexsea_demos.recording import Recording
+from flexsea_demos.recording import RecordingWriter
+from flexsea_demos.telemetry import TelemetryRecorder
+from flexsea_demos.utils import assign_params
+from flexsea_demos.utils import read_yaml
+
+
+def test_replay(tmp_path, capsys):
+    path = str(tmp_path / "run.fxrec")
+    params = read_yaml("param_files/two_position_control_params.yaml")
+    writer = RecordingWriter(
+        path, meta={"command": "two_position_control", "params": params}
+    )
+    for dev_id in (1000, 1001):
+        recorder = TelemetryRecorder(
+            {"times": np.float64, "requests": np.int64, "measurements": np.int64}, 10
+        )
+        writer.add(recorder, f"{dev_id}/positions")
+        for i in range(10):
+            recorder.append(i / 10, 100 * (i // 5), 90 * (i // 5))
+    writer.close()
+
+    command = FlexseaDemoApplication().find("replay")
+    tester = CommandTester(command)
+    tester.execute(f"{path} --plot-dir {tmp_path / 'plots'} --plot-format svg")
+    assert "20 rows in 2 streams" in capsys.readouterr().out
+    assert sorted(path.name for path in (tmp_path / "plots").iterdir()) == [
+        "two_position_control_1000_fig1.svg",
+        "two_position_control_1001_fig1.svg",
+    ]
+
+
+def _record(run_command, tmp_path, name, params):
+    """
+    Records a run of demo `name` on the simulator and returns the demo,
+    with the parameters it was run with, and the recording.
+    """
+    record_file = tmp_path / f"{name}.fxrec"
+    params = {
+        "baud_rate": 230400,
+        "backend": "sim",
+        "sim": {"ready_delay": 0.0},
+        "plot_dir": str(tmp_path / "plots"),
+        "record_file": str(record_file),
+        **params,
+    }
+    run_command(name, params)
+    recording = Recording(str(record_file))
+    demo = ReplayCommand()._get_demo(name, "rerun")
+    assign_params(demo, recording.meta["params"])
+    return demo, recording
+
+
+def test_rerun_high_stress(run_command, tmp_path, capsys):
+    demo, recording = _record(
+        run_command,
+        tmp_path,
+        "high_stress",
+        {
+            "ports": ["sim0", "sim1"],
+            "cmd_freq": 200,
+            "position_amplitude": 1000,
+            "current_amplitude": 500,
+            "position_freq": 2,
+            "current_freq": 5,
+            "current_asymmetric_g": 1.15,
+            "nLoops": 2,
+        },
+    )
+    capsys.readouterr()
+    with recording:
+        demo.rerun(recording)
+        for dev in demo.devices:
+            recorded = recording[f"{dev['dev_id']}/telemetry"]
+            # Every tick read what the device measured on that tick, and
+            # the setpoints compiled from it were those of the run
+            for col in ("pos_measurements", "curr_measurements", "pos_requests"):
+                assert (dev["telemetry"][col] == recorded[col]).all()
+    assert "Dispatch mode: serial (2 devices)" in capsys.readouterr().out
+
+
+def test_rerun_high_speed(run_command, tmp_path):
+    demo, recording = _record(
+        run_command,
+        tmp_path,
+        "high_speed",
+        {
+            "ports": ["sim0"],
+            "controller_type": 0,
+            "signal_type": 1,
+            "cmd_freq": 500,
+            "signal_amplitude": 500,
+            "nLoops": 2,
+            "signal_freq": 10,
+            "cycle_delay": 0.02,
+            "request_jitter": False,
+            "jitter": 20,
+        },
+    )
+    with recording:
+        demo.rerun(recording)
+        recorded = recording["1000/trace"]
+        assert (demo.trace["measurement"] == recorded["measurement"]).all()
+        assert (demo.trace["request"] == recorded["request"]).all()
+    assert demo.scheduler.stats()["iterations"] == len(demo.trace)
+
+
+def test_rerun_impedance_control(run_command, tmp_path):
+    demo, recording = _record(
+        run_command,
+        tmp_path,
+        "impedance_control",
+        {
+            "ports": ["sim0"],
+            "run_time": 1,
+            "gains": {"KP": 40, "KI": 400, "KD": 0, "K": 600, "B": 300, "FF": 128},
+            "transition_time": 0.2,
+            "delta": 7500,
+            "b_increments": 150,
+        },
+    )
+    with recording:
+        demo.rerun(recording)
+        recorded = recording["1000/positions"]
+        assert (demo.plot_data["measurements"] == recorded["measurements"]).all()
+        assert (demo.plot_data["requests"] == recorded["requests"]).all()
+
+    args = f"{tmp_path / 'impedance_control.fxrec'} --rerun"
+    assert run_command("replay", args=args) == 0
+
+
+def test_no_rerun():
+    with pytest.raises(ValueError, match="can't be rerun"):
+        ReplayCommand()._get_demo("high_stress_processes", "rerun")
@@ -0,0 +1,56 @@
+from time import perf_counter
+from time import sleep
+
+import pytest
+
+from flexsea_demos.scheduler import LoopScheduler
+from flexsea_demos.scheduler import UnpacedScheduler
+
+
+def test_no_drift():
+    # The loop body takes more than half a period, which a plain
+    # `sleep(dt)` loop would add to every iteration
+    scheduler = LoopScheduler(200, spin_time=0.0005)
+    scheduler.start()
+    begin = perf_counter()
+    for _ in range(40):
+        scheduler.wait()
+        sleep(0.003)
+    scheduler.stop()
+    assert perf_counter() - begin == pytest.approx(40 * 0.005 + 0.003, rel=0.2)
+    stats = scheduler.stats()
+    assert stats["iterations"] == 40
+    assert stats["achieved_freq"] == pytest.approx(200, rel=0.2)
+
+
+def test_overruns():
+    scheduler = LoopScheduler(1000)
+    scheduler.start()
+    scheduler.wait()
+    sleep(0.0055)
+    scheduler.wait()
+    scheduler.stop()
+    stats = scheduler.stats()
+    assert stats["overruns"] == 1
+    assert stats["missed"] >= 4
+    assert stats["lateness_max_us"] >= 4000
+
+
+def test_invalid_freq():
+    with pytest.raises(ValueError):
+        LoopScheduler(0)
+
+
+def test_unpaced():
+    ticks = []
+    scheduler = UnpacedScheduler(10, on_wait=lambda: ticks.append(1))
+    scheduler.start()
+    begin = perf_counter()
+    for _ in range(100):
+        scheduler.wait()
+    scheduler.stop()
+    # 10 s worth of ticks, without waiting for any of them
+    assert perf_counter() - begin < 1
+    assert len(ticks) == 100
+    stats = scheduler.stats()
+    assert stats["iterations"] == 100 and stats["lateness_max_us"] == 0
@@ -0,0 +1,54 @@
+import multiprocessing
+
+import numpy as np
+
+from flexsea_demos.shared_ring import SharedRing
+
+
+def _write(ring, n_rows):
+    for i in range(n_rows):
+        ring.append(i, i / 2)
+    ring.close()
+
+
+def test_read_and_wrap():
+    ring = SharedRing({"tick": np.int64, "value": np.float32}, 4)
+    try:
+        for i in range(3):
+            ring.append(i, i / 2)
+        assert len(ring) == 3
+        rows = ring.read()
+        assert list(rows["tick"]) == [0, 1, 2]
+        assert rows["value"].dtype == np.float32
+        # Wraps around the end of the columns
+        for i in range(3, 7):
+            ring.append(i, i / 2)
+        assert list(ring.read()["tick"]) == [3, 4, 5, 6]
+        assert len(ring.read()["tick"]) == 0
+    finally:
+        ring.close()
+
+
+def test_full_ring_drops():
+    ring = SharedRing({"tick": np.int64}, 2)
+    try:
+        for i in range(5):
+            ring.append(i)
+        assert ring.dropped == 3
+        assert list(ring.read()["tick"]) == [0, 1]
+    finally:
+        ring.close()
+
+
+def test_other_process():
+    ring = SharedRing({"tick": np.int64, "value": np.float64}, 1000)
+    try:
+        context = multiprocessing.get_context("spawn")
+        process = context.Process(target=_write, args=(ring, 500))
+        process.start()
+        process.join()
+        rows = ring.read()
+        assert list(rows["tick"]) == list(range(500))
+        assert rows["value"][-1] == 249.5
+    finally:
+        ring.close()
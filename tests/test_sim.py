@@ -0,0 +1,157 @@
+from time import sleep
+
+from flexsea import fxEnums as fxe
+from flexsea import fxUtils as fxu
+import pytest
+
+from flexsea_demos.device import Device
+from flexsea_demos.device import open_devices
+from flexsea_demos.sim import SimFlexSEA
+from flexsea_demos.utils import get_backend
+
+
+def test_get_backend():
+    fxs = get_backend({"backend": "sim", "sim": {"latency": 0.001}})
+    assert isinstance(fxs, SimFlexSEA)
+    assert fxs.latency == 0.001
+    with pytest.raises(ValueError):
+        get_backend({"backend": "bogus"})
+
+
+def test_current_dynamics():
+    fxs = SimFlexSEA(ready_delay=0.0)
+    dev_id = fxs.open("sim0", 230400)
+    fxs.start_streaming(dev_id, freq=1000, log_en=False)
+    fxs.send_motor_command(dev_id, fxe.FX_CURRENT, 1000)
+    sleep(0.05)
+    data = fxs.read_device(dev_id)
+    assert data.mot_cur == pytest.approx(1000, abs=5)
+    assert data.mot_ang > 0
+
+
+def test_position_dynamics():
+    fxs = SimFlexSEA(initial_pos=100)
+    device = Device(fxs, "sim0", 230400)
+    assert device.initial_pos == 100
+    device.motor(fxe.FX_POSITION, 5000)
+    sleep(0.2)
+    assert device.get_pos() == pytest.approx(5000, abs=10)
+    device.close()
+    assert not fxs.get_ids()
+
+
+def test_firmware_version():
+    fxs = SimFlexSEA(firmware="1.2.3", firmware_delay=0.0)
+    dev_id = fxs.open("sim0", 230400)
+    assert fxs.request_firmware_version(dev_id) == fxe.FX_SUCCESS.value
+    fw = fxs.get_last_received_firmware_version(dev_id)
+    assert fxu.decode(fw.Mn) == "1.2.3"
+
+
+def test_bootloader():
+    fxs = SimFlexSEA(bootloader_delay=0.0)
+    dev_id = fxs.open("sim0", 230400)
+    with pytest.raises(IOError):
+        fxs.is_bootloader_activated(dev_id)
+    fxs.activate_bootloader(dev_id, 3)
+    assert fxs.is_bootloader_activated(dev_id) == fxe.FX_SUCCESS.value
+
+
+def test_gain_cache():
+    gains = {"KP": 40, "KI": 400, "KD": 0, "K": 0, "B": 0, "FF": 128}
+    fxs = SimFlexSEA()
+    device = Device(fxs, "sim0", 230400)
+    device.set_gains(gains)
+    device.set_gains(dict(gains))
+    assert device.stats["gain_writes"] == 1
+    assert device.stats["gain_skips"] == 1
+    device.set_gains(gains, force=True)
+    assert device.stats["gain_writes"] == 2
+    assert fxs.get_gains(device.dev_id) == (40, 400, 0, 0, 0, 128)
+
+
+def test_gain_retries():
+    gains = {"KP": 1, "KI": 2, "KD": 3, "K": 4, "B": 5, "FF": 6}
+    fxs = SimFlexSEA(gain_drop_rate=0.5, seed=1)
+    device = Device(fxs, "sim0", 230400, gain_retries=20)
+    device.set_gains(gains)
+    assert device.stats["gain_retries"] > 0
+    assert fxs.get_gains(device.dev_id) == (1, 2, 3, 4, 5, 6)
+
+    fxs.gain_drop_rate = 1.0
+    device.gain_retries = 2
+    with pytest.raises(IOError):
+        device.set_gains({**gains, "KP": 10})
+    assert device.gains is None
+
+
+def test_gain_resends():
+    class NoReadBack(SimFlexSEA):
+        # Like flexsea, which can't report the device's gains
+        get_gains = None
+
+    gains = {"KP": 1, "KI": 2, "KD": 3, "K": 4, "B": 5, "FF": 6}
+    fxs = NoReadBack(gain_drop_rate=0.5, seed=1)
+    device = Device(fxs, "sim0", 230400, gain_resends=5)
+    device.set_gains(gains)
+    device.set_gains(gains)
+    assert device.stats["gain_writes"] == 5
+    assert device.stats["gain_skips"] == 1
+    assert fxs.devices[device.dev_id].gains == (1, 2, 3, 4, 5, 6)
+
+
+def test_read_cache():
+    device = Device(SimFlexSEA(), "sim0", 230400, read_freshness=0.05)
+    reads = device.stats["reads"]
+    data = device.read()
+    assert device.read() is data
+    assert device.get_pos() == data.mot_ang
+    assert device.stats["cached_reads"] >= 2
+    assert device.read(max_age=0) is not data
+    assert device.stats["reads"] == reads + 1
+
+
+def test_stale_frames():
+    fxs = SimFlexSEA()
+    device = Device(fxs, "sim0", 230400, stream_freq=10, log_en=False)
+    assert fxs.devices[device.dev_id].stream_freq == 10
+    assert not fxs.devices[device.dev_id].log_en
+    device.read(max_age=0)
+    device.read(max_age=0)
+    assert device.stats["stale_reads"] >= 1
+
+
+def test_state_time():
+    fxs = SimFlexSEA()
+    dev_id = fxs.open("sim0", 230400)
+    fxs.start_streaming(dev_id, freq=3000, log_en=False)
+    device = fxs.devices[dev_id]
+    times = [fxs._get_state(device, frame).state_time for frame in range(9000)]
+    # Every frame has its own time, even above 1 kHz
+    assert all(b > a for a, b in zip(times, times[1:]))
+    assert times[3000] * fxs.state_time_unit == pytest.approx(1.0)
+
+
+def test_readiness():
+    fxs = SimFlexSEA(ready_delay=0.1)
+    device = Device(fxs, "sim0", 230400)
+    assert 0.1 <= device.time_to_ready < 0.5
+
+    fxs.ready_delay = 10.0
+    with pytest.raises(KeyError):
+        Device(fxs, "sim1", 230400, ready_timeout=0.05)
+
+
+def test_open_devices():
+    fxs = SimFlexSEA(latency=0.001, ready_delay=0.2)
+    ports = ["sim0", "sim1", "sim2", "sim3"]
+    devices = open_devices(fxs, ports, 230400, stream_freq=500)
+    assert [device.port for device in devices] == ports
+    assert max(device.time_to_ready for device in devices) < 0.6
+    assert all(fxs.devices[device.dev_id].stream_freq == 500 for device in devices)
+
+    fxs.close_all()
+    fxs.ready_delay = 10.0
+    with pytest.raises(KeyError):
+        open_devices(fxs, ports, 230400, ready_timeout=0.05)
+    assert not fxs.get_ids()
@@ -0,0 +1,107 @@
+import csv
+import json
+
+import pytest
+import yaml
+
+from flexsea_demos.device import Device
+
+
+def _sweep(run_command, tmp_path, base, sweep):
+    (tmp_path / "base.yaml").write_text(yaml.safe_dump(base))
+    run_command("sweep", {"base": "base.yaml", **sweep})
+
+
+def test_grid_and_runs(run_command, tmp_path):
+    base = {
+        "ports": ["sim0", "sim1"],
+        "baud_rate": 230400,
+        "backend": "sim",
+        "sim": {"ready_delay": 0.0},
+        "controller_type": 0,
+        "signal_type": 1,
+        "cmd_freq": 500,
+        "signal_amplitude": 500,
+        "nLoops": 1,
+        "signal_freq": 10,
+        "cycle_delay": 0.0,
+        "request_jitter": False,
+        "jitter": 20,
+    }
+    summary_file = tmp_path / "summary.csv"
+    _sweep(
+        run_command,
+        tmp_path,
+        base,
+        {
+            "demo": "high_speed",
+            "grid": {"cmd_freq": [200, 400]},
+            "runs": [{}, {"pos_gains.KP": 100}],
+            "summary_file": str(summary_file),
+        },
+    )
+
+    with open(summary_file, newline="", encoding="utf-8") as in_file:
+        rows = list(csv.DictReader(in_file))
+    # Two runs of the grid for each entry of runs, on both devices
+    assert [(row["run"], row["device"]) for row in rows] == [
+        (str(run), str(device)) for run in range(1, 5) for device in (1000, 1001)
+    ]
+    assert [row["cmd_freq"] for row in rows[::2]] == ["200", "400", "200", "400"]
+    assert [row["pos_gains.KP"] for row in rows[::2]] == ["", "", "100", "100"]
+    for row in rows:
+        assert float(row["achieved_freq"]) > 0.5 * int(row["cmd_freq"])
+        assert float(row["read_p99_us"]) > 0
+        assert row["error_p99"]
+
+
+def test_fixed_params_cant_be_swept(run_command, tmp_path):
+    base = {"ports": ["sim0"], "baud_rate": 230400, "run_time": 1, "gains": {}}
+    with pytest.raises(ValueError, match="'ports' can't be swept"):
+        _sweep(
+            run_command,
+            tmp_path,
+            base,
+            {"demo": "position_control", "grid": {"ports": [["sim0"], ["sim1"]]}},
+        )
+
+
+def test_every_device_starts_from_the_run_params(run_command, tmp_path, monkeypatch):
+    first_b = {}
+    set_gains = Device.set_gains
+
+    def record_first_b(device, gains, force=False):
+        first_b.setdefault(device.dev_id, gains["B"])
+        set_gains(device, gains, force)
+
+    monkeypatch.setattr(Device, "set_gains", record_first_b)
+    base = {
+        "ports": ["sim0", "sim1"],
+        "baud_rate": 230400,
+        "backend": "sim",
+        "sim": {"ready_delay": 0.0},
+        "run_time": 1,
+        "gains": {"KP": 40, "KI": 400, "KD": 0, "K": 300, "B": 1600, "FF": 0},
+        "transition_time": 0.2,
+        "delta": 7500,
+        "b_increments": 500,
+    }
+    summary_file = tmp_path / "summary.json"
+    _sweep(
+        run_command,
+        tmp_path,
+        base,
+        {
+            "demo": "impedance_control",
+            "grid": {"gains.K": [300]},
+            "summary_file": str(summary_file),
+        },
+    )
+
+    # impedance_control raises B as it runs, but only its own copy
+    assert first_b == {1000: 1600, 1001: 1600}
+    rows = json.loads(summary_file.read_text())
+    assert [(row["run"], row["device"], row["gains.K"]) for row in rows] == [
+        (1, 1000, 300),
+        (1, 1001, 300),
+    ]
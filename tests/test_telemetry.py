@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from flexsea_demos.telemetry import ColumnSummary
+from flexsea_demos.telemetry import TelemetryRecorder
+
+
+def test_append():
+    recorder = TelemetryRecorder({"time": np.int64, "current": np.float32}, 4)
+    recorder.append(1_500_000_000, 1.5)
+    recorder.append(2_000_000_000, -2.0)
+    assert len(recorder) == 2
+    assert recorder["time"].dtype == np.int64
+    assert recorder["current"].dtype == np.float32
+    assert list(recorder["current"]) == [1.5, -2.0]
+    assert list(recorder.seconds("time")) == [1.5, 2.0]
+
+
+def test_grow():
+    recorder = TelemetryRecorder({"pos": np.int32}, 2, chunk_size=3)
+    for i in range(6):
+        recorder.append(i)
+    assert recorder.capacity == 8
+    assert list(recorder["pos"]) == list(range(6))
+    assert list(recorder.as_dict()) == ["pos"]
+
+
+def test_column_summary():
+    values = np.random.default_rng(0).normal(size=1001)
+    summary = ColumnSummary(len(values), qs=(50, 99))
+    for start in range(0, len(values), 64):
+        summary.add(values[start : start + 64])
+    assert summary.mean == pytest.approx(np.mean(values))
+    assert summary.max == np.max(values)
+    for q in (50, 99):
+        assert summary.percentile(q) == pytest.approx(np.percentile(values, q))
+    # Only the values from the median up are kept
+    assert len(summary._top) <= 501
+
+    with pytest.raises(ValueError):
+        summary.percentile(90)
+    assert np.isnan(ColumnSummary(0, qs=(99,)).percentile(99))
@@ -0,0 +1,43 @@
+from flexsea import fxEnums as fxe
+import numpy as np
+
+from flexsea_demos.trajectory import Trajectory
+
+
+def test_compile():
+    trajectory = Trajectory(2, {"pos": np.int64, "cur": np.int64})
+    initial_pos = np.array([100, -100])
+    hold = trajectory.add("hold", fxe.FX_POSITION, 2, set_gains=True, pos=initial_pos)
+    sine = trajectory.add(
+        "sine", fxe.FX_POSITION, 4, pos=np.arange(4)[:, None] + initial_pos
+    )
+    ramp = trajectory.add(
+        "ramp", fxe.FX_CURRENT, 3, cur=np.array([30, 20, 10])[:, None]
+    )
+    trajectory.compile()
+
+    assert trajectory.n_ticks == 9
+    assert trajectory.tables["pos"].shape == (9, 2)
+    assert trajectory.tables["pos"].flags["C_CONTIGUOUS"]
+    assert (trajectory.view("pos", hold) == [[100, -100], [100, -100]]).all()
+    assert (trajectory.view("pos", sine)[:, 1] == [-100, -99, -98, -97]).all()
+    assert (trajectory.view("cur", ramp)[:, 0] == [30, 20, 10]).all()
+    assert (trajectory.view("pos", ramp) == 0).all()
+
+    # Run-time setpoints are written in place
+    trajectory.view("pos", hold)[:] = [5, 6]
+    assert (trajectory.tables["pos"][:2] == [[5, 6], [5, 6]]).all()
+
+
+def test_dump(tmp_path):
+    trajectory = Trajectory(1, {"voltage": np.float64})
+    trajectory.add("up", fxe.FX_VOLTAGE, 2, voltage=np.array([[0.0], [-500.0]]))
+    trajectory.add("wait", None, 1)
+    trajectory.compile()
+    path = tmp_path / "trajectory.csv"
+    trajectory.dump(path)
+    lines = path.read_text().splitlines()
+    assert lines[0] == "tick,segment,mode,set_gains,voltage_0"
+    assert lines[2] == f"1,up,{fxe.FX_VOLTAGE.value},0,-500.0"
+    assert lines[3] == "2,wait,-1,0,0.0"
+    assert len(trajectory.summary()) == 2
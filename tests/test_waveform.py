@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from flexsea_demos.trajectory import Trajectory
+from flexsea_demos.waveform import Waveform
+
+
+def test_npy(tmp_path):
+    path = str(tmp_path / "gait.npy")
+    data = np.column_stack([np.arange(10), 10 * np.arange(10)]).astype(np.float32)
+    np.save(path, data)
+
+    waveform = Waveform(path, 100, columns=[1])
+    assert len(waveform) == 10
+    assert isinstance(waveform.data, np.memmap)
+    chunks = list(waveform.chunks(chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert (np.concatenate(chunks)[:, 0] == data[:, 1]).all()
+
+    with pytest.raises(ValueError):
+        Waveform(path, 100, columns=[2])
+
+
+def test_raw_resampling(tmp_path):
+    path = str(tmp_path / "gait.raw")
+    np.array([[0, 5], [100, 5], [200, 5]], dtype="<i2").tofile(path)
+
+    # Recorded at 50 Hz, played at 200 Hz
+    waveform = Waveform(path, 200, columns=[0, 1], rate=50, dtype="i2", width=2)
+    assert len(waveform) == 9
+    played = np.concatenate(list(waveform.chunks(chunk_size=2)))
+    assert played[:, 0] == pytest.approx(np.arange(0, 201, 25))
+    assert (played[:, 1] == 5).all()
+
+    # Played at a lower rate than it was recorded
+    waveform = Waveform(path, 25, columns=[0], rate=50, dtype="i2", width=2)
+    assert np.concatenate(list(waveform.chunks()))[:, 0] == pytest.approx([0, 200])
+
+
+def test_streamed_segment(tmp_path):
+    path = str(tmp_path / "gait.npy")
+    np.save(path, np.arange(5.0))
+    waveform = Waveform(path, 100)
+
+    trajectory = Trajectory(1, {"request": np.float64})
+    hold = trajectory.add("hold", None, 2, request=7)
+    played = trajectory.add("file", None, len(waveform), source=waveform)
+    trajectory.compile()
+    assert trajectory.n_ticks == 7
+    assert trajectory.tables["request"].shape == (2, 1)
+    streamed = np.concatenate(list(trajectory.chunks("request", played)))
+    assert streamed[:, 0].tolist() == [0, 1, 2, 3, 4]
+    stored = list(trajectory.chunks("request", hold))
+    assert [chunk.tolist() for chunk in stored] == [[[7], [7]]]